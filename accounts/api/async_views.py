@@ -0,0 +1,35 @@
+"""
+Async version of the profile endpoint, mounted at /api/v1/async/auth/profile/.
+See books/api/async_views.py.
+"""
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_http_methods
+
+from accounts.models import Profile
+from core.async_api import api_view, json_payload, json_response
+from core.queries import query_budget
+from .serializers import UpdateProfileSerializer, UserSerializer
+
+
+@require_http_methods(['GET', 'PATCH'])
+@api_view
+@query_budget(3)
+async def profile(request):
+    """GET + PATCH, same responses as ProfileView."""
+    user = request.user
+    try:
+        user.profile  # loaded with the user by the authentication cache, no query
+    except Profile.DoesNotExist:
+        user.profile, _ = await Profile.objects.aget_or_create(user=user, defaults={'display_name': user.username})
+
+    if request.method == 'GET':
+        return json_response(UserSerializer(user).data)
+
+    data = json_payload(request)
+    if data is None:
+        return json_response({'detail': 'JSON parse error.'}, status=400)
+    serializer = UpdateProfileSerializer(user.profile, data=data, partial=True)
+    if not serializer.is_valid():
+        return json_response(serializer.errors, status=400)
+    await sync_to_async(serializer.save)()
+    return json_response({"message": "Profile updated.", "user": UserSerializer(user).data})
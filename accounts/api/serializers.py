@@ -132,6 +132,14 @@ class ResendOTPSerializer(serializers.Serializer):
 # ─────────────────────────────────────────────
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # Clients can greet the user from the token alone; the access token copies this claim.
+        token = super().get_token(user)
+        profile = getattr(user, 'profile', None)
+        token['display_name'] = (profile and profile.display_name) or user.username
+        return token
+
     def validate(self, attrs):
         username_or_email = attrs.get(self.username_field)
 
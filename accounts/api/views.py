@@ -175,15 +175,23 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 class ProfileView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_profile(self, user):
+        # The profile usually comes with the cached user (accounts/authentication.py);
+        # create it for existing users who have none.
+        try:
+            return user.profile
+        except Profile.DoesNotExist:
+            user.profile = Profile.objects.create(user=user, display_name=user.username)
+            return user.profile
+
     def get(self, request):
-        # Ensure profile exists for existing users
-        Profile.objects.get_or_create(user=request.user, defaults={'display_name': request.user.username})
+        self.get_profile(request.user)
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
 
     def patch(self, request):
         """Update display_name and/or timezone."""
-        profile, _ = Profile.objects.get_or_create(user=request.user, defaults={'display_name': request.user.username})
+        profile = self.get_profile(request.user)
         serializer = UpdateProfileSerializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -0,0 +1,138 @@
+"""
+JWT authentication that reads the user, with their profile, from a cache.
+
+simplejwt's JWTAuthentication loads the User row on every request, and views
+that show the profile load that too. Here both come from a small per-process
+table (AUTH_CACHE_LOCAL_SECONDS) in front of the shared Django cache
+(AUTH_CACHE_SECONDS), so a hit costs no query. Saving or deleting a User or
+Profile (password change, deactivation, profile edit) drops the shared entry
+and this process's copy (accounts/signals.py); other processes keep theirs
+for at most AUTH_CACHE_LOCAL_SECONDS.
+
+Lookups are counted in mycashbook_cache_requests_total as cache="auth_local"
+(the per-process table) and cache="auth" (the shared cache behind it).
+
+Entries are pickled, so every request gets its own User instance. The
+password hash is deferred and never cached: code that needs it (changing the
+password, CHECK_REVOKE_TOKEN) loads it from the database on access. The
+per-process table is a small LRU, so filling it evicts the coldest users only.
+"""
+import pickle
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core import metrics
+
+LOCAL_MAX_ENTRIES = 1000
+
+_local = OrderedDict()  # cache key -> (expires at, pickled user), oldest use first; tokens carry the id as a string
+
+
+def _cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _local_get(key):
+    entry = _local.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= time.monotonic():
+        _local.pop(key, None)
+        return None
+    try:
+        _local.move_to_end(key)
+    except KeyError:  # evicted by another thread in between
+        pass
+    return entry[1]
+
+
+def _local_set(key, data):
+    _local.pop(key, None)  # re-insert at the most recently used end
+    _local[key] = (time.monotonic() + settings.AUTH_CACHE_LOCAL_SECONDS, data)
+    while len(_local) > LOCAL_MAX_ENTRIES:
+        _local.popitem(last=False)
+
+
+def _users():
+    return get_user_model().objects.select_related('profile').defer('password')
+
+
+def cached_user(user_id):
+    """The user with `user_id` and their profile, from the caches when possible; None if there is no such user."""
+    key = _cache_key(user_id)
+    data = _local_get(key)
+    metrics.record_cache('auth_local', data is not None)
+    if data is None:
+        data = cache.get(key)
+        metrics.record_cache('auth', data is not None)
+        if data is None:
+            user = _users().filter(pk=user_id).first()
+            if user is None:
+                return None
+            data = pickle.dumps(user)
+            cache.set(key, data, settings.AUTH_CACHE_SECONDS)
+        _local_set(key, data)
+    return pickle.loads(data)
+
+
+async def acached_user(user_id):
+    """`cached_user()` for async views."""
+    key = _cache_key(user_id)
+    data = _local_get(key)
+    metrics.record_cache('auth_local', data is not None)
+    if data is None:
+        data = await cache.aget(key)
+        metrics.record_cache('auth', data is not None)
+        if data is None:
+            user = await _users().filter(pk=user_id).afirst()
+            if user is None:
+                return None
+            data = pickle.dumps(user)
+            await cache.aset(key, data, settings.AUTH_CACHE_SECONDS)
+        _local_set(key, data)
+    return pickle.loads(data)
+
+
+def forget_user(user_id):
+    """Drop a user's entries; again once the write commits, in case a request cached the old row meanwhile."""
+    key = _cache_key(user_id)
+
+    def forget():
+        cache.delete(key)
+        _local.pop(key, None)
+
+    forget()
+    transaction.on_commit(forget)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with the user looked up through `cached_user()`; the token checks are unchanged."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,20 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user
+from .models import Profile
+
+
+# Password changes, deactivation and profile edits must not be served from
+# the authentication cache (accounts/authentication.py).
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def forget_cached_profile(sender, instance, **kwargs):
+    forget_user(instance.user_id)
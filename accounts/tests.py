@@ -1,3 +1,134 @@
-from django.test import TestCase
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books.models import Transaction
+from core.testing import make_owner, make_user
+
+
+class CachedAuthenticationTests(TestCase):
+    """JWT requests find the user and profile in the authentication cache until either changes."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('cached', display_name='Cached User', email='c@example.com')
+        self.api = APIClient()
+        login = self.api.post('/api/v1/auth/login/', {'username': 'c@example.com', 'password': 'password123'})
+        self.token = AccessToken(login.json()['access'])
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_token_carries_display_name(self):
+        self.assertEqual(self.token['display_name'], 'Cached User')
+
+    def test_hit_costs_no_queries(self):
+        self.api.get('/api/v1/auth/profile/')
+        with self.assertNumQueries(0):
+            response = self.api.get('/api/v1/auth/profile/')
+        self.assertEqual(response.json()['profile']['display_name'], 'Cached User')
+
+    def test_changes_are_not_served_from_cache(self):
+        self.api.get('/api/v1/auth/profile/')
+        response = self.api.patch('/api/v1/auth/profile/', {'display_name': 'Renamed'}, format='json')
+        self.assertEqual(response.json()['user']['profile']['display_name'], 'Renamed')
+        self.assertEqual(self.api.get('/api/v1/auth/profile/').json()['profile']['display_name'], 'Renamed')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.api.get('/api/v1/auth/profile/').status_code, 401)
+
+    def test_password_hash_is_not_cached(self):
+        from accounts import authentication
+        self.api.get('/api/v1/auth/profile/')
+        key = f'auth:user:{self.user.pk}'
+        for data in (cache.get(key), authentication._local[key][1]):
+            self.assertNotIn(self.user.password.encode(), data)
+            self.assertNotIn(b'pbkdf2', data)
+
+        # Password checks load the hash on demand, and saving the user keeps it.
+        response = self.api.post('/api/v1/auth/change-password/', {'old_password': 'password123', 'new_password': 'changed123'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('changed123'))
+        self.api.patch('/api/v1/auth/profile/', {'display_name': 'Renamed'}, format='json')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('changed123'))
+
+    @patch('accounts.authentication.LOCAL_MAX_ENTRIES', 2)
+    def test_local_table_evicts_the_least_recently_used(self):
+        from accounts.authentication import _local, _local_get, _local_set
+        _local.clear()
+        _local_set('a', b'a')
+        _local_set('b', b'b')
+        _local_get('a')
+        _local_set('c', b'c')
+        self.assertEqual(list(_local), ['a', 'c'])
+
+
+class SessionQueryTests(TestCase):
+    """Cached sessions (core/sessions.py) take the session query off every page and skip unchanged saves."""
+
+    DB_SESSIONS = 'django.contrib.sessions.backends.db'
+    CACHED_SESSIONS = 'core.sessions'
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.book = make_owner('session', 'Session Book')
+        Transaction.objects.create(book=self.book, amount='10.00', type='deposit')
+
+    def page_queries(self, engine, url):
+        with override_settings(SESSION_ENGINE=engine):
+            client = self.client_class()
+            client.force_login(self.user)
+            client.get(url)  # fills the caches
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(client.get(url).status_code, 200)
+        return [q['sql'] for q in queries]
+
+    def test_pages_skip_the_session_query(self):
+        # Measured with a warm cache: dashboard 4 -> 3 queries, book page 5 -> 4.
+        for url, (expected_before, expected_after) in (('/', (4, 3)), (f'/book/{self.book.id}/', (5, 4))):
+            before = self.page_queries(self.DB_SESSIONS, url)
+            after = self.page_queries(self.CACHED_SESSIONS, url)
+            self.assertTrue(any('django_session' in sql for sql in before), url)
+            self.assertFalse(any('django_session' in sql for sql in after), url)
+            self.assertEqual((len(before), len(after)), (expected_before, expected_after), url)
+
+    @override_settings(SESSION_ENGINE=CACHED_SESSIONS)
+    def test_messages_and_unchanged_sessions_are_not_written(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/book/{self.book.id}/add-transaction/', {
+                'amount': '5.00', 'type': 'deposit', 'note': '', 'created_at': '2025-03-04',
+            })
+        self.assertIn('messages', response.cookies)
+        self.assertFalse(any('django_session' in q['sql'] for q in queries))
+        self.assertContains(self.client.get(response.url), 'Transaction added successfully')
+
+        from core.sessions import SessionStore
+        session = SessionStore(self.client.session.session_key)
+        session['_auth_user_id'] = session['_auth_user_id']
+        with self.assertNumQueries(0):
+            session.save()
+        session['display_name'] = 'Session User'
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        self.assertTrue(any(q['sql'].startswith('UPDATE "django_session"') for q in queries))
+
+    @override_settings(SESSION_ENGINE=CACHED_SESSIONS)
+    def test_nested_changes_are_saved(self):
+        from core.sessions import SessionStore
+        session = SessionStore()
+        session['recent_books'] = [1]
+        session.save()
+
+        session = SessionStore(session.session_key)
+        session['recent_books'].append(2)
+        session.modified = True
+        session.save()
+        cache.clear()  # read it back from the database
+        self.assertEqual(SessionStore(session.session_key)['recent_books'], [1, 2])
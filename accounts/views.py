@@ -8,7 +8,6 @@ from django.conf import settings
 import random, datetime
 from django.utils.crypto import get_random_string
 from .models import Profile, UserProfile, PendingUser   # ← NEW
-import requests
 from datetime import timedelta
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
@@ -21,6 +20,8 @@ def cleanup_expired_pending_users():
 # 🔵 DETECT TIMEZONE
 # -----------------------------
 def detect_timezone_from_ip(ip):
+    import requests  # only signups call out over HTTP
+
     try:
         resp = requests.get(f'https://ipapi.co/{ip}/json/', timeout=2).json()
         return resp.get('timezone', 'UTC')
@@ -0,0 +1,137 @@
+"""
+Vectorized cash-flow analytics for one book (GET /api/v1/books/{id}/analytics/).
+
+The history is loaded as NumPy arrays — date ordinals and deposit/withdraw
+amounts in integer minor units (paisa), converted by the database — from the
+daily rollups (books/rollups.py), so a 100k-transaction book is one row per
+active day, not 100k rows through the ORM. Everything else is array
+arithmetic: per-day totals with `bincount`, running balances with `cumsum`,
+moving averages as differences of cumulative sums. No Decimal is touched per
+row or per day.
+"""
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+from .models import DailyRollup
+
+WINDOWS = (7, 30)
+BURN_WINDOWS = (30, 90)
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+MONTHS = tuple(date(2000, m, 1).strftime('%B') for m in range(1, 13))
+EPOCH = np.datetime64('0001-01-01')  # date ordinal 1
+
+
+def cents(field):
+    return Cast(Round(F(field) * 100), BigIntegerField())
+
+
+def load(book):
+    """(days, deposits, withdrawals, count): day ordinals, per-day minor-unit totals and the transaction count."""
+    rows = (
+        DailyRollup.objects.using(book._state.db).filter(book_id=book.pk)
+        .values_list('period', cents('deposit_total'), cents('withdraw_total'), F('deposit_count') + F('withdraw_count'))
+    )
+    size = len(rows)
+    days = np.fromiter((row[0].toordinal() for row in rows), dtype=np.int64, count=size)
+    deposits, withdrawals, counts = (
+        np.fromiter((row[i] for row in rows), dtype=np.int64, count=size) for i in (1, 2, 3)
+    )
+    return days, deposits, withdrawals, int(counts.sum())
+
+
+def money(cents):
+    """Minor units (possibly fractional, e.g. an average) -> exact 2-decimal string."""
+    return str(Decimal(int(round(float(cents)))).scaleb(-2))
+
+
+def daily_series(days, deposits, withdrawals, start, end):
+    """Per-day inflow, outflow and net in minor units for every day in [start, end]."""
+    span = end - start + 1
+    keep = days <= end
+    offsets = days[keep] - start
+    inflow = np.bincount(offsets, weights=deposits[keep], minlength=span)
+    outflow = np.bincount(offsets, weights=withdrawals[keep], minlength=span)
+    return inflow, outflow, inflow - outflow
+
+
+def moving_average(values, window):
+    """Trailing mean over `window` days (shorter at the start of the history)."""
+    totals = np.cumsum(values)
+    totals[window:] = totals[window:] - totals[:-window]
+    return totals / np.minimum(np.arange(1, len(values) + 1), window)
+
+
+def analyze(days, deposits, withdrawals, count, today=None, history=90):
+    """
+    Trends for the arrays from `load()`: the last `history` days of balance and
+    moving averages, burn rates, weekday/month seasonality and a runway forecast.
+    """
+    today = (today or date.today()).toordinal()
+    if not count:
+        return {'transactions': 0, 'balance': money(0), 'series': [], 'burn_rate': {}, 'seasonality': {},
+                'forecast': {'daily_trend': money(0), 'runway_days': None, 'runs_out_on': None}}
+
+    start = int(min(days.min(), today))
+    inflow, outflow, net = daily_series(days, deposits, withdrawals, start, today)
+    balance = np.cumsum(net)
+    span = len(net)
+
+    averages = {w: moving_average(net, w) for w in WINDOWS}
+    ordinals = np.arange(start, start + span)
+    shown = slice(max(span - history, 0), span)
+    series = [
+        {'date': date.fromordinal(int(d)).isoformat(), 'net': money(n), 'balance': money(b),
+         **{f'net_{w}d': money(averages[w][i]) for w in WINDOWS}}
+        for i, d, n, b in zip(range(shown.start, shown.stop), ordinals[shown], net[shown], balance[shown])
+    ]
+
+    # Calendar position of every day in the history: ordinal 1 was a Monday.
+    weekday = (ordinals - 1) % 7
+    month = (EPOCH + (ordinals - 1).astype('timedelta64[D]')).astype('datetime64[M]').astype(np.int64) % 12
+    seasonality = {
+        'weekday': seasonal_means(weekday, net, outflow, WEEKDAYS),
+        'month': seasonal_means(month, net, outflow, MONTHS),
+    }
+
+    burn_rate = {f'{w}d': money(outflow[-w:].mean()) for w in BURN_WINDOWS}
+    burn_rate.update({f'net_{w}d': money(-net[-w:].mean()) for w in BURN_WINDOWS})
+
+    return {
+        'transactions': count,
+        'balance': money(balance[-1]),
+        'series': series,
+        'burn_rate': burn_rate,
+        'seasonality': seasonality,
+        'forecast': forecast(balance, today),
+    }
+
+
+def seasonal_means(bucket, net, outflow, labels):
+    """Average daily net and outflow per bucket (weekday or month); empty buckets are left out."""
+    size = len(labels)
+    days = np.bincount(bucket, minlength=size)
+    net_sum = np.bincount(bucket, weights=net, minlength=size)
+    out_sum = np.bincount(bucket, weights=outflow, minlength=size)
+    return {
+        labels[i]: {'avg_net': money(net_sum[i] / days[i]), 'avg_outflow': money(out_sum[i] / days[i])}
+        for i in range(size) if days[i]
+    }
+
+
+def forecast(balance, today, window=90):
+    """Least-squares trend of the last `window` days of balance, and when it would reach zero."""
+    recent = balance[-window:]
+    slope = float(np.polyfit(np.arange(len(recent)), recent, 1)[0]) if len(recent) > 1 else 0.0
+    runway = None
+    if round(slope) < 0 and balance[-1] > 0:  # a trend under a paisa a day is flat
+        runway = int(balance[-1] // -slope)
+    return {
+        'daily_trend': money(slope),
+        'runway_days': runway,
+        'runs_out_on': date.fromordinal(today + runway).isoformat()
+                       if runway is not None and today + runway <= date.max.toordinal() else None,
+    }
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import async_views
+
+# Async mirrors of the busiest API endpoints (see async_views.py), under /api/v1/async/.
+urlpatterns = [
+    path('books/',                           async_views.book_list,         name='async_book_list'),
+    path('books/<int:book_id>/transactions/', async_views.book_transactions, name='async_book_transactions'),
+    path('validate-bid/',                    async_views.validate_bid,      name='async_validate_bid'),
+    path('transfer/',                        async_views.transfer,          name='async_transfer_funds'),
+]
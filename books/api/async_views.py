@@ -0,0 +1,113 @@
+"""
+Async versions of the hot JSON endpoints, mounted under /api/v1/async/.
+
+Same serializers and response shapes as the DRF views in views.py, but the ORM
+is awaited instead of holding a worker thread, so one ASGI worker
+(`uvicorn core.asgi:application`) keeps many connections in flight.
+Serializer validation that looks up books, transfers (which need a database
+transaction) and the list endpoints' `Serializer.rows()` run through
+sync_to_async: a list request still costs one thread hop, as fetching the
+rows with `async for` would (Django's async ORM runs the query in a thread).
+"""
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+
+from books import rollups, transfers
+from books.models import Book
+from core.async_api import api_view, json_payload, json_response
+from core.queries import query_budget
+from .serializers import BookSerializer, TransactionSerializer, TransferSerializer, ValidateBIDSerializer
+
+# Resolving a user's shard may hit the directory on first use.
+books_for = sync_to_async(Book.objects.for_user)
+
+
+def parse_error():
+    return json_response({'detail': 'JSON parse error.'}, status=400)
+
+
+# ─────────────────────────────────────────────
+# Books & transactions
+# ─────────────────────────────────────────────
+
+@require_GET
+@api_view
+@query_budget(2)
+async def book_list(request):
+    """GET /api/v1/async/books/"""
+    books = await books_for(request.user)
+    rows = await sync_to_async(BookSerializer.rows)(books.with_totals().order_by('-created_at'))
+    return json_response(rows)
+
+
+@require_http_methods(['GET', 'POST'])
+@api_view
+@query_budget(3 + rollups.WRITE_QUERIES)
+async def book_transactions(request, book_id):
+    """
+    GET  /api/v1/async/books/{id}/transactions/  — list transactions for a book
+    POST /api/v1/async/books/{id}/transactions/  — add a new transaction
+    """
+    books = await books_for(request.user)
+    try:
+        book = await books.aget(pk=book_id)
+    except Book.DoesNotExist:
+        return json_response({'detail': 'No Book matches the given query.'}, status=404)
+
+    if request.method == 'GET':
+        rows = await sync_to_async(TransactionSerializer.rows)(book.transactions.order_by('-created_at', '-id'))
+        return json_response(rows)
+
+    data = json_payload(request)
+    if data is None:
+        return parse_error()
+    serializer = TransactionSerializer(data=data)
+    if not serializer.is_valid():
+        return json_response(serializer.errors, status=400)
+    transaction = await book.transactions.acreate(**serializer.validated_data)
+    return json_response(TransactionSerializer(transaction).data, status=201)
+
+
+# ─────────────────────────────────────────────
+# P2P transfer
+# ─────────────────────────────────────────────
+
+@require_GET
+@api_view
+@query_budget(2)
+async def validate_bid(request):
+    """GET /api/v1/async/validate-bid/?bid=XXXXXX"""
+    serializer = ValidateBIDSerializer(data=request.GET)
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response({'success': False, 'errors': serializer.errors}, status=400)
+    book = serializer.validated_data['book']
+    return json_response({
+        'success': True,
+        'owner_name': book.user.profile.display_name or book.user.username,
+        'book_name': book.name,
+        'bid': serializer.validated_data['bid'],
+    })
+
+
+@require_POST
+@api_view
+@query_budget(10 + 2 * rollups.WRITE_QUERIES)  # a cross-shard transfer opens a transaction on each shard
+async def transfer(request):
+    """POST /api/v1/async/transfer/  Body: { sender_book_id, recipient_bid, amount, note (optional) }"""
+    data = json_payload(request)
+    if data is None:
+        return parse_error()
+    serializer = TransferSerializer(data=data, context={'request': request})
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response({'success': False, 'errors': serializer.errors}, status=400)
+
+    data = serializer.validated_data
+    try:
+        await sync_to_async(transfers.transfer)(
+            data['sender_book'], data['recipient_book'], data['amount'], data['note']
+        )
+    except transfers.InsufficientBalance as e:
+        return json_response({'success': False, 'message': str(e)}, status=400)
+    except Exception as e:
+        return json_response({'success': False, 'message': f'Transfer failed: {str(e)}'}, status=500)
+    return json_response({'success': True, 'message': f"Successfully transferred {data['amount']} TK."})
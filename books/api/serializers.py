@@ -1,15 +1,75 @@
+from decimal import Decimal
+from operator import itemgetter
+
 from rest_framework import serializers
+from books import rollups
 from books.models import Book, Transaction
+from books.sharding import book_by_bid
+
+# Money is returned as an exact 2-decimal string ("-12.50"), like `amount`.
+MONEY = serializers.DecimalField(max_digits=14, decimal_places=2)
+DATE = serializers.DateField()
+DATETIME = serializers.DateTimeField()
+
+
+# ─────────────────────────────────────────────
+# Sparse fieldsets: ?fields=a,b / ?omit=c
+# ─────────────────────────────────────────────
+
+def requested_fields(request, serializer_class):
+    """
+    The serializer fields a client asked for with `?fields=` and/or `?omit=`
+    (comma-separated), in the serializer's order. All fields by default.
+    """
+    available = serializer_class.Meta.fields
+    params = getattr(request, 'query_params', request.GET)
+    wanted, omitted = params.get('fields'), params.get('omit')
+    if not wanted and not omitted:
+        return available
+
+    wanted = {name.strip() for name in wanted.split(',') if name.strip()} if wanted else set(available)
+    omitted = {name.strip() for name in omitted.split(',') if name.strip()} if omitted else set()
+    unknown = (wanted | omitted).difference(available)
+    if unknown:
+        raise serializers.ValidationError({'fields': f"Unknown field(s): {', '.join(sorted(unknown))}."})
+    return [name for name in available if name in wanted and name not in omitted]
+
+
+def columns_for(serializer_class, fields):
+    """Model columns / annotations needed to render `fields` (see the serializer's SOURCES)."""
+    return list(dict.fromkeys(column for name in fields for column in serializer_class.SOURCES[name]))
+
+
+class SparseFieldsMixin:
+    """Drops the fields not listed in `context['fields']` (set by the viewsets from the query string)."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        wanted = self.context.get('fields')
+        if wanted is not None:
+            for name in set(fields).difference(wanted):
+                del fields[name]
+        return fields
 
 
 # ─────────────────────────────────────────────
 # TRANSACTION Serializer
 # ─────────────────────────────────────────────
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # FIX: sign_amount is a model @property, must use SerializerMethodField
     sign_amount = serializers.SerializerMethodField()
 
+    # Output field -> model columns it is computed from.
+    SOURCES = {
+        'id': ('id',),
+        'amount': ('amount',),
+        'type': ('type',),
+        'note': ('note',),
+        'created_at': ('created_at',),
+        'sign_amount': ('amount', 'type'),
+    }
+
     class Meta:
         model = Transaction
         # FIX: removed 'book' from fields — it's set server-side, not by the client
@@ -17,28 +77,227 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'sign_amount']
 
     def get_sign_amount(self, obj):
-        return float(obj.sign_amount)
+        return MONEY.to_representation(obj.sign_amount)
+
+    @classmethod
+    def rows(cls, queryset, fields=None):
+        """
+        Fast path for list endpoints: the same output as `cls(queryset, many=True).data`,
+        built straight from `.values()` rows without instantiating models or fields.
+        Only the columns behind `fields` (default: all) are selected.
+        """
+        fields = fields or cls.Meta.fields
+        amount_repr, date_repr = MONEY.to_representation, DATE.to_representation
+        if list(fields) == cls.Meta.fields:
+            return [
+                {
+                    'id': pk,
+                    'amount': amount_repr(amount),
+                    'type': t_type,
+                    'note': note,
+                    'created_at': date_repr(created_at),
+                    'sign_amount': amount_repr(amount if t_type == 'deposit' else -amount),
+                }
+                for pk, amount, t_type, note, created_at in queryset.values_list(*cls.Meta.fields[:-1])
+            ]
+
+        represent = {
+            'id': itemgetter('id'),
+            'amount': lambda row: amount_repr(row['amount']),
+            'type': itemgetter('type'),
+            'note': itemgetter('note'),
+            'created_at': lambda row: date_repr(row['created_at']),
+            'sign_amount': lambda row: amount_repr(row['amount'] if row['type'] == 'deposit' else -row['amount']),
+        }
+        getters = [(name, represent[name]) for name in fields]
+        return [{name: get(row) for name, get in getters} for row in queryset.values(*columns_for(cls, fields))]
+
+
+class TransactionFilterSerializer(serializers.Serializer):
+    """
+    Query-string filters for the transaction lists. Each maps to a predicate
+    served by one of Transaction's (book, ...) indexes:
+    ?type=withdraw&min_amount=5000&start=2025-07-01&end=2025-09-30&note=rent
+    """
+    type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES, required=False)
+    min_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    # Prefix match, so the (book, note) index can serve it.
+    note = serializers.CharField(max_length=255, required=False)
+
+    LOOKUPS = {
+        'type': 'type',
+        'min_amount': 'amount__gte',
+        'max_amount': 'amount__lte',
+        'start': 'created_at__gte',
+        'end': 'created_at__lte',
+        'note': 'note__istartswith',
+    }
+    PAGINATION_PARAMS = ('cursor', 'page_size')
+
+    def validate(self, data):
+        if 'start' in data and 'end' in data and data['start'] > data['end']:
+            raise serializers.ValidationError({'end': "End date must not be before start date."})
+        return data
+
+    def filter(self, queryset):
+        return queryset.filter(**{self.LOOKUPS[name]: value for name, value in self.validated_data.items()})
+
+    def is_paged(self):
+        """Filtered or paged requests get the {next, totals, results} envelope; plain ones the bare list."""
+        return bool(self.validated_data) or any(p in self.initial_data for p in self.PAGINATION_PARAMS)
+
+    @staticmethod
+    def totals(queryset):
+        totals = queryset.totals()
+        deposits, withdrawals = totals['deposit_total'], totals['withdraw_total']
+        return {
+            'count': totals['deposit_count'] + totals['withdraw_count'],
+            'deposit_total': MONEY.to_representation(deposits),
+            'deposit_count': totals['deposit_count'],
+            'withdraw_total': MONEY.to_representation(withdrawals),
+            'withdraw_count': totals['withdraw_count'],
+            'net': MONEY.to_representation(deposits - withdrawals),
+        }
+
+
+class SummaryQuerySerializer(serializers.Serializer):
+    """Query string for GET /api/v1/books/{id}/summary/?granularity=day|week|month&start=&end="""
+    granularity = serializers.ChoiceField(choices=rollups.GRANULARITIES, default='month')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    @staticmethod
+    def rows(periods):
+        money, day = MONEY.to_representation, DATE.to_representation
+        return [
+            {
+                'period': day(p['period']),
+                'deposit_total': money(p['deposit_total']),
+                'deposit_count': p['deposit_count'],
+                'withdraw_total': money(p['withdraw_total']),
+                'withdraw_count': p['withdraw_count'],
+                'net': money(p['net']),
+                'closing_balance': money(p['closing_balance']),
+            }
+            for p in periods
+        ]
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """Query string for GET /api/v1/books/{id}/analytics/?days=90 (length of the daily series returned)."""
+    days = serializers.IntegerField(min_value=1, max_value=730, default=90)
+
+
+class StatementQuerySerializer(serializers.Serializer):
+    """Query string for GET /api/v1/statement/?start=&end= (the consolidated statement, books/statements.py)."""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if 'start' in data and 'end' in data and data['start'] > data['end']:
+            raise serializers.ValidationError({'end': "End date must not be before start date."})
+        return data
+
+    @staticmethod
+    def rows(entries):
+        money, day = MONEY.to_representation, DATE.to_representation
+        return [
+            {
+                **entry,
+                'created_at': day(entry['created_at']),
+                'amount': money(entry['amount']),
+                'sign_amount': money(entry['sign_amount']),
+                'book_balance': money(entry['book_balance']),
+                'balance': money(entry['balance']),
+            }
+            for entry in entries
+        ]
+
+    @staticmethod
+    def balances(balances):
+        money = MONEY.to_representation
+        return {
+            'balance': money(sum((book['balance'] for book in balances.values()), rollups.ZERO)),
+            'books': [{**book, 'balance': money(book['balance'])} for book in balances.values()],
+        }
+
+
+class ArchiveQuerySerializer(StatementQuerySerializer):
+    """Query string for GET /api/v1/reports/archive/?books=1,2,3&start=&end= (all books without `books`)."""
+    MAX_BOOKS = 100
+
+    books = serializers.CharField(required=False)
+
+    def validate_books(self, value):
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in value.split(',') if pk.strip()))
+        except ValueError:
+            raise serializers.ValidationError("Comma-separated book ids expected.")
+        if not ids:
+            raise serializers.ValidationError("At least one book id expected.")
+        if len(ids) > self.MAX_BOOKS:
+            raise serializers.ValidationError(f"At most {self.MAX_BOOKS} books per archive.")
+        return ids
 
 
 # ─────────────────────────────────────────────
 # BOOK Serializer
 # ─────────────────────────────────────────────
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     transactions_count = serializers.SerializerMethodField()
     balance = serializers.SerializerMethodField()
 
+    # Output field -> model columns / `with_totals()` annotations it is computed from.
+    SOURCES = {
+        'id': ('id',),
+        'name': ('name',),
+        'description': ('description',),
+        'bid': ('bid',),
+        'created_at': ('created_at',),
+        'transactions_count': ('transaction_count',),
+        'balance': ('total_balance',),
+    }
+
     class Meta:
         model = Book
         # FIX: Added 'bid' — required for Flutter P2P transfer feature
         fields = ['id', 'name', 'description', 'bid', 'created_at', 'transactions_count', 'balance']
         read_only_fields = ['id', 'bid', 'created_at']
 
+    # BookViewSet annotates `transaction_count` / `total_balance` so listing N books
+    # costs one query; un-annotated instances (e.g. right after create) fall back.
     def get_transactions_count(self, obj):
+        if hasattr(obj, 'transaction_count'):
+            return obj.transaction_count
         return obj.transactions.count()
 
     def get_balance(self, obj):
-        return float(sum(t.sign_amount for t in obj.transactions.all()))
+        if hasattr(obj, 'total_balance'):
+            return MONEY.to_representation(obj.total_balance)
+        return MONEY.to_representation(sum((t.sign_amount for t in obj.transactions.all()), Decimal('0')))
+
+    @classmethod
+    def rows(cls, queryset, fields=None):
+        """
+        Fast path for a queryset annotated with `with_totals()`; same output as the serializer.
+        `fields` (default: all) must only name totals the queryset was annotated with.
+        """
+        fields = fields or cls.Meta.fields
+        money, dt = MONEY.to_representation, DATETIME.to_representation
+        represent = {
+            'created_at': dt,
+            'balance': money,
+        }
+        columns = [cls.SOURCES[name][0] for name in fields]
+        converters = [(name, represent.get(name)) for name in fields]
+        return [
+            {name: convert(value) if convert else value for (name, convert), value in zip(converters, row)}
+            for row in queryset.values_list(*columns)
+        ]
 
 
 # ─────────────────────────────────────────────
@@ -56,11 +315,16 @@ class ValidateBIDSerializer(serializers.Serializer):
         if not value.isdigit():
             raise serializers.ValidationError("BID must be a 6-digit number.")
         try:
-            book = Book.objects.get(bid=value)
+            self._book = book_by_bid(value)
         except Book.DoesNotExist:
             raise serializers.ValidationError("Invalid BID. Book not found.")
         return value
 
+    def validate(self, data):
+        # Attach the book (with owner + profile) for use in view
+        data['book'] = self._book
+        return data
+
 
 # ─────────────────────────────────────────────
 # P2P TRANSFER Serializer
@@ -73,14 +337,14 @@ class TransferSerializer(serializers.Serializer):
     """
     sender_book_id = serializers.IntegerField()
     recipient_bid = serializers.CharField(max_length=6, min_length=6)
-    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0.01)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
     note = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
 
     def validate_recipient_bid(self, value):
         if not value.isdigit():
             raise serializers.ValidationError("BID must be a 6-digit number.")
         try:
-            Book.objects.get(bid=value)
+            self._recipient_book = book_by_bid(value)
         except Book.DoesNotExist:
             raise serializers.ValidationError("Recipient BID not found.")
         return value
@@ -90,7 +354,7 @@ class TransferSerializer(serializers.Serializer):
 
         # Validate sender book ownership
         try:
-            sender_book = Book.objects.get(id=data['sender_book_id'], user=request.user)
+            sender_book = Book.objects.for_user(request.user).get(id=data['sender_book_id'])
         except Book.DoesNotExist:
             raise serializers.ValidationError({"sender_book_id": "Sender book not found or not owned by you."})
 
@@ -100,5 +364,5 @@ class TransferSerializer(serializers.Serializer):
 
         # Attach objects for use in view
         data['sender_book'] = sender_book
-        data['recipient_book'] = Book.objects.get(bid=data['recipient_bid'])
+        data['recipient_book'] = self._recipient_book
         return data
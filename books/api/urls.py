@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookViewSet, TransactionViewSet, ValidateBIDView, TransferFundsView
+from .views import BookViewSet, TransactionViewSet, StatementView, StatementPDFView, ReportArchiveView, ValidateBIDView, TransferFundsView
 
 router = DefaultRouter()
 router.register(r'books',        BookViewSet,       basename='book')
@@ -9,6 +9,11 @@ router.register(r'transactions', TransactionViewSet, basename='transaction')
 urlpatterns = [
     path('', include(router.urls)),
 
+    # ── Statements across books ──────────────────────
+    path('statement/',       StatementView.as_view(),     name='api_statement'),
+    path('statement/pdf/',   StatementPDFView.as_view(),  name='api_statement_pdf'),
+    path('reports/archive/', ReportArchiveView.as_view(), name='api_report_archive'),
+
     # ── P2P Transfer ─────────────────────────────────
     path('validate-bid/', ValidateBIDView.as_view(),    name='api_validate_bid'),
     path('transfer/',     TransferFundsView.as_view(),  name='api_transfer_funds'),
@@ -1,13 +1,20 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from books.models import Book, Transaction
 from decimal import Decimal, InvalidOperation
-from django.db import transaction as db_transaction
-from django.db.models import Sum, Case, When, DecimalField, F, Value
-from django.db.models.functions import Coalesce
-from .serializers import BookSerializer, TransactionSerializer, ValidateBIDSerializer, TransferSerializer
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from books import rollups, statements, transfers
+from core.compression import CompressedResponseMixin
+from core.pagination import KeysetPagination
+from core.renderers import ColumnarJSONRenderer, MessagePackRenderer
+from .serializers import (
+    AnalyticsQuerySerializer, ArchiveQuerySerializer, BookSerializer, StatementQuerySerializer, SummaryQuerySerializer, TransactionFilterSerializer, TransactionSerializer, ValidateBIDSerializer, TransferSerializer,
+    columns_for, requested_fields,
+)
 
 
 # ─────────────────────────────────────────────
@@ -17,19 +24,79 @@ from .serializers import BookSerializer, TransactionSerializer, ValidateBIDSeria
 class IsBookOwner(permissions.BasePermission):
     """Object-level: book must belong to the requesting user."""
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
+        return obj.user_id == request.user.id
+
+
+# The list endpoints can also answer in MessagePack or columnar JSON
+# (`Accept:` header or `?format=msgpack|columnar`) for the mobile client.
+COMPACT_RENDERER_CLASSES = [*api_settings.DEFAULT_RENDERER_CLASSES, MessagePackRenderer, ColumnarJSONRenderer]
+
+
+class SparseFieldsetMixin:
+    """
+    `?fields=a,b` / `?omit=c` on reads: only those fields are rendered, and
+    get_queryset() skips the columns and aggregates behind the others.
+    """
+
+    def fields_for(self, serializer_class):
+        if self.request.method not in permissions.SAFE_METHODS:
+            return serializer_class.Meta.fields
+        return requested_fields(self.request, serializer_class)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.fields_for(self.get_serializer_class())
+        return context
+
+
+class TransactionListMixin:
+    """
+    Transaction lists, newest first, filtered by TransactionFilterSerializer.
+    With filters or `?cursor=` / `?page_size=` the response is one keyset page
+    plus totals for the whole filtered set:
+    {"next": <url or null>, "totals": {...}, "results": [...]}
+    Plain requests keep returning the bare list the existing app expects.
+    """
+
+    def transaction_list(self, transactions):
+        params = TransactionFilterSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        transactions = params.filter(transactions).order_by('-created_at', '-id')
+        fields = self.fields_for(TransactionSerializer)
+        if not params.is_paged():
+            return Response(TransactionSerializer.rows(transactions, fields))
+
+        paginator = KeysetPagination()
+        rows = paginator.paginate(transactions, self.request, TransactionSerializer.rows, fields)
+        return paginator.get_paginated_response(rows, totals=params.totals(transactions))
 
 
 # ─────────────────────────────────────────────
 # BOOK ViewSet
 # ─────────────────────────────────────────────
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(TransactionListMixin, SparseFieldsetMixin, CompressedResponseMixin, viewsets.ModelViewSet):
     serializer_class = BookSerializer
+    renderer_classes = COMPACT_RENDERER_CLASSES
     permission_classes = [permissions.IsAuthenticated, IsBookOwner]
+    query_budget = {
+        'list': 2, 'retrieve': 2, 'transactions': 3 + rollups.WRITE_QUERIES, 'summary': 2, 'analytics': 2,
+    }
 
     def get_queryset(self):
-        return Book.objects.filter(user=self.request.user).order_by('-created_at')
+        books = Book.objects.for_user(self.request.user)
+        if self.action in ('transactions', 'summary', 'analytics'):
+            return books  # only the owner check; no book fields are rendered
+
+        # A picker asking for `?fields=id,name,bid` gets a plain SELECT, no aggregates.
+        columns = columns_for(BookSerializer, self.fields_for(BookSerializer))
+        books = books.with_totals(count='transaction_count' in columns, balance='total_balance' in columns)
+        if self.request.method in permissions.SAFE_METHODS:
+            books = books.only('user_id', *(c for c in columns if c not in books.query.annotations))
+        return books.order_by('-created_at')
+
+    def list(self, request, *args, **kwargs):
+        return Response(BookSerializer.rows(self.get_queryset(), self.fields_for(BookSerializer)))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -43,9 +110,7 @@ class BookViewSet(viewsets.ModelViewSet):
         book = self.get_object()
 
         if request.method == 'GET':
-            qs = book.transactions.all().order_by('-created_at', '-id')
-            serializer = TransactionSerializer(qs, many=True)
-            return Response(serializer.data)
+            return self.transaction_list(book.transactions.all())
 
         elif request.method == 'POST':
             serializer = TransactionSerializer(data=request.data)
@@ -54,6 +119,30 @@ class BookViewSet(viewsets.ModelViewSet):
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        """
+        GET /api/v1/books/{id}/summary/?granularity=day|week|month&start=&end=
+        Cash flow per period, read from the rollup tables.
+        """
+        book = self.get_object()
+        params = SummaryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(SummaryQuerySerializer.rows(rollups.summary(book, **params.validated_data)))
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """
+        GET /api/v1/books/{id}/analytics/?days=90
+        Moving averages, burn rate, seasonality and runway forecast (books/analytics.py).
+        """
+        from books import analytics  # NumPy is only loaded by workers that serve analytics
+
+        book = self.get_object()
+        params = AnalyticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(analytics.analyze(*analytics.load(book), history=params.validated_data['days']))
+
     @action(detail=True, methods=['get'])
     def report(self, request, pk=None):
         """
@@ -68,23 +157,146 @@ class BookViewSet(viewsets.ModelViewSet):
 # TRANSACTION ViewSet (edit / delete individual transactions)
 # ─────────────────────────────────────────────
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(TransactionListMixin, SparseFieldsetMixin, CompressedResponseMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
+    renderer_classes = COMPACT_RENDERER_CLASSES
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {
+        'list': 3, 'retrieve': 2, 'destroy': 3 + rollups.WRITE_QUERIES,
+        # An edit moves the old amount out of its day/month and the new one in.
+        'update': 4 + 2 * rollups.WRITE_QUERIES, 'partial_update': 4 + 2 * rollups.WRITE_QUERIES,
+    }
 
     def get_queryset(self):
         # Only return transactions belonging to the authenticated user's books
-        return Transaction.objects.filter(book__user=self.request.user)
+        transactions = Transaction.objects.for_user(self.request.user).select_related('book')
+        if self.request.method in permissions.SAFE_METHODS:
+            columns = columns_for(TransactionSerializer, self.fields_for(TransactionSerializer))
+            transactions = transactions.only('book__user_id', *columns)
+        return transactions
+
+    def list(self, request, *args, **kwargs):
+        return self.transaction_list(Transaction.objects.for_user(request.user))
 
     def get_object(self):
         obj = super().get_object()
         # Extra safety: ensure transaction belongs to requesting user
-        if obj.book.user != self.request.user:
+        if obj.book.user_id != self.request.user.id:
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You do not own this transaction.")
         return obj
 
 
+# ─────────────────────────────────────────────
+# CONSOLIDATED STATEMENT (all of the user's books)
+# ─────────────────────────────────────────────
+
+class StatementView(CompressedResponseMixin, APIView):
+    """
+    GET /api/v1/statement/?start=&end=&cursor=&page_size=
+    Every book's transactions merged oldest first, with each line's book
+    balance and overall balance, in keyset pages:
+    {"next": <url or null>, "opening": {"balance", "books": [...]}, "results": [...]}
+    `opening` holds the balances just before the page's first line.
+    """
+    renderer_classes = COMPACT_RENDERER_CLASSES
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3  # opening balances, the cursor day's rows, the page
+
+    FIELDS = ['id', 'book', 'book_name', 'created_at', 'type', 'amount', 'note', 'sign_amount', 'book_balance', 'balance']
+
+    def get(self, request):
+        params = StatementQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start, end = params.validated_data.get('start'), params.validated_data.get('end')
+
+        paginator = KeysetPagination(ordering=('created_at', 'id'))
+        cursor = request.query_params.get(paginator.cursor_query_param)
+        if cursor:
+            day, pk = paginator.decode_cursor(cursor)
+            balances = statements.opening_balances(request.user, day, through_id=pk)
+        else:
+            balances = statements.opening_balances(request.user, start)
+        opening = StatementQuerySerializer.balances(balances)
+
+        def render(queryset, fields):
+            return StatementQuerySerializer.rows(statements.entries(queryset.values_list(*statements.COLUMNS), balances))
+
+        rows = paginator.paginate(statements.transactions(request.user, start, end), request, render, self.FIELDS)
+        return paginator.get_paginated_response(rows, opening=opening)
+
+
+class StatementPDFView(APIView):
+    """
+    GET /api/v1/statement/pdf/?start=&end=
+    The consolidated statement as a PDF, in the layout of the book report.
+    Rows are read with one streaming query; the header needs the closing
+    balance and totals, so the table is drawn once they are all in.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2  # opening balances, the transactions
+
+    def get(self, request):
+        from books import reports  # ReportLab is only loaded by workers that draw PDFs
+
+        params = StatementQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start, end = params.validated_data.get('start'), params.validated_data.get('end')
+        now = reports.dhaka_now()
+
+        balances = statements.opening_balances(request.user, start)
+        rows = statements.transactions(request.user, start, end).values_list(*statements.COLUMNS)
+
+        response = HttpResponse(content_type='application/pdf')
+        filename = reports.report_filename('all_books_statement', now)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        reports.consolidated_statement_pdf(
+            response,
+            holder=request.user.get_full_name() or request.user.username,
+            period=f"{start or 'Start of Books'} to {end or now.strftime('%Y-%m-%d')}",
+            balances=balances,
+            entries=statements.entries(rows.iterator(chunk_size=2000), balances),
+            generated_at=now,
+        )
+        return response
+
+
+# ─────────────────────────────────────────────
+# STATEMENT ARCHIVE (ZIP of book PDFs)
+# ─────────────────────────────────────────────
+
+class ReportArchiveView(APIView):
+    """
+    GET /api/v1/reports/archive/?books=1,2,3&start=&end=
+    A ZIP with the PDF statement of each listed book (default: every book of
+    the user), rendered in parallel and streamed as each one finishes
+    (books/archive.py).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2  # the books, their transactions
+
+    def get(self, request):
+        from books import archive, reports  # ReportLab and the process pool, only where archives are built
+
+        params = ArchiveQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        books = Book.objects.for_user(request.user).order_by('created_at')
+        if 'books' in data:
+            books = books.filter(id__in=data['books'])
+        books = list(books.only('user_id', 'name', 'bid'))
+        if 'books' in data and len(books) != len(data['books']):
+            raise NotFound("Book not found.")
+
+        now = reports.dhaka_now()
+        holder = request.user.get_full_name() or request.user.username
+        jobs = archive.submit_statements(request.user, books, holder, data.get('start'), data.get('end'), now)
+        response = StreamingHttpResponse(archive.stream_zip(jobs), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="statements_{now.strftime("%d-%m-%Y_%H%M%S")}_MyCashbook.zip"'
+        return response
+
+
 # ─────────────────────────────────────────────
 # BID VALIDATION View
 # ─────────────────────────────────────────────
@@ -96,12 +308,13 @@ class ValidateBIDView(APIView):
     Used in Step 1 of Flutter P2P transfer flow.
     """
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
 
     def get(self, request):
         serializer = ValidateBIDSerializer(data=request.query_params)
         if serializer.is_valid():
             bid = serializer.validated_data['bid']
-            book = Book.objects.get(bid=bid)
+            book = serializer.validated_data['book']
             return Response({
                 'success': True,
                 'owner_name': book.user.profile.display_name or book.user.username,
@@ -122,6 +335,7 @@ class TransferFundsView(APIView):
     Performs a P2P transfer atomically — creates a withdrawal + a deposit.
     """
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 10 + 2 * rollups.WRITE_QUERIES  # a cross-shard transfer opens a transaction on each shard
 
     def post(self, request):
         serializer = TransferSerializer(data=request.data, context={'request': request})
@@ -134,51 +348,12 @@ class TransferFundsView(APIView):
         amount = data['amount']
         user_note = data['note']
 
-        # Check sender has sufficient balance
-        sender_balance = sender_book.transactions.aggregate(
-            balance=Coalesce(
-                Sum(Case(
-                    When(type='deposit', then=F('amount')),
-                    When(type='withdraw', then=-F('amount')),
-                    output_field=DecimalField()
-                )),
-                Value(0, output_field=DecimalField())
-            )
-        )['balance']
-
-        if sender_balance < amount:
-            return Response(
-                {'success': False, 'message': 'Insufficient balance in sender book.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Atomic transfer
         try:
-            with db_transaction.atomic():
-                sender_note = f"Transfer to BID-{recipient_book.bid}"
-                if user_note:
-                    sender_note += f": {user_note}"
-
-                Transaction.objects.create(
-                    book=sender_book,
-                    amount=amount,
-                    type='withdraw',
-                    note=sender_note
-                )
-
-                recipient_note = f"Transfer from BID-{sender_book.bid}"
-                if user_note:
-                    recipient_note += f": {user_note}"
-
-                Transaction.objects.create(
-                    book=recipient_book,
-                    amount=amount,
-                    type='deposit',
-                    note=recipient_note
-                )
-
+            transfers.transfer(sender_book, recipient_book, amount, user_note)
             return Response({'success': True, 'message': f'Successfully transferred {amount} TK.'})
 
+        except transfers.InsufficientBalance as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {'success': False, 'message': f'Transfer failed: {str(e)}'},
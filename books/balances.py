@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.db.models import Case, F, Sum, When
+
+from . import rollups
+from .statements import MONEY
+
+
+def balance_through(book, transaction):
+    """
+    Balance right after `transaction`: the previous day's closing balance from
+    the daily rollups plus that day's rows up to its id. Two queries, however long the book.
+    """
+    same_day = book.transactions.filter(created_at=transaction.created_at, id__lte=transaction.id).aggregate(
+        net=Sum(Case(When(type='deposit', then=F('amount')), default=-F('amount'), output_field=MONEY)),
+    )['net']
+    return rollups.balance_as_of(book, transaction.created_at - timedelta(days=1)) + (same_day or 0)
+
+
+def page_running_balances(transactions, book, newest_balance=None):
+    """
+    Set `running_balance` on a page of transactions ordered newest first and
+    return them as a list. Pass `newest_balance` (the book's total) on the first
+    page; later pages work it out from the rollups with `balance_through()`.
+    """
+    transactions = list(transactions)
+    if not transactions:
+        return transactions
+
+    balance = balance_through(book, transactions[0]) if newest_balance is None else newest_balance
+    for t in transactions:
+        t.running_balance = balance
+        balance -= t.sign_amount
+    return transactions
@@ -0,0 +1,166 @@
+"""
+Monthly statement run (manage.py send_monthly_statements).
+
+Every active user with an email address gets a month's consolidated
+statement (books/statements.py) as a PDF attachment. The users still waiting
+for that month are cut into chunks and the chunks spread over worker
+processes, since drawing PDFs is CPU-bound. A chunk reads all its users'
+books and transactions with one query each per shard, renders the PDFs and
+hands the messages to a MailQueue (core/mail.py), which sends them over one
+SMTP connection while the next PDF is drawn.
+
+A StatementDelivery row is written shortly after the mail server accepts a
+statement, so a run that crashes or is stopped picks up where it left off;
+at most the last CHECKPOINT_EVERY mails of a chunk can go out twice.
+"""
+import io
+import multiprocessing
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage
+from django.db import connections
+
+from core import metrics
+from core.mail import MailQueue
+
+from . import reports, sharding, statements
+from .models import Book, StatementDelivery, Transaction
+
+CHECKPOINT_EVERY = 20
+
+
+def month_bounds(period):
+    """First and last day of the month starting on `period`."""
+    following = (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return period, following - timedelta(days=1)
+
+
+def pending_users(period):
+    """Ids of the users whose statement for `period` has not gone out yet, in id order."""
+    users = (
+        User.objects.filter(is_active=True).exclude(email='')
+        .exclude(statement_deliveries__period=period)
+        .order_by('id')
+    )
+    return list(users.values_list('id', flat=True))
+
+
+def record_sent(period, user_ids):
+    if user_ids:
+        StatementDelivery.objects.bulk_create(
+            [StatementDelivery(user_id=user_id, period=period) for user_id in user_ids], ignore_conflicts=True,
+        )
+        metrics.BATCH_STATEMENTS.labels('sent').inc(len(user_ids))
+
+
+def shard_statements(alias, user_ids, start, end):
+    """
+    Yield (user id, opening balances, statement rows) for each of `user_ids`
+    that has books on `alias`, reading all of them with two queries.
+    """
+    balances = defaultdict(dict)
+    books = (
+        Book.objects.using(alias).filter(user_id__in=user_ids)
+        .annotate(opening=statements.opening_balance(start))
+        .order_by('user_id', 'created_at', 'id')
+        .values_list('user_id', 'id', 'name', 'opening')
+    )
+    for user_id, pk, name, balance in books:
+        balances[user_id][pk] = {'id': pk, 'name': name, 'balance': balance}
+
+    rows = (
+        Transaction.objects.using(alias)
+        .filter(book__user_id__in=list(balances), created_at__gte=start, created_at__lte=end)
+        .order_by('book__user_id', 'created_at', 'id')
+        .values_list('book__user_id', *statements.COLUMNS)
+    )
+    groups = groupby(rows.iterator(chunk_size=2000), key=itemgetter(0))
+    group = next(groups, None)
+    for user_id in sorted(balances):
+        lines = []
+        if group and group[0] == user_id:
+            lines = [row[1:] for row in group[1]]
+            group = next(groups, None)
+        yield user_id, balances[user_id], lines
+
+
+def statement_message(user, period, pdf, now):
+    holder = user.get_full_name() or user.username
+    message = EmailMessage(
+        subject=f"Your MyCashBook statement for {period:%B %Y}",
+        body=(
+            f"Hello {holder},\n\n"
+            f"Your statement for {period:%B %Y} is attached: the balance of every book "
+            f"at the start of the month and each transaction since.\n\n"
+            f"MyCashBook – Track your expenses wisely"
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+    message.attach(reports.report_filename(f"statement {period:%Y-%m}", now), pdf, 'application/pdf')
+    return message
+
+
+def send_chunk(period, user_ids):
+    """
+    Render and mail the statements of `user_ids` for the month starting on
+    `period`. Returns Counter(sent=, failed=, skipped=); users without books are skipped.
+    """
+    start, end = month_bounds(period)
+    now = reports.dhaka_now()
+    users = User.objects.only('username', 'first_name', 'last_name', 'email').in_bulk(user_ids)
+    result = Counter(skipped=len(user_ids))
+
+    with MailQueue() as mailer:
+        for alias, ids in sharding.users_by_shard(user_ids).items():
+            for user_id, balances, lines in shard_statements(alias, ids, start, end):
+                user = users[user_id]
+                out = io.BytesIO()
+                reports.consolidated_statement_pdf(
+                    out,
+                    holder=user.get_full_name() or user.username,
+                    period=f"{start:%d %b %Y} to {end:%d %b %Y}",
+                    balances=balances,
+                    entries=statements.entries(lines, balances),
+                    generated_at=now,
+                    metric='monthly_statement',
+                )
+                mailer.put(statement_message(user, period, out.getvalue(), now), user_id)
+                result['skipped'] -= 1
+                if len(mailer.sent) >= CHECKPOINT_EVERY:
+                    sent = mailer.take_sent()
+                    record_sent(period, sent)
+                    result['sent'] += len(sent)
+
+    sent = mailer.take_sent()
+    record_sent(period, sent)
+    result['sent'] += len(sent)
+    result['failed'] = len(mailer.failed)
+    metrics.BATCH_STATEMENTS.labels('failed').inc(len(mailer.failed))
+    return result
+
+
+def run(period, user_ids, workers=1, chunk_size=100):
+    """
+    Send the statements of `user_ids` in chunks of `chunk_size`, over
+    `workers` processes (1 = in this process). Yields each chunk's
+    (number of users, send_chunk() result) as it finishes.
+    """
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+    if workers <= 1:
+        for chunk in chunks:
+            yield len(chunk), send_chunk(period, chunk)
+        return
+
+    # Forked workers inherit Django's setup but must open their own database connections.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+        futures = {pool.submit(send_chunk, period, chunk): len(chunk) for chunk in chunks}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,92 @@
+"""
+Cached HTML fragments: the dashboard's book cards and the book page's
+transactions block (rows, cards and page links for one page).
+
+Every book has a version number in the cache. Anything that changes what its
+fragments show bumps it (Transaction.save / delete, Book.save,
+rollups.rebuild), and the fragment keys include the version, so after a bump
+the old copies are never read again and simply expire. A dashboard page reads
+all of its cards with one get_many; a cached transactions block also saves
+the book page its count and row queries.
+
+With FRAGMENT_CACHE_SECONDS = 0 (the default without a shared cache)
+everything is rendered every time.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core import metrics
+
+
+def _version_key(alias, book_id):
+    return f'book:version:{alias}:{book_id}'
+
+
+def bump(alias, book_id):
+    """
+    Give a book a new version. It is bumped again once the write commits, so
+    a fragment another worker renders from the old rows in between is dropped too.
+    """
+    key = _version_key(alias, book_id)
+    cache.set(key, time.time_ns(), None)
+    transaction.on_commit(lambda: cache.set(key, time.time_ns(), None), using=alias)
+
+
+def versions(books):
+    """Each book's current version, in order; books with none cached (or evicted) get a fresh one."""
+    keys = [_version_key(book._state.db, book.pk) for book in books]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def book_cards(books):
+    """Card HTML for each of `books` (annotated with `with_balance()`), in order."""
+    books = list(books)
+    if not settings.FRAGMENT_CACHE_SECONDS:
+        return [render_to_string('books/partials/book_card.html', {'book': book}) for book in books]
+    keys = [
+        f'fragment:card:{book._state.db}:{book.pk}:{version}'
+        for book, version in zip(books, versions(books))
+    ]
+    cards = cache.get_many(keys)
+    for key in keys:
+        metrics.record_cache('fragments', key in cards)
+    fresh = {
+        key: render_to_string('books/partials/book_card.html', {'book': book})
+        for book, key in zip(books, keys) if key not in cards
+    }
+    if fresh:
+        cache.set_many(fresh, settings.FRAGMENT_CACHE_SECONDS)
+        cards.update(fresh)
+    return [mark_safe(cards[key]) for key in keys]
+
+
+def transactions_block(book, page_number, render):
+    """
+    (html, has_rows) for one page of `book`'s transactions block, from the
+    cache or from `render()`, which returns (html, has_rows, number of the page
+    it showed). Only pages that exist are stored, so made-up page numbers
+    can't fill the cache.
+    """
+    if not settings.FRAGMENT_CACHE_SECONDS:
+        html, has_rows, _ = render()
+        return html, has_rows
+
+    key = f'fragment:transactions:{book._state.db}:{book.pk}:{versions([book])[0]}:{page_number}'
+    block = cache.get(key)
+    metrics.record_cache('fragments', block is not None)
+    if block is None:
+        html, has_rows, number = render()
+        block = (str(html), has_rows)
+        if str(number) == str(page_number):
+            cache.set(key, block, settings.FRAGMENT_CACHE_SECONDS)
+    return mark_safe(block[0]), block[1]
@@ -0,0 +1,104 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_SCENARIOS = 'api_books_list,api_transactions_list,api_transaction_create,api_validate_bid,api_profile'
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the app under gunicorn/WSGI (as in the Procfile) and under uvicorn/ASGI in turn, "
+        "run loadtest against each (sync API vs /api/v1/async) at the given concurrency levels, "
+        "and print throughput and p95 side by side. Needs seed_benchmark_data users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Worker processes for both servers.")
+        parser.add_argument('--concurrency', default='10,50,200',
+                            help="Comma-separated numbers of concurrent connections.")
+        parser.add_argument('--duration', type=float, default=15.0, help="Seconds per scenario.")
+        parser.add_argument('--scenarios', default=DEFAULT_SCENARIOS)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument('--output', default='compare-servers.json')
+
+    def servers(self, workers, port):
+        bind = f'127.0.0.1:{port}'
+        return {
+            'wsgi': {
+                'command': [sys.executable, '-m', 'gunicorn', 'core.wsgi', '--workers', str(workers), '--bind', bind],
+                'api_prefix': '/api/v1',
+            },
+            'asgi': {
+                'command': [sys.executable, '-m', 'uvicorn', 'core.asgi:application', '--workers', str(workers),
+                            '--host', '127.0.0.1', '--port', str(port), '--no-access-log'],
+                'api_prefix': '/api/v1/async',
+            },
+        }
+
+    def handle(self, *args, **options):
+        levels = [int(c) for c in options['concurrency'].split(',') if c.strip()]
+        results = {}
+        for name, server in self.servers(options['workers'], options['port']).items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}: {' '.join(server['command'][1:])}"))
+            process = subprocess.Popen(server['command'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                self.wait_for_port(options['port'], process)
+                results[name] = {}
+                for level in levels:
+                    self.stdout.write(f"-- concurrency {level}")
+                    results[name][level] = self.run_loadtest(options, server['api_prefix'], level)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+        self.print_comparison(results, levels)
+        with open(options['output'], 'w') as fh:
+            json.dump(results, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_loadtest(self, options, api_prefix, concurrency):
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as fh:
+            path = fh.name
+        try:
+            call_command(
+                'loadtest', base_url=f"http://127.0.0.1:{options['port']}", api_prefix=api_prefix,
+                concurrency=concurrency, duration=options['duration'], scenarios=options['scenarios'],
+                prefix=options['prefix'], password=options['password'], output=path, stdout=self.stdout,
+            )
+            with open(path) as fh:
+                return json.load(fh)['scenarios']
+        finally:
+            os.unlink(path)
+
+    @staticmethod
+    def wait_for_port(port, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"Server exited with code {process.returncode} before accepting connections.")
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server did not listen on port {port} within {timeout}s.")
+
+    def print_comparison(self, results, levels):
+        self.stdout.write(self.style.MIGRATE_HEADING("\nScenario                   conc   wsgi req/s  p95ms   asgi req/s  p95ms   speedup"))
+        for level in levels:
+            for scenario, wsgi in results['wsgi'][level].items():
+                asgi = results['asgi'][level][scenario]
+                speedup = asgi['throughput_rps'] / wsgi['throughput_rps'] if wsgi['throughput_rps'] else 0
+                self.stdout.write(
+                    f"{scenario:<26} {level:>4}   {wsgi['throughput_rps']:>10.1f} {wsgi['p95_ms'] or 0:>6.0f}"
+                    f"   {asgi['throughput_rps']:>10.1f} {asgi['p95_ms'] or 0:>6.0f}   {speedup:>6.2f}x"
+                )
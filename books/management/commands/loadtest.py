@@ -0,0 +1,213 @@
+import json
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from books.models import Book
+
+SCENARIOS = [
+    'dashboard',
+    'book_detail',
+    'api_books_list',
+    'api_transactions_list',
+    'api_transaction_create',
+    'api_transfer',
+    'api_validate_bid',
+    'api_profile',
+    'report',
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class VirtualUser:
+    """One seeded account with a logged-in web session and a JWT for the API."""
+
+    def __init__(self, base_url, user, password, books, all_bids, api_prefix):
+        self.base_url = base_url
+        self.api_prefix = api_prefix
+        self.books = books
+        self.other_bids = [bid for bid in all_bids if bid not in {b.bid for b in books}]
+        self.http = requests.Session()
+        self.api = requests.Session()
+
+        # Web login (session cookie + CSRF)
+        self.http.get(f"{base_url}/accounts/login/")
+        csrf = self.http.cookies.get('csrftoken', '')
+        self.http.post(
+            f"{base_url}/accounts/login/",
+            data={'username': user.email, 'password': password, 'csrfmiddlewaretoken': csrf},
+            headers={'Referer': f"{base_url}/accounts/login/"},
+            allow_redirects=False,
+        )
+
+        # API login
+        resp = self.api.post(f"{base_url}/api/v1/auth/login/", data={'username': user.email, 'password': password})
+        resp.raise_for_status()
+        self.api.headers['Authorization'] = f"Bearer {resp.json()['access']}"
+
+    def book(self):
+        return random.choice(self.books)
+
+    def run(self, scenario):
+        url = self.base_url
+        api = f"{url}{self.api_prefix}"
+        if scenario == 'dashboard':
+            return self.http.get(f"{url}/")
+        if scenario == 'book_detail':
+            return self.http.get(f"{url}/book/{self.book().id}/")
+        if scenario == 'report':
+            return self.http.get(f"{url}/book/{self.book().id}/report/")
+        if scenario == 'api_books_list':
+            return self.api.get(f"{api}/books/")
+        if scenario == 'api_transactions_list':
+            return self.api.get(f"{api}/books/{self.book().id}/transactions/")
+        if scenario == 'api_transaction_create':
+            return self.api.post(
+                f"{api}/books/{self.book().id}/transactions/",
+                json={'amount': '10.00', 'type': 'deposit', 'note': 'loadtest'},
+            )
+        if scenario == 'api_transfer':
+            return self.api.post(
+                f"{api}/transfer/",
+                json={'sender_book_id': self.book().id, 'recipient_bid': random.choice(self.other_bids),
+                      'amount': '1.00', 'note': 'loadtest'},
+            )
+        if scenario == 'api_validate_bid':
+            return self.api.get(f"{api}/validate-bid/", params={'bid': random.choice(self.other_bids)})
+        if scenario == 'api_profile':
+            return self.api.get(f"{api}/auth/profile/")
+        raise ValueError(scenario)
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent HTTP traffic against a running server using accounts created by "
+        "seed_benchmark_data, and write p50/p95/p99 latency and throughput per endpoint to JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--api-prefix', default='/api/v1',
+                            help="Prefix for the JSON API endpoints (/api/v1/async for the async views).")
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--duration', type=float, default=20.0, help="Seconds to run each scenario.")
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help="Comma-separated subset of: %s" % ', '.join(SCENARIOS))
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument('--output', default='loadtest-results.json')
+
+    def handle(self, *args, **options):
+        scenarios = [s.strip() for s in options['scenarios'].split(',') if s.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        users = list(User.objects.filter(username__startswith=f"{options['prefix']}_user_").order_by('id'))
+        if not users:
+            raise CommandError("No seeded users found. Run `manage.py seed_benchmark_data` first.")
+
+        concurrency = options['concurrency']
+        users = users[:concurrency]
+        books_by_user = {
+            u.id: list(Book.objects.for_user(u).only('id', 'bid', 'user_id')) for u in users
+        }
+        all_bids = [b.bid for books in books_by_user.values() for b in books]
+
+        self.stdout.write(f"Logging in {len(users)} virtual users against {options['base_url']} ...")
+        vusers = [
+            VirtualUser(options['base_url'], u, options['password'], books_by_user.get(u.id, []),
+                        all_bids, options['api_prefix'])
+            for u in users if books_by_user.get(u.id)
+        ]
+        if not vusers:
+            raise CommandError("Seeded users have no books.")
+
+        results = {}
+        for scenario in scenarios:
+            results[scenario] = self.run_scenario(scenario, vusers, concurrency, options['duration'])
+            r = results[scenario]
+            self.stdout.write(
+                f"{scenario:<24} {r['requests']:>7} req  {r['throughput_rps']:>8.1f} req/s  "
+                f"p50 {r['p50_ms']}ms  p95 {r['p95_ms']}ms  p99 {r['p99_ms']}ms  errors {r['errors']}"
+            )
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'commit': self.git_commit(),
+                'base_url': options['base_url'],
+                'api_prefix': options['api_prefix'],
+                'concurrency': concurrency,
+                'duration_s': options['duration'],
+            },
+            'scenarios': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_scenario(self, scenario, vusers, concurrency, duration):
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def worker(index):
+            nonlocal errors
+            vuser = vusers[index % len(vusers)]
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    ok = vuser.run(scenario).status_code < 400
+                except requests.RequestException:
+                    ok = False
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    if not ok:
+                        errors += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, range(concurrency)))
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+            'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+            'p50_ms': self.rounded(percentile(latencies, 50)),
+            'p95_ms': self.rounded(percentile(latencies, 95)),
+            'p99_ms': self.rounded(percentile(latencies, 99)),
+            'max_ms': self.rounded(latencies[-1] if latencies else None),
+        }
+
+    @staticmethod
+    def rounded(value):
+        return round(value, 2) if value is not None else None
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
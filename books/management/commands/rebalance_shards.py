@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from books import sharding
+from books.models import Book, BookDirectory, ShardAssignment
+
+
+class Command(BaseCommand):
+    help = (
+        "Move every user's books and transactions to the shard their id hashes to with the "
+        "current SHARD_DATABASES. Run after adding or removing shards, and once when first "
+        "enabling sharding to spread existing data from --legacy-database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--legacy-database', default='default',
+                            help="Database holding books of users that have no shard assignment yet.")
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help="Only rebalance this user id (repeatable).")
+        parser.add_argument('--dry-run', action='store_true', help="Print the plan without moving anything.")
+
+    def handle(self, *args, **options):
+        if not sharding.sharding_enabled():
+            raise CommandError("SHARD_DATABASES is empty; there is nothing to rebalance.")
+
+        self.adopt_legacy_books(options['legacy_database'], options['dry_run'])
+
+        assignments = ShardAssignment.objects.order_by('user_id')
+        if options['users']:
+            assignments = assignments.filter(user_id__in=options['users'])
+        plan = [
+            (a.user_id, a.alias, sharding.hash_shard(a.user_id))
+            for a in assignments
+            if a.alias != sharding.hash_shard(a.user_id)
+        ]
+        if not plan:
+            self.stdout.write(self.style.SUCCESS("All users are on their target shard."))
+            return
+
+        total_books = total_transactions = 0
+        for user_id, source, target in plan:
+            if options['dry_run']:
+                self.stdout.write(f"  user {user_id}: {source} -> {target}")
+                continue
+            books, transactions = sharding.move_user(user_id, source, target)
+            total_books += books
+            total_transactions += transactions
+            self.stdout.write(f"  user {user_id}: {source} -> {target} ({books} books, {transactions} transactions)")
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(plan)} users would move.")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Moved {len(plan)} users: {total_books} books, {total_transactions} transactions. "
+                "Restart app servers unless CACHES is shared, so they pick up the new assignments."
+            ))
+
+    def adopt_legacy_books(self, legacy, dry_run):
+        """Record where pre-sharding books live so they get planned like any other move."""
+        assigned = set(ShardAssignment.objects.values_list('user_id', flat=True))
+        legacy_books = Book.objects.using(legacy).exclude(user_id__in=assigned)
+        user_ids = set(legacy_books.values_list('user_id', flat=True).distinct())
+        if not user_ids:
+            return
+        self.stdout.write(f"Found books of {len(user_ids)} unassigned users on '{legacy}'.")
+        if dry_run:
+            return
+        ShardAssignment.objects.bulk_create([ShardAssignment(user_id=u, alias=legacy) for u in user_ids])
+        BookDirectory.objects.bulk_create(
+            [BookDirectory(bid=bid, user_id=u, book_id=pk) for pk, bid, u in legacy_books.values_list('id', 'bid', 'user_id')],
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,64 @@
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from books import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create synthetic users, books and transactions for load testing. "
+        "A few 'heavy' books get a very large number of rows to mimic real-world skew."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--books-per-user', type=int, default=5)
+        parser.add_argument('--transactions-per-book', type=int, default=200,
+                            help="Upper bound of rows for a regular book (actual count is random).")
+        parser.add_argument('--heavy-books', type=int, default=3,
+                            help="Number of books that receive --heavy-transactions rows.")
+        parser.add_argument('--heavy-transactions', type=int, default=100000)
+        parser.add_argument('--prefix', default='bench', help="Username prefix for seeded users.")
+        parser.add_argument('--password', default='benchpass123')
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible data.")
+        parser.add_argument('--clear', action='store_true',
+                            help="Delete previously seeded users with the same prefix first.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        existing = User.objects.filter(username__startswith=f"{prefix}_user_")
+
+        if options['clear']:
+            deleted, _ = existing.delete()
+            self.stdout.write(f"Removed {deleted} rows from a previous '{prefix}' seed.")
+        elif existing.exists():
+            raise CommandError(f"Users with prefix '{prefix}' already exist. Use --clear or another --prefix.")
+
+        users = seeding.seed_users(options['users'], prefix=prefix, password=options['password'])
+        self.stdout.write(f"Created {len(users)} users.")
+
+        books = seeding.seed_books(users, options['books_per_user'], rng=rng)
+        self.stdout.write(f"Created {len(books)} books.")
+
+        # Heavy books are the first book of the first N users, so load tests can target them.
+        # Compared by BID: with sharding, book ids are only unique per shard.
+        heavy_bids = {books[i * options['books_per_user']].bid
+                     for i in range(min(options['heavy_books'], len(users)))} if books else set()
+
+        total = 0
+        for book in books:
+            if book.bid in heavy_bids:
+                count = options['heavy_transactions']
+            else:
+                count = rng.randint(0, options['transactions_per_book'])
+            total += seeding.seed_transactions(book, count, rng=rng)
+            if book.bid in heavy_bids:
+                self.stdout.write(f"  Heavy book {book.id} (BID {book.bid}): {count} transactions")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {len(books)} books and {total} transactions "
+            f"(login: {prefix}_user_00001@example.com / {options['password']})."
+        ))
@@ -0,0 +1,56 @@
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from books import batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Email every active user their consolidated statement for a month (default: last month) "
+        "as a PDF. Users already sent that month's statement are skipped, so an interrupted run "
+        "resumes where it stopped when started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="Statement month as YYYY-MM (default: last month).")
+        parser.add_argument('--workers', type=int, default=settings.REPORT_WORKERS,
+                            help="Render processes (1 renders in this process).")
+        parser.add_argument('--chunk-size', type=int, default=100,
+                            help="Users per unit of work; each chunk reads its data with one query per shard.")
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                period = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("--month must look like 2026-09.")
+        else:
+            period = (date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+        user_ids = batch.pending_users(period)
+        if not user_ids:
+            self.stdout.write(self.style.SUCCESS(f"Every statement for {period:%Y-%m} has been sent."))
+            return
+        self.stdout.write(f"Sending {period:%Y-%m} statements to {len(user_ids)} users with {options['workers']} workers.")
+
+        totals, done, began = Counter(), 0, time.monotonic()
+        for users, result in batch.run(period, user_ids, options['workers'], options['chunk_size']):
+            totals.update(result)
+            done += users
+            elapsed = time.monotonic() - began
+            rate = totals['sent'] / elapsed if elapsed else 0
+            eta = f", about {(len(user_ids) - done) * elapsed / done:.0f}s left" if done < len(user_ids) else ""
+            self.stdout.write(
+                f"  {done}/{len(user_ids)} users: {totals['sent']} sent, {totals['failed']} failed, "
+                f"{totals['skipped']} without books ({rate:.1f} statements/s{eta})"
+            )
+
+        summary = f"Sent {totals['sent']} statements in {time.monotonic() - began:.1f}s; {totals['failed']} failed."
+        if totals['failed']:
+            self.stdout.write(self.style.WARNING(f"{summary} Run again to retry them."))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
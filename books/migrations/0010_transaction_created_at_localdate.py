@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0009_sharding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='created_at',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+    ]
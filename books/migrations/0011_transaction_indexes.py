@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0010_transaction_created_at_localdate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['book', '-created_at', '-id'], name='txn_book_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['book', 'type', '-created_at', '-id'], name='txn_book_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['book', 'amount'], name='txn_book_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['book', 'note'], name='txn_book_note_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:39
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    """Roll up the transactions that already exist on this database."""
+    alias = schema_editor.connection.alias
+    Transaction = apps.get_model('books', 'Transaction')
+    daily, monthly = defaultdict(dict), defaultdict(dict)
+    totals = (
+        Transaction.objects.using(alias).order_by()
+        .values_list('book_id', 'created_at', 'type')
+        .annotate(total=models.Sum('amount'), count=models.Count('id'))
+    )
+    for book_id, day, t_type, total, count in totals:
+        for periods, period in ((daily, day), (monthly, day.replace(day=1))):
+            slot = periods[book_id].setdefault(period, [Decimal('0'), 0, Decimal('0'), 0])
+            offset = 0 if t_type == 'deposit' else 2
+            slot[offset] += total
+            slot[offset + 1] += count
+
+    for model_name, periods in (('DailyRollup', daily), ('MonthlyRollup', monthly)):
+        model = apps.get_model('books', model_name)
+        rows = []
+        for book_id, book_periods in periods.items():
+            balance = Decimal('0')
+            for period in sorted(book_periods):
+                deposit_total, deposit_count, withdraw_total, withdraw_count = book_periods[period]
+                balance += deposit_total - withdraw_total
+                rows.append(model(
+                    book_id=book_id, period=period, closing_balance=balance,
+                    deposit_total=deposit_total, deposit_count=deposit_count,
+                    withdraw_total=withdraw_total, withdraw_count=withdraw_count,
+                ))
+        model.objects.using(alias).bulk_create(rows, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0011_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('deposit_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('deposit_count', models.IntegerField(default=0)),
+                ('withdraw_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('withdraw_count', models.IntegerField(default=0)),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='books.book')),
+            ],
+            options={
+                'abstract': False,
+                'unique_together': {('book', 'period')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('deposit_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('deposit_count', models.IntegerField(default=0)),
+                ('withdraw_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('withdraw_count', models.IntegerField(default=0)),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='books.book')),
+            ],
+            options={
+                'abstract': False,
+                'unique_together': {('book', 'period')},
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -1,28 +1,111 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+
+class ShardedQuerySet(models.QuerySet):
+    """
+    Books and transactions may live on a per-user shard (see books/sharding.py).
+    `create()` without an explicit `.using()` saves on the owner's shard, which
+    the instance picked up from its `user`/`book` when it was built.
+    """
+
+    def create(self, **kwargs):
+        from .sharding import sharding_enabled
+
+        if self._db is not None or not sharding_enabled():
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+
+class BookQuerySet(ShardedQuerySet):
+    def for_user(self, user):
+        from .sharding import shard_for_user
+
+        alias = shard_for_user(user)
+        qs = self.using(alias) if alias else self
+        return qs.filter(user=user)
+
+    def with_totals(self, count=True, balance=True):
+        """
+        Annotate `transaction_count` and `total_balance` so listing books costs one query.
+        Pass count/balance=False to leave out totals the caller will not render.
+        """
+        totals = {}
+        if count:
+            totals['transaction_count'] = models.Count('transactions')
+        if balance:
+            totals['total_balance'] = Coalesce(
+                models.Sum(models.Case(
+                    models.When(transactions__type='deposit', then=models.F('transactions__amount')),
+                    models.When(transactions__type='withdraw', then=-models.F('transactions__amount')),
+                    output_field=models.DecimalField()
+                )),
+                models.Value(0, output_field=models.DecimalField())
+            )
+        return self.annotate(**totals)
+
+    def with_balance(self):
+        """Annotate `total_balance` from the latest monthly rollup instead of summing every transaction."""
+        latest = MonthlyRollup.objects.filter(book=models.OuterRef('pk')).order_by('-period')
+        return self.annotate(total_balance=Coalesce(
+            models.Subquery(latest.values('closing_balance')[:1]),
+            models.Value(0, output_field=models.DecimalField(max_digits=14, decimal_places=2)),
+        ))
+
+
+class TransactionQuerySet(ShardedQuerySet):
+    def for_user(self, user):
+        from .sharding import shard_for_user
+
+        alias = shard_for_user(user)
+        qs = self.using(alias) if alias else self
+        return qs.filter(book__user=user)
+
+    def totals(self):
+        """Deposit/withdraw sums and counts over the (filtered) queryset in one aggregate query."""
+        money = models.DecimalField(max_digits=14, decimal_places=2)
+        zero = models.Value(0, output_field=money)
+        deposits, withdrawals = models.Q(type='deposit'), models.Q(type='withdraw')
+        return self.order_by().aggregate(
+            deposit_total=Coalesce(models.Sum('amount', filter=deposits), zero, output_field=money),
+            deposit_count=models.Count('id', filter=deposits),
+            withdraw_total=Coalesce(models.Sum('amount', filter=withdrawals), zero, output_field=money),
+            withdraw_count=models.Count('id', filter=withdrawals),
+        )
+
+
 class Book(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Books may be stored on a shard while users stay on `default`,
+    # so the database cannot enforce this foreign key.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     bid = models.CharField(max_length=6, unique=True, editable=False)
 
+    objects = BookQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
+        from . import fragments
+
         if not self.bid:
             self.bid = self.generate_new_bid()
         super().save(*args, **kwargs)
+        fragments.bump(self._state.db, self.pk)  # name/description show on the cached dashboard card
 
     @staticmethod
     def generate_new_bid():
         import random
         import string
+        from .sharding import bid_taken
         while True:
             new_bid = ''.join(random.choices(string.digits, k=6))
-            # Import Book inside the method if needed to avoid circular imports, 
-            # though here it's fine as it's a static method of the class.
-            if not Book.objects.filter(bid=new_bid).exists():
+            # BIDs are unique across all shards, so check the shared directory.
+            if not bid_taken(new_bid):
                 return new_bid
 
     def __str__(self):
@@ -39,7 +122,22 @@ class Transaction(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
     note = models.CharField(max_length=255, blank=True, null=True)
-    created_at = models.DateField(default=timezone.now)  # store only date
+    created_at = models.DateField(default=timezone.localdate)  # store only date
+
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        # Every list is scoped to a book (or a user's books) and newest first;
+        # these back the API filters and the keyset cursor (core/pagination.py).
+        indexes = [
+            models.Index(fields=['book', '-created_at', '-id'], name='txn_book_date_idx'),
+            models.Index(fields=['book', 'type', '-created_at', '-id'], name='txn_book_type_date_idx'),
+            models.Index(fields=['book', 'amount'], name='txn_book_amount_idx'),
+            models.Index(fields=['book', 'note'], name='txn_book_note_idx'),
+        ]
+
+    # Fields a rollup row depends on; edits to anything else (the note) skip the rollups.
+    ROLLUP_FIELDS = ('book_id', 'created_at', 'type', 'amount')
 
     def __str__(self):
         return f"{self.type.capitalize()} - {self.amount}"
@@ -47,3 +145,110 @@ class Transaction(models.Model):
     @property
     def sign_amount(self):
         return self.amount if self.type == 'deposit' else -self.amount
+
+    # Keep DailyRollup / MonthlyRollup in step with every single-row write
+    # (books/rollups.py) and retire the book's cached HTML (books/fragments.py).
+    # Bulk writes rebuild them with `rollups.rebuild()`, which does both.
+    def save(self, *args, **kwargs):
+        from django.db import router, transaction
+        from . import fragments, rollups
+
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            old = None
+            if not self._state.adding and self.pk is not None:
+                old = Transaction.objects.using(using).filter(pk=self.pk).values(*self.ROLLUP_FIELDS).first()
+            super().save(*args, **kwargs)
+            # Views may assign form strings; compare and record the stored values.
+            new = {name: self._meta.get_field(name).to_python(getattr(self, name)) for name in self.ROLLUP_FIELDS}
+            if old != new:
+                if old:
+                    rollups.record(using, **old, sign=-1)
+                rollups.record(using, **new)
+            fragments.bump(using, self.book_id)
+
+    def delete(self, *args, **kwargs):
+        from django.db import transaction
+        from . import fragments, rollups
+
+        using = self._state.db
+        with transaction.atomic(using=using):
+            fields = {name: self._meta.get_field(name).to_python(getattr(self, name)) for name in self.ROLLUP_FIELDS}
+            result = super().delete(*args, **kwargs)
+            rollups.record(using, **fields, sign=-1)
+            fragments.bump(using, fields['book_id'])
+        return result
+
+
+# ─────────────────────────────────────────────
+# Cash-flow rollups (books/rollups.py)
+# ─────────────────────────────────────────────
+
+class Rollup(models.Model):
+    """Deposits, withdrawals and the closing balance of one book over one period."""
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    period = models.DateField()
+    deposit_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    deposit_count = models.IntegerField(default=0)
+    withdraw_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    withdraw_count = models.IntegerField(default=0)
+    closing_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+        unique_together = [('book', 'period')]
+
+    def __str__(self):
+        return f"{self.book_id} {self.period}: {self.closing_balance}"
+
+
+class DailyRollup(Rollup):
+    pass
+
+
+class MonthlyRollup(Rollup):
+    """`period` is the first day of the month."""
+
+
+# ─────────────────────────────────────────────
+# Shard directory (always stored on `default`)
+# ─────────────────────────────────────────────
+
+class ShardAssignment(models.Model):
+    """Which SHARD_DATABASES alias holds a user's books and transactions."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='shard_assignment')
+    alias = models.CharField(max_length=64)
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.alias}"
+
+
+class BookDirectory(models.Model):
+    """BID -> owner and book id, so a BID can be resolved without querying every shard."""
+    bid = models.CharField(max_length=6, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    book_id = models.BigIntegerField()
+
+    class Meta:
+        verbose_name_plural = 'book directory'
+
+    def __str__(self):
+        return self.bid
+
+
+# ─────────────────────────────────────────────
+# Monthly statement run (books/batch.py), stored on `default`
+# ─────────────────────────────────────────────
+
+class StatementDelivery(models.Model):
+    """A user's statement for `period` (first day of the month) was handed to the mail server."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statement_deliveries')
+    period = models.DateField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [('user', 'period')]
+        verbose_name_plural = 'statement deliveries'
+
+    def __str__(self):
+        return f"{self.user_id} {self.period:%Y-%m}"
@@ -0,0 +1,409 @@
+"""
+PDF statements in the MyCashbook bank-statement layout.
+
+`statement_pdf()` draws the title, the header with the statement balance,
+the activity table, the deposit/withdrawal totals and the footer straight
+onto a reportlab canvas. The platypus version built a Paragraph for every
+cell, a stylesheet per request and a style command per row; here fonts,
+colors and column geometry are fixed up front, each row is drawn as one
+text object through the canvas API, and the table header is repeated after
+every page break.
+
+The views decide what goes in: one book (`transaction_report_pdf`) or every
+book of a user (the consolidated statement, books/statements.py). Table rows
+are lists of cells built with the `*_cell()` helpers.
+"""
+import io
+from collections import namedtuple
+from decimal import Decimal
+from functools import lru_cache
+
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+
+from core import metrics
+
+# Professional colors
+ACCENT_COLOR = colors.HexColor("#003366")  # Navy Blue
+TEXT_COLOR = colors.HexColor("#333333")
+LINE_COLOR = colors.HexColor("#cccccc")
+ZEBRA_COLOR = colors.HexColor("#f4f4f8")
+GREEN = colors.HexColor("#27ae60")
+RED = colors.HexColor("#e74c3c")
+GREY = colors.HexColor("#808080")
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN_X, MARGIN_TOP, MARGIN_BOTTOM = 25, 50, 30
+WIDTH = PAGE_WIDTH - 2 * MARGIN_X
+
+# Table geometry, as platypus laid it out: 6pt/3pt cell padding, 12pt lines.
+PAD_X, PAD_Y, LEADING = 6, 3, 12
+HEADER_ROW_HEIGHT = 30
+
+DEVELOPER_URL = "https://tanvir.codelab-by-tnv.top/"
+
+Style = namedtuple('Style', 'font size color')
+NORMAL = Style('Helvetica', 10, colors.black)
+NOTE = Style('Helvetica', 9, GREY)
+DEPOSIT = Style('Helvetica-Bold', 10, GREEN)
+WITHDRAWAL = Style('Helvetica-Bold', 10, RED)
+BALANCE = Style('Helvetica', 10, colors.HexColor("#2c3e50"))  # Dark grey/black for a positive running balance
+NEGATIVE_BALANCE = Style('Helvetica', 10, RED)
+INFO = Style('Helvetica-Bold', 10, TEXT_COLOR)
+TABLE_HEADER = Style('Helvetica-Bold', 10, colors.white)
+PAGE_NUMBER = Style('Helvetica', 8, GREY)
+LINK = Style('Helvetica', 8, colors.blue)
+
+
+# ─────────────────────────────────────────────
+# Table cells: (text, Style)
+# ─────────────────────────────────────────────
+
+def text_cell(value):
+    return str(value), NORMAL
+
+
+def date_cell(day):
+    return day.strftime("%d %B, %Y"), NORMAL
+
+
+def amount_cell(t_type, amount):
+    # Color-coding for Amount
+    if t_type.lower() == "deposit":
+        return f"+{amount:.2f}", DEPOSIT
+    return f"-{amount:.2f}", WITHDRAWAL
+
+
+def balance_cell(balance):
+    return f"{balance:.2f}", BALANCE if balance >= Decimal('0.00') else NEGATIVE_BALANCE
+
+
+def note_cell(note):
+    return note or "-", NOTE
+
+
+@lru_cache(maxsize=8192)
+def wrap(text, font, size, width):
+    """`text` split into lines that fit `width` (dates, notes and book names repeat, hence the cache)."""
+    if stringWidth(text, font, size) <= width:
+        return (text,)
+    return tuple(simpleSplit(text, font, size, width)) or ('',)
+
+
+# ─────────────────────────────────────────────
+# Drawing
+# ─────────────────────────────────────────────
+
+class StatementCanvas:
+    """A canvas plus the cursor (`y`, top down) and the table state that carries across pages."""
+
+    def __init__(self, out, columns):
+        self.canvas = Canvas(out, pagesize=A4)
+        self.titles = [title for title, _ in columns]
+        self.widths = [WIDTH * share for _, share in columns]
+        self.lefts = [MARGIN_X + sum(self.widths[:i]) for i in range(len(self.widths))]
+        self.y = PAGE_HEIGHT - MARGIN_TOP
+        self.in_table = False
+        self.row_count = 0
+        self.style = None
+
+    def use(self, style):
+        # Font and fill operators are only emitted when the style changes.
+        if style is not self.style:
+            self.canvas.setFont(style.font, style.size)
+            self.canvas.setFillColor(style.color)
+            self.style = style
+
+    def text(self, x, y, text, style, align='left'):
+        self.use(style)
+        if align == 'right':
+            self.canvas.drawRightString(x, y, text)
+        elif align == 'center':
+            self.canvas.drawCentredString(x, y, text)
+        else:
+            self.canvas.drawString(x, y, text)
+
+    def rule(self, y, color, width):
+        self.canvas.setStrokeColor(color)
+        self.canvas.setLineWidth(width)
+        self.canvas.line(MARGIN_X, y, MARGIN_X + WIDTH, y)
+
+    def need(self, height):
+        """Start a new page unless `height` more points fit above the bottom margin."""
+        if self.y - height >= MARGIN_BOTTOM:
+            return
+        self.end_page()
+        self.y = PAGE_HEIGHT - MARGIN_TOP
+        if self.in_table:
+            self.table_header()
+
+    def end_page(self):
+        # --- Page Footer (Meet the Developer & Page Numbers) ---
+        c = self.canvas
+        self.text(MARGIN_X, 20, f"Page {c.getPageNumber()}", PAGE_NUMBER)
+        label, right = "Meet The Developer", MARGIN_X + WIDTH
+        left = right - stringWidth(label, LINK.font, LINK.size)
+        self.text(right, 20, label, LINK, align='right')
+        c.setStrokeColor(LINK.color)
+        c.setLineWidth(0.5)
+        c.line(left, 19, right, 19)
+        c.linkURL(DEVELOPER_URL, (left, 18, right, 28), relative=0)
+        c.showPage()
+        self.style = None  # showPage resets the graphics state
+
+    def table_header(self):
+        c, top = self.canvas, self.y
+        c.setFillColor(ACCENT_COLOR)
+        c.rect(MARGIN_X, top - HEADER_ROW_HEIGHT, WIDTH, HEADER_ROW_HEIGHT, stroke=0, fill=1)
+        self.style = None
+        for title, left, width in zip(self.titles, self.lefts, self.widths):
+            self.text(left + width / 2, top - 18.5, title, TABLE_HEADER, align='center')
+        self.rule(top - HEADER_ROW_HEIGHT, ACCENT_COLOR, 2)
+        # Every row below is underlined in the light line color.
+        c.setStrokeColor(LINE_COLOR)
+        c.setLineWidth(0.5)
+        self.y = top - HEADER_ROW_HEIGHT
+
+    def row(self, cells):
+        """
+        Draw one table row: the zebra stripe, every cell's lines in a single
+        text object (font and color set only where they change) and the rule below.
+        """
+        lines = [
+            wrap(text, style.font, style.size, width - 2 * PAD_X)
+            for (text, style), width in zip(cells, self.widths)
+        ]
+        height = max(len(cell_lines) for cell_lines in lines) * LEADING + 2 * PAD_Y
+        self.need(height)
+
+        c = self.canvas
+        top = self.y
+        bottom = top - height
+        self.row_count += 1
+        if self.row_count % 2 == 0:
+            # Zebra striping for rows
+            c.setFillColor(ZEBRA_COLOR)
+            c.rect(MARGIN_X, bottom, WIDTH, height, stroke=0, fill=1)
+        text = c.beginText()
+        current = None
+        for (_, style), cell_lines, left in zip(cells, lines, self.lefts):
+            if style is not current:
+                text.setFont(style.font, style.size)
+                text.setFillColor(style.color)
+                current = style
+            # Vertically centered in the row, like VALIGN MIDDLE.
+            baseline = top - (height - len(cell_lines) * LEADING) / 2 - LEADING / 2 - style.size * 0.35
+            for line in cell_lines:
+                text.setTextOrigin(left + PAD_X, baseline)
+                text.textOut(line)
+                baseline -= LEADING
+        c.drawText(text)
+        c.line(MARGIN_X, bottom, MARGIN_X + WIDTH, bottom)
+        self.style = None  # the stripe and the text object changed the font and fill
+        self.y = bottom
+
+
+def statement_pdf(out, *, holder, details, balance, columns, rows, totals, generated_at, metric='book_pdf'):
+    """
+    Draw a statement into `out` (a response or file).
+
+    details: header lines after the account holder, as (label, value) pairs
+    balance: the statement balance shown top right
+    columns: (title, share of the page width) per table column
+    rows: table rows, lists of `*_cell()` cells (any iterable, consumed once)
+    totals: deposit/withdraw totals and counts (see rollups.period_totals)
+    """
+    with metrics.REPORT_GENERATION.labels(metric).time():
+        page = StatementCanvas(out, columns)
+        right = MARGIN_X + WIDTH
+
+        # --- 1. Logo/Title Section ---
+        page.text(MARGIN_X, page.y - 18, "MyCashbook", Style('Helvetica-Bold', 20, ACCENT_COLOR))
+        page.y -= 28
+        page.text(MARGIN_X, page.y - 9, "Track Your Expense Wisely", Style('Helvetica-Oblique', 9, GREY))
+        page.text(MARGIN_X, page.y - 21, "Website: mycashbook.codelab-by-tnv.top", Style('Helvetica-Oblique', 8, colors.blue))
+        page.y -= 24 + 15
+
+        # --- Report Information Section (Left: book/dates, Right: Final Balance) ---
+        header_lines = [
+            line
+            for text in [f"Account Holder: {holder}"] + [f"{label}: {value}" for label, value in details]
+            for line in wrap(text, INFO.font, INFO.size, WIDTH * 0.65)
+        ]
+        top = page.y
+        height = max(len(header_lines) * LEADING, 44) + 2 * PAD_Y
+        baseline = top - (height - len(header_lines) * LEADING) / 2 - 9.5
+        for line in header_lines:
+            page.text(MARGIN_X, baseline, line, INFO)
+            baseline -= LEADING
+        page.text(right, top - height / 2 + 6, "Statement Balance:", Style('Helvetica-Bold', 12, TEXT_COLOR), align='right')
+        page.text(right, top - height / 2 - 16, f"{balance:.2f} TK",
+                  Style('Helvetica-Bold', 16, GREEN if balance >= Decimal('0.00') else RED), align='right')
+        page.y = top - height - 10
+        page.rule(page.y, ACCENT_COLOR, 1.5)
+        page.y -= 10
+
+        # Statement Header
+        page.text(MARGIN_X, page.y - 33, "Account Statement - Activity Detail", Style('Helvetica-Bold', 14, ACCENT_COLOR))
+        page.y -= 20 + 18 + 10
+
+        # --- Transaction Table ---
+        page.need(HEADER_ROW_HEIGHT + LEADING + 2 * PAD_Y)
+        page.in_table = True
+        page.table_header()
+        for row in rows:
+            page.row(row)
+        page.in_table = False
+        page.y -= 15
+
+        # --- Total Deposit and Total Withdrawal Section ---
+        page.need(2 * 28 + 18 + 12 + 2 * LEADING)
+        top = page.y
+        for label, total, count, color in (
+            ("Total Deposits", totals['deposit_total'], totals['deposit_count'], GREEN),
+            ("Total Withdrawals", totals['withdraw_total'], totals['withdraw_count'], RED),
+        ):
+            page.text(MARGIN_X, top - 17.5, f"{label} ({count}):", INFO)
+            page.text(right, top - 17.5, f"{total:.2f} TK", Style('Helvetica-Bold', 10, color), align='right')
+            top -= 28
+        page.rule(top, ACCENT_COLOR, 1)
+        page.text(MARGIN_X, top - 11.5, f"Total Transaction Count: {totals['deposit_count'] + totals['withdraw_count']}",
+                  Style('Helvetica-Bold', 9, GREY))
+        page.y = top - 18 - 12
+
+        # --- Footer Note (Translucent appearance simulated with grey text) ---
+        page.text(MARGIN_X, page.y - 8, f"Statement generated on: {generated_at.strftime('%d %B, %Y at %I:%M %p')} (Dhaka Time)",
+                  Style('Helvetica', 8, GREY))
+        page.text(MARGIN_X + WIDTH / 2, page.y - 8 - LEADING, "This Is A System Generated Report, No Signature is Required",
+                  Style('Helvetica', 9, GREY), align='center')
+
+        page.end_page()
+        page.canvas.save()
+
+
+# ─────────────────────────────────────────────
+# Statement across all books (StatementPDFView, send_monthly_statements)
+# ─────────────────────────────────────────────
+
+CONSOLIDATED_COLUMNS = [
+    ("Date", 0.14),
+    ("Book", 0.16),
+    ("Type", 0.11),
+    ("Amount", 0.13),
+    ("Book Balance", 0.15),
+    ("Balance", 0.15),
+    ("Note", 0.16),
+]
+
+
+def consolidated_statement_pdf(out, *, holder, period, balances, entries, generated_at, metric='statement_pdf'):
+    """
+    Every book of one user in one table: `balances` are the opening balances
+    and `entries` the lines from books/statements.py (consumed once, oldest first).
+    """
+    opening = sum((book['balance'] for book in balances.values()), Decimal('0.00'))
+    table, closing = [], opening
+    totals = {'deposit_total': Decimal('0.00'), 'deposit_count': 0, 'withdraw_total': Decimal('0.00'), 'withdraw_count': 0}
+    for entry in entries:
+        totals[f"{entry['type']}_total"] += entry['amount']
+        totals[f"{entry['type']}_count"] += 1
+        closing = entry['balance']
+        table.append([
+            date_cell(entry['created_at']), text_cell(entry['book_name']),
+            text_cell(entry['type'].capitalize()), amount_cell(entry['type'], entry['amount']),
+            balance_cell(entry['book_balance']), balance_cell(entry['balance']),
+            note_cell(entry['note']),
+        ])
+
+    statement_pdf(
+        out,
+        holder=holder,
+        details=[('Books', len(balances)), ('Period', period), ('Opening Balance', f"{opening:.2f} TK")],
+        balance=closing,
+        columns=CONSOLIDATED_COLUMNS,
+        rows=table,
+        totals=totals,
+        generated_at=generated_at,
+        metric=metric,
+    )
+
+
+# ─────────────────────────────────────────────
+# Single-book statement (transaction_report_pdf, the archive workers)
+# ─────────────────────────────────────────────
+
+BOOK_COLUMNS = [
+    ("Date", 0.18),
+    ("Type", 0.15),
+    ("Amount", 0.15),
+    ("Running Balance", 0.22),
+    ("Note", 0.30),
+]
+
+# values_list() columns of the `transactions` a book statement is drawn from.
+BOOK_STATEMENT_COLUMNS = ('created_at', 'type', 'amount', 'note')
+
+
+def transaction_totals(transactions):
+    """Deposit/withdraw totals and counts of BOOK_STATEMENT_COLUMNS rows."""
+    totals = {'deposit_total': Decimal('0.00'), 'deposit_count': 0, 'withdraw_total': Decimal('0.00'), 'withdraw_count': 0}
+    for _, t_type, amount, _ in transactions:
+        totals[f'{t_type}_total'] += amount
+        totals[f'{t_type}_count'] += 1
+    return totals
+
+
+def book_statement_pdf(out, *, holder, book_name, period, transactions, generated_at, totals=None):
+    """
+    One book's statement: `transactions` are BOOK_STATEMENT_COLUMNS tuples,
+    oldest first; they are listed latest first with their running balances.
+    Totals default to the sums over `transactions`.
+    """
+    # Calculate running balances (oldest first)
+    running_balance = Decimal('0.00')
+    running_balances = []
+    for _, t_type, amount, _ in transactions:
+        running_balance += amount if t_type == 'deposit' else -amount
+        running_balances.append(running_balance)
+
+    rows = (
+        [date_cell(created_at), text_cell(t_type.capitalize()), amount_cell(t_type, amount),
+         balance_cell(balance), note_cell(note)]
+        for (created_at, t_type, amount, note), balance in zip(reversed(transactions), reversed(running_balances))
+    )
+    statement_pdf(
+        out,
+        holder=holder,
+        details=[('Book Name', book_name), ('Period', period)],
+        balance=running_balance,
+        columns=BOOK_COLUMNS,
+        rows=rows,
+        totals=totals or transaction_totals(transactions),
+        generated_at=generated_at,
+    )
+
+
+def render_book_statement(statement):
+    """`book_statement_pdf(**statement)` as bytes; runs in the archive's worker processes (books/archive.py)."""
+    out = io.BytesIO()
+    book_statement_pdf(out, **statement)
+    return out.getvalue()
+
+
+def dhaka_now():
+    """Current time in Dhaka, used in report timestamps and file names."""
+    try:
+        import pytz
+        return timezone.now().astimezone(pytz.timezone('Asia/Dhaka'))
+    except Exception:
+        return timezone.now()
+
+
+def report_filename(name, now):
+    # Clean the name (e.g., "My Savings Book" -> "my_savings_book")
+    safe_name = name.replace(' ', '_').lower().replace('.', '')
+    return f"{safe_name}_{now.strftime('%d-%m-%Y_%H%M%S')}_MyCashbook_report.pdf"
@@ -0,0 +1,162 @@
+"""
+Per-book daily and monthly cash-flow rollups (DailyRollup / MonthlyRollup).
+
+Every single-row Transaction write calls `record()` (see Transaction.save /
+delete): the affected day and month rows get their totals bumped, and the
+closing balance of that period and every later one moves by the signed amount
+in one UPDATE. A back-dated edit therefore costs a few statements, not a
+rescan. Bulk writes (seeding, shard moves) call `rebuild()` afterwards.
+
+`summary()` reads them for GET /api/v1/books/{id}/summary/, the dashboard
+balances and the PDF report header.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Sum, When
+
+from . import fragments
+from .models import DailyRollup, MonthlyRollup, Transaction
+
+ZERO = Decimal('0.00')
+GRANULARITIES = ('day', 'week', 'month')
+
+# Extra statements one Transaction write costs at worst (the first write of a
+# day and month): its savepoint, then per rollup table a lookup, an insert in
+# a savepoint and the later-periods update. Views add this to query budgets.
+WRITE_QUERIES = 12
+
+
+def month_of(day):
+    return day.replace(day=1)
+
+
+def week_of(day):
+    return day - timedelta(days=day.weekday())  # Monday
+
+
+def bump(rows, period, type, amount, count, net):
+    """One UPDATE: add to `period`'s totals and move its and every later closing balance by `net`."""
+    rows.filter(period__gte=period).update(
+        closing_balance=F('closing_balance') + net,
+        **{
+            f'{type}_total': Case(When(period=period, then=F(f'{type}_total') + amount), default=F(f'{type}_total')),
+            f'{type}_count': Case(When(period=period, then=F(f'{type}_count') + count), default=F(f'{type}_count')),
+        },
+    )
+
+
+def record(using, book_id, created_at, type, amount, sign=1):
+    """Add (sign=1) or remove (sign=-1) one transaction's contribution to its day and month."""
+    amount = amount * sign
+    net = amount if type == 'deposit' else -amount
+    for model, period in ((DailyRollup, created_at), (MonthlyRollup, month_of(created_at))):
+        rows = model.objects.using(using).filter(book_id=book_id)
+        # The period's own row if it exists, otherwise the one it opens from.
+        latest = rows.filter(period__lte=period).order_by('-period').values_list('period', 'closing_balance').first()
+        if latest and latest[0] == period:
+            bump(rows, period, type, amount, sign, net)
+            continue
+        try:
+            with transaction.atomic(using=using):
+                model.objects.using(using).create(
+                    book_id=book_id, period=period, closing_balance=(latest[1] if latest else ZERO) + net,
+                    **{f'{type}_total': amount, f'{type}_count': sign},
+                )
+        except IntegrityError:  # a concurrent write created the row first
+            bump(rows, period, type, amount, sign, net)
+        else:
+            rows.filter(period__gt=period).update(closing_balance=F('closing_balance') + net)
+
+
+def rebuild(book):
+    """Recompute a book's rollups from its transactions (after bulk inserts or moves)."""
+    using = book._state.db
+    days = defaultdict(lambda: [ZERO, 0, ZERO, 0])
+    totals = (
+        Transaction.objects.using(using).filter(book_id=book.pk).order_by()
+        .values_list('created_at', 'type').annotate(total=Sum('amount'), count=Count('id'))
+    )
+    for day, t_type, total, count in totals:
+        slot = 0 if t_type == 'deposit' else 2
+        days[day][slot] += total
+        days[day][slot + 1] += count
+
+    with transaction.atomic(using=using):
+        for model, period_of in ((DailyRollup, None), (MonthlyRollup, month_of)):
+            model.objects.using(using).filter(book_id=book.pk).delete()
+            periods = defaultdict(lambda: [ZERO, 0, ZERO, 0])
+            for day, values in days.items():
+                slot = periods[period_of(day) if period_of else day]
+                for i, value in enumerate(values):
+                    slot[i] += value
+
+            balance, rows = ZERO, []
+            for period in sorted(periods):
+                deposit_total, deposit_count, withdraw_total, withdraw_count = periods[period]
+                balance += deposit_total - withdraw_total
+                rows.append(model(
+                    book_id=book.pk, period=period, closing_balance=balance,
+                    deposit_total=deposit_total, deposit_count=deposit_count,
+                    withdraw_total=withdraw_total, withdraw_count=withdraw_count,
+                ))
+            model.objects.using(using).bulk_create(rows, batch_size=5000)
+        fragments.bump(using, book.pk)
+
+
+def summary(book, granularity='month', start=None, end=None):
+    """
+    Cash flow per period, oldest first: deposit/withdraw totals and counts, net
+    and closing balance. Weeks (Monday to Sunday) are folded from the daily rows.
+    """
+    model = MonthlyRollup if granularity == 'month' else DailyRollup
+    rows = model.objects.using(book._state.db).filter(book_id=book.pk)
+    if start:
+        rows = rows.filter(period__gte=month_of(start) if granularity == 'month' else start)
+    if end:
+        rows = rows.filter(period__lte=end)
+    rows = rows.order_by('period').values_list(
+        'period', 'deposit_total', 'deposit_count', 'withdraw_total', 'withdraw_count', 'closing_balance'
+    )
+
+    periods = {}
+    for period, deposit_total, deposit_count, withdraw_total, withdraw_count, closing in rows:
+        if granularity == 'week':
+            period = week_of(period)
+        entry = periods.setdefault(period, {
+            'period': period, 'deposit_total': ZERO, 'deposit_count': 0,
+            'withdraw_total': ZERO, 'withdraw_count': 0,
+        })
+        entry['deposit_total'] += deposit_total
+        entry['deposit_count'] += deposit_count
+        entry['withdraw_total'] += withdraw_total
+        entry['withdraw_count'] += withdraw_count
+        entry['closing_balance'] = closing  # rows are ascending, so the last day wins
+    for entry in periods.values():
+        entry['net'] = entry['deposit_total'] - entry['withdraw_total']
+    return list(periods.values())
+
+
+def balance_as_of(book, day):
+    """Closing balance at the end of `day` (0 before the first transaction)."""
+    closing = (
+        DailyRollup.objects.using(book._state.db).filter(book_id=book.pk, period__lte=day)
+        .order_by('-period').values_list('closing_balance', flat=True).first()
+    )
+    return closing if closing is not None else ZERO
+
+
+def period_totals(book, start=None, end=None):
+    """Deposit/withdraw totals and counts between two dates (inclusive), summed from the daily rows."""
+    rows = DailyRollup.objects.using(book._state.db).filter(book_id=book.pk)
+    if start:
+        rows = rows.filter(period__gte=start)
+    if end:
+        rows = rows.filter(period__lte=end)
+    totals = rows.aggregate(
+        deposit_total=Sum('deposit_total'), deposit_count=Sum('deposit_count'),
+        withdraw_total=Sum('withdraw_total'), withdraw_count=Sum('withdraw_count'),
+    )
+    return {name: value or (0 if name.endswith('_count') else ZERO) for name, value in totals.items()}
@@ -0,0 +1,115 @@
+"""
+Synthetic data generation for load tests and benchmarks.
+
+Everything here uses bulk_create and a single pre-computed password hash, so
+seeding hundreds of thousands of transactions takes seconds, not hours.
+"""
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+from accounts.models import Profile
+from books import rollups
+from books.models import Book, BookDirectory, Transaction
+from books.sharding import sharding_enabled
+
+BATCH_SIZE = 5000
+
+
+def unique_bids(count, rng=random):
+    """Return `count` fresh 6-digit BIDs that are not used by any existing book."""
+    if sharding_enabled():
+        taken = set(BookDirectory.objects.values_list('bid', flat=True))
+    else:
+        taken = set(Book.objects.values_list('bid', flat=True))
+    if len(taken) + count > 10 ** 6:
+        raise ValueError("Not enough free BIDs left for %d new books." % count)
+
+    bids = []
+    while len(bids) < count:
+        bid = '%06d' % rng.randrange(10 ** 6)
+        if bid not in taken:
+            taken.add(bid)
+            bids.append(bid)
+    return bids
+
+
+def seed_users(count, prefix='bench', password='benchpass123'):
+    """Create `count` users (with profiles) named `<prefix>_user_00001`, ... and return them."""
+    password_hash = make_password(password)
+    usernames = [f"{prefix}_user_{i:05d}" for i in range(1, count + 1)]
+
+    User.objects.bulk_create(
+        [User(username=u, email=f"{u}@example.com", password=password_hash) for u in usernames],
+        batch_size=BATCH_SIZE,
+    )
+    users = list(User.objects.filter(username__in=usernames).order_by('id'))
+    Profile.objects.bulk_create(
+        [Profile(user=u, display_name=u.username.replace('_', ' ').title()) for u in users],
+        batch_size=BATCH_SIZE,
+    )
+    return users
+
+
+def seed_books(users, books_per_user, rng=random):
+    """Create `books_per_user` books for each user and return them ordered by user."""
+    bids = iter(unique_bids(len(users) * books_per_user, rng))
+    books = [
+        Book(user=user, name=f"Book {n}", description="Synthetic benchmark book", bid=next(bids))
+        for user in users
+        for n in range(1, books_per_user + 1)
+    ]
+    # Each Book picked its owner's shard from `user` when it was built.
+    by_shard = defaultdict(list)
+    for book in books:
+        by_shard[book._state.db].append(book)
+
+    created = []
+    for alias, shard_books in by_shard.items():
+        Book.objects.using(alias).bulk_create(shard_books, batch_size=BATCH_SIZE)
+        # MySQL does not return primary keys from bulk inserts, so read them back.
+        created += Book.objects.using(alias).filter(bid__in=[b.bid for b in shard_books])
+
+    if sharding_enabled():
+        BookDirectory.objects.bulk_create(
+            [BookDirectory(bid=b.bid, user_id=b.user_id, book_id=b.id) for b in created],
+            batch_size=BATCH_SIZE,
+        )
+    return sorted(created, key=lambda b: (b.user_id, b.id))
+
+
+def generate_transactions(book, count, days=730, rng=random):
+    """Yield `count` unsaved transactions for `book`, spread over the last `days` days."""
+    today = date.today()
+    for _ in range(count):
+        is_deposit = rng.random() < 0.55
+        amount = Decimal(rng.randrange(100, 500000 if is_deposit else 300000)) / 100
+        yield Transaction(
+            book=book,
+            amount=amount,
+            type='deposit' if is_deposit else 'withdraw',
+            note=rng.choice(("Salary", "Groceries", "Rent", "Transfer", "Utilities", "")),
+            created_at=today - timedelta(days=rng.randrange(days)),
+        )
+
+
+def seed_transactions(book, count, rng=random):
+    """Bulk insert `count` transactions into `book` in batches, then rebuild its rollups. Returns the number created."""
+    transactions = Transaction.objects.using(book._state.db)
+    created = 0
+    batch = []
+    for t in generate_transactions(book, count, rng=rng):
+        batch.append(t)
+        if len(batch) == BATCH_SIZE:
+            transactions.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        transactions.bulk_create(batch)
+        created += len(batch)
+    rollups.rebuild(book)  # bulk_create bypasses Transaction.save()
+    return created
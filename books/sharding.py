@@ -0,0 +1,174 @@
+"""
+Horizontal sharding of books and transactions by user.
+
+When settings.SHARD_DATABASES lists database aliases, each user's Book and
+Transaction rows live on exactly one of them. The user -> shard mapping is
+recorded in ShardAssignment (on `default`), chosen the first time by a stable
+CRC32 hash of the user id, and BookDirectory maps every BID to its owner so
+BID lookups (validation, transfers) find the right shard with one indexed read.
+
+Code must scope book/transaction queries to a shard: use
+`Book.objects.for_user(user)`, `Transaction.objects.for_user(user)`,
+`book_by_bid()`, or a related manager such as `book.transactions`.
+With SHARD_DATABASES empty, all of this collapses to the plain `default` database.
+"""
+import zlib
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def sharding_enabled():
+    return bool(settings.SHARD_DATABASES)
+
+
+def hash_shard(user_id):
+    """Shard an id hashes to with the current SHARD_DATABASES (stable across processes)."""
+    shards = settings.SHARD_DATABASES
+    return shards[zlib.crc32(str(user_id).encode()) % len(shards)]
+
+
+def _cache_key(user_id):
+    return f'shard:user:{user_id}'
+
+
+def shard_for_user(user):
+    """Alias holding `user`'s books (a User or a user id), or None when sharding is off."""
+    if not sharding_enabled():
+        return None
+    from .models import ShardAssignment
+
+    user_id = getattr(user, 'pk', user)
+    alias = cache.get(_cache_key(user_id))
+    if alias is None:
+        alias = ShardAssignment.objects.get_or_create(
+            user_id=user_id, defaults={'alias': hash_shard(user_id)}
+        )[0].alias
+        cache.set(_cache_key(user_id), alias, None)
+    return alias
+
+
+def users_by_shard(user_ids):
+    """
+    {alias: [user ids]} for many users at once, with one query for those not
+    cached yet. Users never assigned map to the shard they would hash to, which
+    holds none of their data yet. `default` holds everyone when sharding is off.
+    """
+    if not sharding_enabled():
+        return {'default': list(user_ids)}
+    from .models import ShardAssignment
+
+    aliases = cache.get_many([_cache_key(user_id) for user_id in user_ids])
+    found = {user_id: aliases[_cache_key(user_id)] for user_id in user_ids if _cache_key(user_id) in aliases}
+    missing = [user_id for user_id in user_ids if user_id not in found]
+    if missing:
+        found.update(ShardAssignment.objects.filter(user_id__in=missing).values_list('user_id', 'alias'))
+    shards = {}
+    for user_id in user_ids:
+        shards.setdefault(found.get(user_id) or hash_shard(user_id), []).append(user_id)
+    return shards
+
+
+def assign_shard(user_id, alias):
+    from .models import ShardAssignment
+
+    ShardAssignment.objects.update_or_create(user_id=user_id, defaults={'alias': alias})
+    cache.set(_cache_key(user_id), alias, None)
+
+
+def book_by_bid(bid):
+    """
+    Any user's book by BID, with owner and profile loaded.
+    Raises Book.DoesNotExist like Book.objects.get().
+    """
+    from .models import Book, BookDirectory
+
+    if not sharding_enabled():
+        return Book.objects.select_related('user__profile').get(bid=bid)
+
+    try:
+        entry = BookDirectory.objects.select_related('user__profile').get(bid=bid)
+    except BookDirectory.DoesNotExist:
+        raise Book.DoesNotExist(f"No book with BID {bid}.")
+    # Users live on `default`: load the owner with the directory entry, the book from its shard.
+    book = Book.objects.using(shard_for_user(entry.user_id)).get(pk=entry.book_id)
+    book.user = entry.user
+    return book
+
+
+def bid_taken(bid):
+    from .models import Book, BookDirectory
+
+    if not sharding_enabled():
+        return Book.objects.filter(bid=bid).exists()
+    return BookDirectory.objects.filter(bid=bid).exists()
+
+
+@contextmanager
+def atomic_across(*instances):
+    """
+    One atomic block per database the instances live on, nested.
+
+    Used for cross-shard transfers. This is not two-phase commit: the inner
+    databases commit first, so a crash between commits can leave only part
+    of the transfer applied. Any exception inside the block rolls back all.
+    """
+    with ExitStack() as stack:
+        for alias in dict.fromkeys(obj._state.db for obj in instances):
+            stack.enter_context(transaction.atomic(using=alias))
+        yield
+
+
+def move_user(user_id, source, target, batch_size=5000):
+    """
+    Copy a user's books and transactions from `source` to `target` (rebuilding
+    their rollups there), repoint the directory and the assignment, then delete
+    the originals. Safe to re-run after an interruption: partial copies on
+    `target` are discarded first.
+    Returns (books, transactions) moved.
+    """
+    from . import rollups
+    from .models import Book, BookDirectory, Transaction
+
+    if source == target:
+        return 0, 0
+
+    moved_transactions = 0
+    with transaction.atomic(using=target):
+        Book.objects.using(target).filter(user_id=user_id).delete()
+        books = list(Book.objects.using(source).filter(user_id=user_id))
+        old_ids = {book.bid: book.pk for book in books}
+        for book in books:
+            book.pk = None
+        Book.objects.using(target).bulk_create(books, batch_size=batch_size)
+        # MySQL does not return primary keys from bulk inserts, so read them back.
+        new_ids = dict(Book.objects.using(target).filter(user_id=user_id).values_list('bid', 'id'))
+
+        batch = []
+        for bid, old_id in old_ids.items():
+            for txn in Transaction.objects.using(source).filter(book_id=old_id).iterator(chunk_size=batch_size):
+                txn.pk = None
+                txn.book_id = new_ids[bid]
+                batch.append(txn)
+                if len(batch) == batch_size:
+                    Transaction.objects.using(target).bulk_create(batch)
+                    moved_transactions += len(batch)
+                    batch = []
+        if batch:
+            Transaction.objects.using(target).bulk_create(batch)
+            moved_transactions += len(batch)
+        for book in Book.objects.using(target).filter(user_id=user_id):
+            rollups.rebuild(book)
+
+    with transaction.atomic():
+        BookDirectory.objects.filter(user_id=user_id).delete()
+        BookDirectory.objects.bulk_create(
+            [BookDirectory(bid=bid, user_id=user_id, book_id=book_id) for bid, book_id in new_ids.items()],
+            batch_size=batch_size,
+        )
+        assign_shard(user_id, target)
+
+    Book.objects.using(source).filter(user_id=user_id).delete()
+    return len(books), moved_transactions
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Book, BookDirectory, ShardAssignment
+from .sharding import shard_for_user, sharding_enabled
+
+
+@receiver(post_save, sender=Book)
+def register_bid(sender, instance, created, **kwargs):
+    if created and sharding_enabled():
+        BookDirectory.objects.create(bid=instance.bid, user_id=instance.user_id, book_id=instance.pk)
+
+
+@receiver(post_delete, sender=Book)
+def unregister_bid(sender, instance, **kwargs):
+    # Deleting the old copy of a book rebalance_shards has moved leaves the directory alone.
+    if sharding_enabled() and instance._state.db == shard_for_user(instance.user_id):
+        BookDirectory.objects.filter(bid=instance.bid).delete()
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_books(sender, instance, **kwargs):
+    # The ORM cascade only reaches the user's own database; books on a shard go here.
+    # Look the shard up without creating an assignment the cascade has not collected.
+    assignment = ShardAssignment.objects.filter(user=instance).first() if sharding_enabled() else None
+    if assignment is not None:
+        Book.objects.using(assignment.alias).filter(user=instance).delete()
@@ -0,0 +1,83 @@
+"""
+Consolidated statement over every book of a user (GET /api/v1/statement/ and
+/api/v1/statement/pdf/).
+
+All books' transactions come back from one query ordered by (created_at, id),
+and the per-book and overall running balances are carried along in Python.
+The balances a page opens with are read from the daily rollups
+(books/rollups.py) in one query for all books, plus one grouped sum for the
+rows of the cursor's own day, so page 50 costs what page 1 costs and nothing
+is queried per book.
+"""
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Book, DailyRollup, Transaction
+from .rollups import ZERO
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+# values_list() columns that `entries()` reads.
+COLUMNS = ('id', 'book_id', 'created_at', 'type', 'amount', 'note')
+
+
+def opening_balance(day=None):
+    """Book annotation: the balance at the end of the day before `day` (0 without a day)."""
+    opening = Value(ZERO, output_field=MONEY)
+    if day:
+        closing = DailyRollup.objects.filter(book=OuterRef('pk'), period__lt=day).order_by('-period')
+        opening = Coalesce(Subquery(closing.values('closing_balance')[:1]), opening)
+    return opening
+
+
+def opening_balances(user, day=None, through_id=None):
+    """
+    {book_id: {'id', 'name', 'balance'}} for every book of `user`, oldest book
+    first: each balance at the end of the day before `day` (0 without a day)
+    and, with `through_id`, after that day's transactions up to that id.
+    """
+    books = Book.objects.for_user(user).order_by('created_at', 'id')
+    balances = {
+        pk: {'id': pk, 'name': name, 'balance': balance}
+        for pk, name, balance in books.annotate(opening=opening_balance(day)).values_list('id', 'name', 'opening')
+    }
+
+    if day and through_id is not None:
+        same_day = (
+            Transaction.objects.for_user(user).filter(created_at=day, id__lte=through_id).order_by()
+            .values('book_id').annotate(net=Sum(Case(
+                When(type='deposit', then=F('amount')), default=-F('amount'), output_field=MONEY,
+            )))
+        )
+        for row in same_day:
+            balances[row['book_id']]['balance'] += row['net']
+    return balances
+
+
+def transactions(user, start=None, end=None):
+    """Every transaction of every book of `user` between two dates (inclusive), oldest first."""
+    queryset = Transaction.objects.for_user(user)
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__lte=end)
+    return queryset.order_by('created_at', 'id')
+
+
+def entries(rows, balances):
+    """
+    Statement lines for `COLUMNS` rows, oldest first. `balances` (from
+    `opening_balances()`) is advanced in place; each line carries its book's
+    balance and the balance over all books after it.
+    """
+    total = sum((book['balance'] for book in balances.values()), ZERO)
+    for pk, book_id, created_at, t_type, amount, note in rows:
+        net = amount if t_type == 'deposit' else -amount
+        book = balances[book_id]
+        book['balance'] += net
+        total += net
+        yield {
+            'id': pk, 'book': book_id, 'book_name': book['name'], 'created_at': created_at,
+            'type': t_type, 'amount': amount, 'note': note, 'sign_amount': net,
+            'book_balance': book['balance'], 'balance': total,
+        }
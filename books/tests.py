@@ -1,3 +1,858 @@
-from django.test import TestCase
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+import brotli
+import msgpack
+import orjson
+import pypdf
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from books import analytics, batch, rollups, sharding
+from books.api.serializers import BookSerializer, TransactionSerializer
+from books.models import Book, BookDirectory, DailyRollup, MonthlyRollup, ShardAssignment, StatementDelivery, Transaction
+from core.db_routers import ShardRoutingError
+from core.testing import make_owner, make_user
+
+
+class QueryBudgetTests(TestCase):
+    """Hitting the main views with several books must stay within their declared budgets."""
+
+    def setUp(self):
+        self.user = make_user('budget', email='b@example.com')
+        _, self.other_book = make_owner('other', 'Other Book', email='o@example.com')
+        self.books = [Book.objects.create(user=self.user, name=f'Book {i}') for i in range(5)]
+        for book in self.books:
+            for amount in ('100.00', '25.00', '10.00'):
+                Transaction.objects.create(book=book, amount=amount, type='deposit')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_html_views(self):
+        self.client.force_login(self.user)
+        for url in ('/', f'/book/{self.books[0].id}/', f'/validate-bid/?bid={self.other_book.bid}'):
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+        response = self.client.post('/transfer-funds/', {
+            'sender_book_id': self.books[0].id, 'recipient_bid': self.other_book.bid, 'amount': '5.00',
+        })
+        self.assertTrue(response.json()['success'])
+
+    def test_api_views(self):
+        for url in ('/api/v1/books/', f'/api/v1/books/{self.books[0].id}/',
+                    f'/api/v1/books/{self.books[0].id}/transactions/', '/api/v1/transactions/',
+                    '/api/v1/statement/', f'/api/v1/validate-bid/?bid={self.other_book.bid}'):
+            self.assertEqual(self.api.get(url).status_code, 200, url)
+        response = self.api.post('/api/v1/transfer/', {
+            'sender_book_id': self.books[0].id, 'recipient_bid': self.other_book.bid, 'amount': '5.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_book_list_does_not_query_per_book(self):
+        with self.assertNumQueries(1):
+            self.api.get('/api/v1/books/')
+
+    def test_budget_violation_fails(self):
+        from core.queries import QueryBudgetExceeded
+        with patch('books.api.views.BookViewSet.query_budget', {'list': 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.api.get('/api/v1/books/')
+
+    def test_fingerprint_ignores_literals(self):
+        from core.queries import fingerprint
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'x' AND pk IN (%s, %s, %s)"),
+            fingerprint("SELECT * FROM t WHERE id = 7 AND name = 'y'  AND pk IN (%s)"),
+        )
+
+
+class StaticAssetTests(TestCase):
+    """Pages link their CSS/JS as static files, which collectstatic hashes and precompresses for WhiteNoise."""
+
+    # HTML bytes per page; each inlined its stylesheet (and script) before, at 11-93 KB.
+    PAGE_BUDGETS = {'login': 4000, 'dashboard': 12000, 'book_detail': 18000}
+
+    def test_pages_link_their_assets(self):
+        user, book = make_owner('assets', 'Assets & Co')
+        Transaction.objects.create(book=book, amount='50.00', type='deposit')
+
+        pages = {'login': '/accounts/login/'}
+        html = {'login': self.client.get(pages['login']).content.decode()}
+        self.client.force_login(user)
+        html['dashboard'] = self.client.get('/').content.decode()
+        html['book_detail'] = self.client.get(f'/book/{book.id}/').content.decode()
+
+        for page, content in html.items():
+            self.assertNotIn('<style', content, page)
+            self.assertIn(f'/static/css/{page}.css', content)
+            self.assertLess(len(content.encode()), self.PAGE_BUDGETS[page], page)
+        self.assertIn('/static/js/book_detail.js', html['book_detail'])
+        self.assertIn('name: "Assets \\u0026 Co"', html['book_detail'])
+
+    def test_collected_assets_are_hashed_precompressed_and_immutable(self):
+        from django.templatetags.static import static
+        from django.test import Client
+
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            STATIC_ROOT=root,
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'}},
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['admin', 'rest_framework'])
+            url = static('css/dashboard.css')
+            self.assertRegex(url, r'^/static/css/dashboard\.[0-9a-f]{12}\.css$')
+
+            response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn('max-age=315360000', response['Cache-Control'])
+
+
+class FastSerializationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='fast', password='password123')
+        self.book = Book.objects.create(user=self.user, name='Fast Book')
+        Book.objects.create(user=self.user, name='Empty Book')
+        for amount, t_type in (('0.10', 'deposit'), ('1234567.89', 'deposit'), ('0.20', 'withdraw')):
+            Transaction.objects.create(book=self.book, amount=amount, type=t_type, note='x')
+
+    def test_rows_match_serializers(self):
+        transactions = self.book.transactions.order_by('-created_at', '-id')
+        self.assertEqual(TransactionSerializer.rows(transactions), TransactionSerializer(transactions, many=True).data)
+        books = Book.objects.for_user(self.user).with_totals().order_by('-created_at')
+        self.assertEqual(BookSerializer.rows(books), BookSerializer(books, many=True).data)
+
+    def test_money_is_rendered_as_exact_strings(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        response = api.get('/api/v1/books/')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        balances = {book['name']: book['balance'] for book in response.json()}
+        self.assertEqual(balances, {'Fast Book': '1234567.79', 'Empty Book': '0.00'})
+
+
+class CompactFormatTests(TestCase):
+    """MessagePack / columnar negotiation and compression on the list viewsets."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='compact', password='password123')
+        self.book = Book.objects.create(user=self.user, name='Compact Book')
+        Transaction.objects.bulk_create([
+            Transaction(book=self.book, amount='12.50', type='deposit' if i % 3 else 'withdraw', note='Groceries')
+            for i in range(200)
+        ])
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.path = f'/api/v1/books/{self.book.id}/transactions/'
+
+    def test_msgpack_and_columnar_carry_the_same_rows(self):
+        rows = self.api.get(self.path).json()
+        response = self.api.get(self.path, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), rows)
+
+        response = self.api.get(self.path, {'format': 'columnar'})
+        columns = orjson.loads(response.content)
+        self.assertEqual(list(columns), list(rows[0]))
+        self.assertEqual([dict(zip(columns, values)) for values in zip(*columns.values())], rows)
+
+    def test_large_responses_are_compressed(self):
+        plain = self.api.get(self.path).content
+        response = self.api.get(self.path, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.api.get(self.path, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain)
+
+    def test_refused_encodings_are_not_used(self):
+        response = self.api.get(self.path, HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        response = self.api.get(self.path, HTTP_ACCEPT_ENCODING='br;q=0, gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_encoding_follows_q_values(self):
+        from core.compression import choose_encoding
+        for header, expected in (
+            ('gzip, br', 'br'),
+            ('br;q=0.5, gzip;q=0.8', 'gzip'),
+            ('br;q=0.8, gzip;q=0.8', 'br'),
+            ('gzip;q=0, *', 'br'),
+            ('*;q=0, gzip', 'gzip'),
+            ('BR;Q=1.0', 'br'),
+            ('br;q=x, identity', None),
+            ('', None),
+        ):
+            self.assertEqual(choose_encoding(header), expected, header)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.api.get(f'/api/v1/books/{self.book.id}/', HTTP_ACCEPT_ENCODING='br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.json()['name'], 'Compact Book')
+
+
+class SparseFieldsetTests(TestCase):
+    """`?fields=` / `?omit=` shape the response and prune the query behind it."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sparse', password='password123')
+        self.book = Book.objects.create(user=self.user, name='Sparse Book')
+        self.transaction = Transaction.objects.create(book=self.book, amount='7.25', type='withdraw', note='Tea')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def get(self, path, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), ' '.join(q['sql'] for q in queries).upper()
+
+    def test_book_picker_skips_aggregates(self):
+        books, sql = self.get('/api/v1/books/', fields='id,name,bid')
+        self.assertEqual(books, [{'id': self.book.id, 'name': 'Sparse Book', 'bid': self.book.bid}])
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('SUM(', sql)
+
+        book, sql = self.get(f'/api/v1/books/{self.book.id}/', omit='transactions_count,description')
+        self.assertEqual(list(book), ['id', 'name', 'bid', 'created_at', 'balance'])
+        self.assertEqual(book['balance'], '-7.25')
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('"DESCRIPTION"', sql)
+
+    def test_transaction_fields(self):
+        rows, _ = self.get(f'/api/v1/books/{self.book.id}/transactions/', fields='id,sign_amount')
+        self.assertEqual(rows, [{'id': self.transaction.id, 'sign_amount': '-7.25'}])
+
+        rows, sql = self.get('/api/v1/transactions/', omit='note,sign_amount')
+        self.assertEqual(list(rows[0]), ['id', 'amount', 'type', 'created_at'])
+        self.assertNotIn('"NOTE"', sql)
+
+        detail, sql = self.get(f'/api/v1/transactions/{self.transaction.id}/', fields='amount')
+        self.assertEqual(detail, {'amount': '7.25'})
+        self.assertNotIn('"NOTE"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.api.get('/api/v1/books/', {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['fields'])
+
+
+class TransactionFilterTests(TestCase):
+    """Filters, keyset pages and filtered totals on the transaction lists."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='filters', password='password123')
+        self.book = Book.objects.create(user=self.user, name='Filter Book')
+        other = Book.objects.create(user=self.user, name='Other Book')
+        Transaction.objects.bulk_create(
+            [Transaction(book=self.book, amount=f'{1000 * (i % 10)}.50', type='withdraw' if i % 2 else 'deposit',
+                         note='Rent' if i % 5 == 0 else 'Groceries', created_at=date(2025, 1 + i % 12, 1 + i % 28))
+             for i in range(60)]
+            + [Transaction(book=other, amount='9000.00', type='withdraw', created_at=date(2025, 8, 1))]
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.path = f'/api/v1/books/{self.book.id}/transactions/'
+
+    def test_filters_and_totals(self):
+        params = {'type': 'withdraw', 'min_amount': '5000', 'start': '2025-07-01', 'end': '2025-09-30'}
+        body = self.api.get(self.path, params).json()
+        expected = self.book.transactions.filter(
+            type='withdraw', amount__gte=5000, created_at__range=(date(2025, 7, 1), date(2025, 9, 30))
+        )
+        self.assertEqual({row['id'] for row in body['results']}, set(expected.values_list('id', flat=True)))
+        self.assertEqual(body['totals']['count'], expected.count())
+        self.assertEqual(body['totals']['withdraw_total'], str(sum(t.amount for t in expected)))
+        self.assertEqual(body['totals']['deposit_total'], '0.00')
+        self.assertIsNone(body['next'])
+
+        rows = self.api.get(self.path, {'note': 'ren'}).json()['results']
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(self.api.get(self.path, {'type': 'refund'}).status_code, 400)
+
+    def test_keyset_pages_cover_every_row_once(self):
+        seen, url, params = [], '/api/v1/transactions/', {'page_size': 7, 'fields': 'amount'}
+        while url:
+            body = self.api.get(url, params).json()
+            self.assertEqual(body['totals']['count'], 61)
+            self.assertTrue(all(list(row) == ['amount'] for row in body['results']))
+            seen += body['results']
+            url, params = body['next'], None
+        self.assertEqual(len(seen), 61)
+
+        ordered = Transaction.objects.for_user(self.user).order_by('-created_at', '-id')
+        self.assertEqual([row['amount'] for row in seen], [str(t.amount) for t in ordered])
+
+    def test_plain_request_keeps_the_bare_list(self):
+        self.assertEqual(len(self.api.get(self.path).json()), 60)
+        self.assertEqual(self.api.get(self.path, {'cursor': 'garbage'}).status_code, 404)
+
+
+class RollupTests(TestCase):
+    """Daily/monthly rollups stay equal to a rebuild from scratch through every kind of write."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollup', password='password123')
+        self.book = Book.objects.create(user=self.user, name='Rollup Book')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def snapshot(self):
+        fields = ('period', 'deposit_total', 'deposit_count', 'withdraw_total', 'withdraw_count', 'closing_balance')
+        return [
+            list(model.objects.filter(book=self.book).exclude(deposit_count=0, withdraw_count=0)
+                 .order_by('period').values_list(*fields))
+            for model in (DailyRollup, MonthlyRollup)
+        ]
+
+    def assert_matches_rebuild(self):
+        incremental = self.snapshot()
+        rollups.rebuild(self.book)
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_incremental_writes_match_rebuild(self):
+        add = lambda day, amount, t_type='deposit': Transaction.objects.create(
+            book=self.book, amount=amount, type=t_type, created_at=day)
+        add(date(2025, 3, 10), '100.00')
+        add(date(2025, 3, 12), '30.00', 'withdraw')
+        late = add(date(2025, 5, 1), '50.00')
+        back_dated = add(date(2025, 1, 5), '20.00', 'withdraw')  # before every existing row
+        add(date(2025, 3, 10), '5.00')
+        self.assert_matches_rebuild()
+
+        back_dated.amount, back_dated.type, back_dated.created_at = Decimal('25.00'), 'deposit', date(2025, 4, 2)
+        back_dated.save()
+        late.note = 'only the note changed'
+        late.save()
+        self.assert_matches_rebuild()
+
+        late.delete()
+        self.assert_matches_rebuild()
+        self.assertEqual(rollups.balance_as_of(self.book, date(2025, 12, 31)), Decimal('100.00'))
+
+    def test_summary_endpoint(self):
+        for day, amount, t_type in ((date(2025, 6, 2), '10.00', 'deposit'), (date(2025, 6, 8), '4.00', 'withdraw'),
+                                    (date(2025, 6, 9), '1.50', 'withdraw'), (date(2025, 7, 1), '3.00', 'deposit')):
+            Transaction.objects.create(book=self.book, amount=amount, type=t_type, created_at=day)
+        path = f'/api/v1/books/{self.book.id}/summary/'
+
+        months = self.api.get(path).json()
+        self.assertEqual([(m['period'], m['net'], m['closing_balance']) for m in months],
+                         [('2025-06-01', '4.50', '4.50'), ('2025-07-01', '3.00', '7.50')])
+        weeks = self.api.get(path, {'granularity': 'week', 'end': '2025-06-30'}).json()
+        self.assertEqual([(w['period'], w['deposit_count'], w['withdraw_total'], w['closing_balance']) for w in weeks],
+                         [('2025-06-02', 1, '4.00', '6.00'), ('2025-06-09', 0, '1.50', '4.50')])
+        self.assertEqual(self.api.get(path, {'granularity': 'year'}).status_code, 400)
+
+    def test_dashboard_balance_comes_from_rollups(self):
+        Transaction.objects.create(book=self.book, amount='12.00', type='deposit')
+        Transaction.objects.create(book=self.book, amount='2.50', type='withdraw')
+        self.assertEqual(Book.objects.for_user(self.user).with_balance().get().total_balance, Decimal('9.50'))
+
+
+class BookDetailFragmentTests(TestCase):
+    """Book page writes and page links answer with just the balance header and transactions block."""
+
+    AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.book = make_owner('fragment', 'Fragment Book')
+        self.client.force_login(self.user)
+        self.url = f'/book/{self.book.id}/'
+
+    def add_rows(self, count):
+        # Three rows a day, so page boundaries fall in the middle of a day.
+        for i in range(count):
+            Transaction.objects.create(book=self.book, amount=f'{i + 1}.00', type='withdraw' if i % 4 == 3 else 'deposit',
+                                       created_at=date(2025, 1, 1) + timedelta(days=i // 3))
+
+    def test_running_balances_match_full_recomputation(self):
+        from books.views import transactions_context
+        self.add_rows(130)
+        expected, balance = {}, Decimal('0.00')
+        for t in self.book.transactions.order_by('created_at', 'id'):  # one pass over the whole book, oldest first
+            balance += t.sign_amount
+            expected[t.id] = balance
+        total = Book.objects.with_balance().get(pk=self.book.pk).total_balance
+        for page in (1, 2, 4, 7):
+            rows = transactions_context(self.book, page, total)['transactions_with_running']
+            self.assertEqual(len(rows), 20 if page < 7 else 10)
+            self.assertEqual([t.running_balance for t in rows], [expected[t.id] for t in rows], page)
+
+    def test_page_links_are_windowed(self):
+        self.add_rows(200)
+        response = self.client.get(self.url, {'page': 6}, **self.AJAX)
+        html = response.json()['transactions']
+        self.assertIn('<span class="current">6</span>', html)
+        for page in (1, 4, 8, 10):
+            self.assertIn(f'href="?page={page}"', html)
+        self.assertNotIn('href="?page=2"', html)
+        self.assertEqual(html.count('…'), 1)
+
+    def test_ajax_add_returns_fragment(self):
+        self.add_rows(3)
+        response = self.client.post(self.url, {
+            'amount': '50.00', 'type': 'deposit', 'note': 'Fragment note', 'created_at': '2025-02-01',
+        }, **self.AJAX)
+        body = response.json()
+        self.assertEqual(body['level'], 'success')
+        self.assertIn('Total Balance: 56.00', body['balance'])
+        self.assertIn('Fragment note', body['transactions'])
+        self.assertNotIn('<html', body['transactions'])
+
+        response = self.client.post(self.url, {'amount': '-1', 'type': 'deposit'}, **self.AJAX)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['level'], 'error')
+
+    def test_edit_and_delete_return_fragment(self):
+        self.add_rows(2)
+        first = self.book.transactions.order_by('id').first()
+        body = self.client.post(f'{self.url}edit-transaction/{first.id}/', {
+            'amount': '10.00', 'type': 'withdraw', 'note': '',
+        }, **self.AJAX).json()
+        self.assertIn('Total Balance: -8.00', body['balance'])
+        body = self.client.post(f'{self.url}delete-transaction/{first.id}/', **self.AJAX).json()
+        self.assertIn('Total Balance: 2.00', body['balance'])
+        # Plain form posts still redirect back to the page.
+        self.assertRedirects(self.client.post(f'{self.url}add-transaction/', {
+            'amount': '5.00', 'type': 'deposit', 'note': '', 'created_at': '2025-03-04',
+        }), self.url)
+        self.assertTrue(self.book.transactions.filter(created_at=date(2025, 3, 4)).exists())
+
+
+@override_settings(FRAGMENT_CACHE_SECONDS=3600)
+class FragmentCacheTests(TestCase):
+    """Dashboard cards and book-page transaction blocks are rendered once per book version."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('cards')
+        self.books = [Book.objects.create(user=self.user, name=f'Card Book {i}') for i in range(3)]
+        self.client.force_login(self.user)
+
+    def test_cards_are_reused_until_the_book_changes(self):
+        self.assertTemplateUsed(self.client.get('/'), 'books/partials/book_card.html')
+        response = self.client.get('/')
+        self.assertTemplateNotUsed(response, 'books/partials/book_card.html')
+        self.assertContains(response, 'Card Book 2')
+
+        Transaction.objects.create(book=self.books[0], amount='42.00', type='deposit')
+        self.books[1].name = 'Renamed Book'
+        self.books[1].save()
+        response = self.client.get('/')
+        self.assertContains(response, '42.00 TK')
+        self.assertContains(response, 'Renamed Book')
+        self.assertNotContains(response, 'Card Book 1')
+
+    def test_transactions_block_is_reused_until_the_book_changes(self):
+        book = self.books[0]
+        url = f'/book/{book.id}/'
+        Transaction.objects.create(book=book, amount='10.00', type='deposit', note='first')
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(url)
+        self.assertEqual(len(cold) - len(warm), 2)  # no count, no rows
+        self.assertTemplateNotUsed(response, 'books/partials/transactions.html')
+        self.assertContains(response, 'first')
+
+        self.client.post(f'{url}add-transaction/', {'amount': '5.00', 'type': 'withdraw', 'note': 'second'})
+        self.assertContains(self.client.get(url), 'second')
+        # Page numbers past the end show the last page but are not stored.
+        self.client.get(url, {'page': 99})
+        self.assertTemplateUsed(self.client.get(url, {'page': 99}), 'books/partials/transactions.html')
+
+    def test_rebuild_retires_fragments(self):
+        book = self.books[0]
+        self.client.get(f'/book/{book.id}/')
+        Transaction.objects.bulk_create([Transaction(book=book, amount='7.00', type='deposit', note='bulk')])
+        rollups.rebuild(book)
+        self.assertContains(self.client.get(f'/book/{book.id}/'), 'bulk')
+
+
+class AnalyticsTests(TestCase):
+    """The vectorized analytics agree with a plain per-day calculation."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='numbers', password='password123')
+        self.book = Book.objects.create(user=self.user, name='Runway Book')
+        self.today = date(2025, 3, 31)  # a Monday
+        Transaction.objects.create(book=self.book, amount='1000.00', type='deposit', created_at=date(2025, 3, 1))
+        for day in range(2, 32):  # 10.50 spent every day of March from the 2nd, 20.25 more on Sundays
+            spent = Decimal('10.50') + (Decimal('20.25') if date(2025, 3, day).weekday() == 6 else 0)
+            Transaction.objects.create(book=self.book, amount=spent, type='withdraw', created_at=date(2025, 3, day))
+
+    def test_trends_and_forecast(self):
+        result = analytics.analyze(*analytics.load(self.book), today=self.today, history=7)
+        spent = sum(t.amount for t in self.book.transactions.filter(type='withdraw'))
+
+        self.assertEqual(result['transactions'], 31)
+        self.assertEqual(result['balance'], str(Decimal('1000.00') - spent))
+        self.assertEqual(result['burn_rate']['30d'], str((spent / 30).quantize(Decimal('0.01'))))
+        self.assertEqual(len(result['series']), 7)
+        self.assertEqual(result['series'][-1]['date'], '2025-03-31')
+        self.assertEqual(result['series'][-1]['net_7d'], '-13.39')  # (7 * 10.50 + 20.25) / 7
+        self.assertEqual(result['seasonality']['weekday']['Sunday']['avg_outflow'], '30.75')
+        self.assertEqual(result['seasonality']['weekday']['Tuesday']['avg_outflow'], '10.50')
+
+        # ~13.4 a day leaves ~592 for ~44 more days.
+        self.assertLess(Decimal(result['forecast']['daily_trend']), 0)
+        self.assertTrue(40 <= result['forecast']['runway_days'] <= 48)
+
+    def test_endpoint(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        response = api.get(f'/api/v1/books/{self.book.id}/analytics/', {'days': 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['series']), 30)
+        self.assertEqual(api.get(f'/api/v1/books/{self.book.id}/analytics/', {'days': 0}).status_code, 400)
+
+        empty = Book.objects.create(user=self.user, name='Empty')
+        self.assertEqual(api.get(f'/api/v1/books/{empty.id}/analytics/').json()['transactions'], 0)
+
+
+class ReportPDFTests(TestCase):
+    """The canvas renderer pages long books and copes with any note text."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='report', password='password123')
+        self.book = Book.objects.create(user=self.user, name='Report Book')
+        notes = ['Rent (March) \\ paid', 'বাজার খরচ', None, 'A long note ' * 8]
+        Transaction.objects.bulk_create([
+            Transaction(book=self.book, amount=Decimal(5 + i), type='deposit' if i % 3 else 'withdraw',
+                        note=notes[i % 4], created_at=date(2025, 1, 1) + timedelta(days=i))
+            for i in range(120)
+        ])
+        rollups.rebuild(self.book)
+
+    def test_book_report(self):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from books.reports import wrap
+        self.client.force_login(self.user)
+        response = self.client.get(f'/book/{self.book.id}/report/')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        pages = int(response.content.split(b'/Count ')[1].split(b' ')[0])
+        self.assertGreater(pages, 3)
+        lines = wrap('A long note ' * 8, 'Helvetica', 9, 150)
+        self.assertGreater(len(lines), 1)
+        self.assertTrue(all(stringWidth(line, 'Helvetica', 9) <= 150 for line in lines))
+
+    def test_rows_read_back_as_text(self):
+        self.client.force_login(self.user)
+        pdf = pypdf.PdfReader(io.BytesIO(self.client.get(f'/book/{self.book.id}/report/').content))
+        first, last = pdf.pages[0].extract_text(), pdf.pages[-1].extract_text()
+        for text in ('Account Holder: report', 'Running Balance', '30 April, 2025 Deposit +124.00 2660.00',
+                     '28 April, 2025 Withdraw -122.00', 'Rent (March) \\ paid', 'A long note', 'Page 1'):
+            self.assertIn(text, first)
+        self.assertIn('Running Balance', last)  # the header is repeated on every page
+        self.assertIn('01 January, 2025 Withdraw -5.00', last)
+        self.assertIn('Total Deposits (80):', last)
+
+
+class ReportArchiveTests(TestCase):
+    """The archive holds one PDF per requested book, rendered by the process pool."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='accountant', password='password123')
+        self.books = [Book.objects.create(user=self.user, name='Shop') for _ in range(3)]
+        for i, book in enumerate(self.books[:2]):
+            for day in range(1, 4):
+                Transaction.objects.create(book=book, amount=Decimal(100 * (i + 1)), type='deposit', created_at=date(2025, 5, day))
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_zip_of_statements(self):
+        import zipfile
+
+        ids = f'{self.books[0].id},{self.books[2].id}'
+        with CaptureQueriesContext(connection) as captured:
+            response = self.api.get('/api/v1/reports/archive/', {'books': ids, 'start': '2025-05-02'})
+        self.assertEqual(len(captured), 2)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        names = archive.namelist()
+        self.assertEqual(sorted(name.split('_')[1] for name in names), sorted([self.books[0].bid, self.books[2].bid]))
+        for name in names:
+            self.assertTrue(archive.read(name).startswith(b'%PDF'), name)
+
+    def test_other_users_books_are_not_found(self):
+        other = Book.objects.create(user=User.objects.create_user(username='client'), name='Client')
+        response = self.api.get('/api/v1/reports/archive/', {'books': f'{self.books[0].id},{other.id}'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.api.get('/api/v1/reports/archive/', {'books': 'a,b'}).status_code, 400)
+
+
+class StatementTests(TestCase):
+    """The consolidated statement merges every book in one query and pages with exact balances."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='statement', password='password123')
+        self.books = [Book.objects.create(user=self.user, name=f'Book {i}') for i in range(3)]
+        other = User.objects.create_user(username='stranger', password='password123')
+        Transaction.objects.create(book=Book.objects.create(user=other, name='Not Mine'), amount='999.00', type='deposit')
+        for i in range(30):
+            Transaction.objects.create(
+                book=self.books[i % 3], amount=Decimal(10 + i), type='withdraw' if i % 4 == 3 else 'deposit',
+                created_at=date(2025, 1, 1 + i // 2), note=f'Line {i}',
+            )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def expected(self, start=None):
+        """Running balances recomputed per row from scratch."""
+        balances, total, rows = {book.id: Decimal('0.00') for book in self.books}, Decimal('0.00'), []
+        for t in Transaction.objects.filter(book__user=self.user).order_by('created_at', 'id'):
+            balances[t.book_id] += t.sign_amount
+            total += t.sign_amount
+            if start is None or t.created_at >= start:
+                rows.append((t.id, t.book_id, str(balances[t.book_id]), str(total)))
+        return rows
+
+    def test_pages_carry_running_balances(self):
+        url, rows, queries = '/api/v1/statement/?page_size=7', [], []
+        while url:
+            with CaptureQueriesContext(connection) as captured:
+                page = self.api.get(url).json()
+            queries.append(len(captured))
+            if not rows:
+                self.assertEqual(page['opening']['balance'], '0.00')
+                self.assertEqual([book['name'] for book in page['opening']['books']], ['Book 0', 'Book 1', 'Book 2'])
+            rows += [(r['id'], r['book'], r['book_balance'], r['balance']) for r in page['results']]
+            url = page['next']
+
+        self.assertEqual(rows, self.expected())
+        self.assertEqual(len(queries), 5)
+        self.assertLessEqual(max(queries), 3)  # never one query per book
+
+    def test_period_opens_with_earlier_balances(self):
+        page = self.api.get('/api/v1/statement/', {'start': '2025-01-06', 'end': '2025-01-10'}).json()
+        expected = self.expected(start=date(2025, 1, 6))[:10]
+        self.assertEqual([(r['id'], r['book'], r['book_balance'], r['balance']) for r in page['results']], expected)
+        opening = Decimal(expected[0][3]) - Decimal(page['results'][0]['sign_amount'])
+        self.assertEqual(page['opening']['balance'], str(opening))
+        self.assertEqual(self.api.get('/api/v1/statement/', {'start': '2025-02-01', 'end': '2025-01-01'}).status_code, 400)
+
+    def test_pdf(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.api.get('/api/v1/statement/pdf/', {'start': '2025-01-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertEqual(len(captured), 2)
+
+
+class MonthlyStatementTests(TestCase):
+    """send_monthly_statements mails each user one PDF, reads in bulk and resumes from its checkpoints."""
+
+    def setUp(self):
+        self.period = date(2025, 9, 1)
+        self.users = [User.objects.create_user(username=f'member{i}', email=f'member{i}@example.com') for i in range(3)]
+        for user in self.users:
+            savings, wallet = Book.objects.create(user=user, name='Savings'), Book.objects.create(user=user, name='Wallet')
+            Transaction.objects.create(book=savings, amount='500.00', type='deposit', created_at=date(2025, 8, 20))
+            Transaction.objects.create(book=savings, amount='120.00', type='withdraw', created_at=date(2025, 9, 3))
+            Transaction.objects.create(book=wallet, amount='80.00', type='deposit', created_at=date(2025, 9, 30))
+            Transaction.objects.create(book=wallet, amount='40.00', type='deposit', created_at=date(2025, 10, 1))
+        User.objects.create_user(username='nobooks', email='nobooks@example.com')
+        User.objects.create_user(username='noemail')
+
+    def test_statements_are_mailed_once(self):
+        StatementDelivery.objects.create(user=self.users[2], period=self.period)
+        out = io.StringIO()
+        call_command('send_monthly_statements', month='2025-09', workers=1, stdout=out)
+
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['member0@example.com', 'member1@example.com'])
+        name, content, mimetype = mail.outbox[0].attachments[0]
+        self.assertEqual(mimetype, 'application/pdf')
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertIn('2 sent, 0 failed, 1 without books', out.getvalue())
+        self.assertEqual(StatementDelivery.objects.filter(period=self.period).count(), 3)
+
+        # A second run only revisits the user without books.
+        call_command('send_monthly_statements', month='2025-09', workers=1, stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_chunk_reads_in_bulk(self):
+        start, end = batch.month_bounds(self.period)
+        ids = [user.id for user in self.users]
+        with CaptureQueriesContext(connection) as captured:
+            statements = list(batch.shard_statements('default', ids, start, end))
+        self.assertEqual(len(captured), 2)
+        user_id, balances, lines = statements[0]
+        self.assertEqual(sorted(book['balance'] for book in balances.values()), [Decimal('0.00'), Decimal('500.00')])
+        self.assertEqual([line[4] for line in lines], [Decimal('120.00'), Decimal('80.00')])
+
+        with CaptureQueriesContext(connection) as captured:
+            result = batch.send_chunk(self.period, ids)
+        self.assertEqual(result['sent'], 3)
+        self.assertEqual(len(captured), 4)  # users, books, transactions, checkpoints
+
+
+class AsyncAPITests(TestCase):
+    """The /api/v1/async/ endpoints answer like their DRF counterparts."""
+
+    def setUp(self):
+        self.user = make_user('async', email='a@example.com')
+        _, self.other_book = make_owner('payee', 'Payee Book', email='p@example.com')
+        self.book = Book.objects.create(user=self.user, name='Async Book')
+        Transaction.objects.create(book=self.book, amount='100.00', type='deposit')
+        self.auth = {'headers': {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}}
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    async def test_reads_match_sync_api(self):
+        for path in ('books/', f'books/{self.book.id}/transactions/', f'validate-bid/?bid={self.other_book.bid}'):
+            response = await self.async_client.get(f'/api/v1/async/{path}', **self.auth)
+            self.assertEqual(response.status_code, 200, path)
+            expected = await sync_to_async(self.api.get)(f'/api/v1/{path}')
+            self.assertEqual(response.json(), expected.json(), path)
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+    async def test_create_transaction_and_transfer(self):
+        response = await self.async_client.post(
+            f'/api/v1/async/books/{self.book.id}/transactions/',
+            {'amount': '25.50', 'type': 'withdraw', 'note': 'Lunch'}, content_type='application/json', **self.auth,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['sign_amount'], '-25.50')
+
+        response = await self.async_client.post('/api/v1/async/transfer/', {
+            'sender_book_id': self.book.id, 'recipient_bid': self.other_book.bid, 'amount': '70.00',
+        }, content_type='application/json', **self.auth)
+        self.assertTrue(response.json()['success'])
+        response = await self.async_client.post('/api/v1/async/transfer/', {
+            'sender_book_id': self.book.id, 'recipient_bid': self.other_book.bid, 'amount': '70.00',
+        }, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(await self.other_book.transactions.acount(), 1)
+
+    async def test_failed_transfer_answers_like_sync_api(self):
+        body = {'sender_book_id': self.book.id, 'recipient_bid': self.other_book.bid, 'amount': '5.00'}
+        with patch('books.transfers.transfer', side_effect=RuntimeError('database is locked')):
+            response = await self.async_client.post(
+                '/api/v1/async/transfer/', body, content_type='application/json', **self.auth,
+            )
+            expected = await sync_to_async(self.api.post)('/api/v1/transfer/', body, format='json')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response.json()['message'], 'Transfer failed: database is locked')
+
+    async def test_profile(self):
+        response = await self.async_client.patch(
+            '/api/v1/async/auth/profile/', {'display_name': 'Renamed'}, content_type='application/json', **self.auth,
+        )
+        self.assertEqual(response.json()['user']['profile']['display_name'], 'Renamed')
+        response = await self.async_client.get('/api/v1/async/auth/profile/', **self.auth)
+        self.assertEqual(response.json()['username'], 'async')
+
+    async def test_requires_valid_token(self):
+        response = await self.async_client.get('/api/v1/async/books/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get('/api/v1/async/books/', headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(response.status_code, 401)
+
+
+@unittest.skipUnless(len(settings.SHARD_DATABASES) >= 2, "Set SHARD_DATABASES=shard_1,shard_2 to run sharding tests.")
+class ShardingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.first, self.second = settings.SHARD_DATABASES[:2]
+        self.alice = self.sharded_user('alice', self.first)
+        self.bob = self.sharded_user('bob', self.second)
+        self.alice_book = Book.objects.create(user=self.alice, name='Alice Book')
+        Transaction.objects.create(book=self.alice_book, amount='100.00', type='deposit')
+        self.bob_book = Book.objects.create(user=self.bob, name='Bob Book')
+
+    def sharded_user(self, username, alias):
+        user = make_user(username, email=f'{username}@example.com')
+        sharding.assign_shard(user.pk, alias)
+        return user
+
+    def test_books_are_stored_on_the_owner_shard(self):
+        self.assertEqual(self.alice_book._state.db, self.first)
+        self.assertTrue(Book.objects.using(self.first).filter(bid=self.alice_book.bid).exists())
+        self.assertFalse(Book.objects.using(self.second).filter(bid=self.alice_book.bid).exists())
+        self.assertEqual(list(Book.objects.for_user(self.bob)), [self.bob_book])
+        self.assertEqual(BookDirectory.objects.get(bid=self.bob_book.bid).book_id, self.bob_book.pk)
+
+        self.client.force_login(self.alice)
+        self.assertContains(self.client.get('/'), 'Alice Book')
+        self.assertContains(self.client.get(f'/book/{self.alice_book.id}/'), '100.00')
+
+        api = APIClient()
+        api.force_authenticate(self.alice)
+        statement = api.get('/api/v1/statement/').json()
+        self.assertEqual([row['balance'] for row in statement['results']], ['100.00'])
+
+    def test_unscoped_queries_are_rejected(self):
+        with self.assertRaises(ShardRoutingError):
+            list(Book.objects.all())
+
+    def test_cross_shard_transfer(self):
+        api = APIClient()
+        api.force_authenticate(self.alice)
+        response = api.get(f'/api/v1/validate-bid/?bid={self.bob_book.bid}')
+        self.assertEqual(response.json()['owner_name'], 'Bob')
+
+        response = api.post('/api/v1/transfer/', {
+            'sender_book_id': self.alice_book.id, 'recipient_bid': self.bob_book.bid, 'amount': '40.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.alice_book.transactions.filter(type='withdraw', amount='40.00').exists())
+        self.assertTrue(self.bob_book.transactions.filter(type='deposit', amount='40.00').exists())
+
+        self.client.force_login(self.alice)
+        response = self.client.post('/transfer-funds/', {
+            'sender_book_id': self.alice_book.id, 'recipient_bid': self.bob_book.bid, 'amount': '60.00',
+        })
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(self.bob_book.transactions.count(), 2)
+
+    def test_rebalance_moves_users_to_their_hashed_shard(self):
+        wrong = next(alias for alias in settings.SHARD_DATABASES if alias != sharding.hash_shard(self.alice.pk))
+        sharding.move_user(self.alice.pk, self.first, wrong)
+        self.assertEqual(Book.objects.for_user(self.alice).get().transactions.count(), 1)
+
+        call_command('rebalance_shards', stdout=open(os.devnull, 'w'))
+
+        target = sharding.hash_shard(self.alice.pk)
+        self.assertEqual(ShardAssignment.objects.get(user=self.alice).alias, target)
+        book = sharding.book_by_bid(self.alice_book.bid)
+        self.assertEqual(book._state.db, target)
+        self.assertEqual(book.transactions.count(), 1)
+        balance = book.transactions.get().sign_amount
+        self.assertEqual(rollups.balance_as_of(book, timezone.localdate()), balance)
+        if wrong != target:
+            self.assertFalse(Book.objects.using(wrong).filter(user_id=self.alice.pk).exists())
+
+    def test_monthly_statements_read_each_shard(self):
+        cache.clear()
+        shards = sharding.users_by_shard([self.alice.pk, self.bob.pk])
+        self.assertEqual(shards, {self.first: [self.alice.pk], self.second: [self.bob.pk]})
+
+        call_command('send_monthly_statements', month=timezone.localdate().strftime('%Y-%m'), workers=1, stdout=io.StringIO())
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['alice@example.com', 'bob@example.com'])
+        self.assertEqual(StatementDelivery.objects.count(), 2)
@@ -0,0 +1,180 @@
+"""
+Micro-benchmarks for the hot paths, compared against benchmarks/baseline.json.
+
+They are slow and machine-dependent, so they only run when asked for:
+
+    RUN_BENCHMARKS=1 python manage.py test books.tests_benchmarks
+    RUN_BENCHMARKS=1 UPDATE_BENCHMARK_BASELINE=1 python manage.py test books.tests_benchmarks
+
+A benchmark fails when it is slower than its baseline by more than
+BENCHMARK_TOLERANCE (default 0.25 = 25%). Row counts for the PDF report can be
+overridden with BENCHMARK_REPORT_SIZES=1000,10000,50000.
+"""
+import json
+import os
+import random
+import time
+import unittest
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from accounts.models import Profile
+from books import analytics, fragments, seeding
+from books.api.serializers import BookSerializer, TransactionSerializer
+from books.models import Book, Transaction
+from books.views import transaction_report_pdf, transactions_context
+from core import importtime
+
+BASELINE_FILE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+TOLERANCE = float(os.environ.get('BENCHMARK_TOLERANCE', '0.25'))
+UPDATE_BASELINE = os.environ.get('UPDATE_BENCHMARK_BASELINE') == '1'
+REPORT_SIZES = [int(n) for n in os.environ.get('BENCHMARK_REPORT_SIZES', '1000,10000,50000').split(',')]
+
+
+def load_baseline():
+    if BASELINE_FILE.exists():
+        return json.loads(BASELINE_FILE.read_text())
+    return {}
+
+
+@unittest.skipUnless(os.environ.get('RUN_BENCHMARKS') == '1', "Set RUN_BENCHMARKS=1 to run benchmarks.")
+class HotPathBenchmarks(TestCase):
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rng = random.Random(42)
+        cls.user = User.objects.create_user(username='bench', password='benchpass123', email='bench@example.com')
+        Profile.objects.create(user=cls.user, display_name='Bench')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if UPDATE_BASELINE and cls.results:
+            baseline = load_baseline()
+            baseline.update(cls.results)
+            BASELINE_FILE.parent.mkdir(exist_ok=True)
+            BASELINE_FILE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+
+    def benchmark(self, name, func, repeat=3, self_timed=False):
+        """
+        Run `func` `repeat` times, keep the best wall time and compare it with the baseline.
+        With `self_timed`, `func` returns its own duration in ms instead (e.g. measured in a subprocess).
+        """
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, result / 1000 if self_timed else time.perf_counter() - start)
+
+        best_ms = round(best * 1000, 3)
+        type(self).results[name] = best_ms
+
+        expected = load_baseline().get(name)
+        if expected is not None and not UPDATE_BASELINE:
+            limit = expected * (1 + TOLERANCE)
+            self.assertLessEqual(
+                best_ms, limit,
+                f"{name} regressed: {best_ms}ms vs baseline {expected}ms (tolerance {TOLERANCE:.0%})",
+            )
+        return best_ms
+
+    def make_book(self, rows):
+        book = Book.objects.create(user=self.user, name=f'Bench {rows}')
+        seeding.seed_transactions(book, rows, rng=self.rng)
+        return book
+
+    # ─────────────────────────────────────────────
+
+    def test_running_balances(self):
+        """Running balances for the first and a middle page of a 100k-row book, as the book page computes them."""
+        book = self.make_book(100000)
+        total = Book.objects.with_balance().get(pk=book.pk).total_balance
+        for page in (1, 2500):
+            self.benchmark(
+                f'running_balances_100k_page_{page}',
+                lambda: transactions_context(book, page, total)['transactions_with_running'],
+            )
+
+    def test_analytics(self):
+        """Load + analyze a 100k-transaction book."""
+        book = self.make_book(100000)
+        self.benchmark('analytics_100k', lambda: analytics.analyze(*analytics.load(book)))
+
+    def test_book_serializer(self):
+        for _ in range(50):
+            self.make_book(100)
+        books = Book.objects.filter(user=self.user)
+        self.benchmark('book_serializer_50_books', lambda: BookSerializer(books.all(), many=True).data)
+
+    def test_transaction_serializer(self):
+        book = self.make_book(10000)
+        qs = book.transactions.order_by('-created_at', '-id')
+        self.benchmark('transaction_serializer_10k', lambda: TransactionSerializer(qs.all(), many=True).data)
+
+    def test_transactions_response(self):
+        """Full list response for 10k rows: DRF serializer + stdlib JSON vs `.values()` rows + orjson."""
+        from rest_framework.renderers import JSONRenderer
+        from core.renderers import ORJSONRenderer
+
+        book = self.make_book(10000)
+        qs = book.transactions.order_by('-created_at', '-id')
+        self.benchmark('transactions_response_10k_drf',
+                       lambda: JSONRenderer().render(TransactionSerializer(qs.all(), many=True).data))
+        self.benchmark('transactions_response_10k_fast',
+                       lambda: ORJSONRenderer().render(TransactionSerializer.rows(qs.all())))
+
+    @override_settings(FRAGMENT_CACHE_SECONDS=3600)
+    def test_fragment_cache(self):
+        """Rendering 200 dashboard cards and a book page from scratch vs from the fragment cache."""
+        for i in range(200):
+            Book.objects.create(user=self.user, name=f'Card {i}', description='Synthetic benchmark book')
+        books = list(Book.objects.for_user(self.user).with_balance().order_by('name'))
+
+        def cold_cards():
+            cache.clear()
+            return fragments.book_cards(books)
+
+        self.benchmark('book_cards_200_cold', cold_cards)
+        self.benchmark('book_cards_200_cached', lambda: fragments.book_cards(books))
+
+        book = self.make_book(10000)
+        self.client.force_login(self.user)
+
+        def cold_page():
+            cache.clear()
+            return self.client.get(f'/book/{book.id}/', {'page': 5})
+
+        self.benchmark('book_detail_page_cold', cold_page)
+        self.benchmark('book_detail_page_cached', lambda: self.client.get(f'/book/{book.id}/', {'page': 5}))
+
+    def test_report_pdf(self):
+        factory = RequestFactory()
+        for rows in REPORT_SIZES:
+            book = self.make_book(rows)
+            request = factory.get(f'/book/{book.id}/report/')
+            request.user = self.user
+            self.benchmark(f'report_pdf_{rows}', lambda: transaction_report_pdf(request, book.id), repeat=1)
+
+    def test_generate_new_bid(self):
+        taken = 0
+        for occupancy in (0.1, 0.5, 0.9):
+            target = int(10 ** 6 * occupancy)
+            bids = seeding.unique_bids(target - taken, self.rng)
+            Book.objects.bulk_create(
+                [Book(user=self.user, name='Filler', bid=bid) for bid in bids], batch_size=seeding.BATCH_SIZE
+            )
+            taken = target
+            self.benchmark(
+                f'generate_new_bid_{int(occupancy * 100)}pct',
+                lambda: [Book.generate_new_bid() for _ in range(100)],
+            )
+
+    def test_worker_import(self):
+        """`import core.wsgi` in a fresh interpreter, as every gunicorn worker (or the preloading master) does."""
+        best_ms = self.benchmark('worker_import', lambda: importtime.measure('core.wsgi').total_ms, repeat=5, self_timed=True)
+        self.assertLess(best_ms, settings.IMPORT_TIME_BUDGET_MS)
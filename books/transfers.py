@@ -0,0 +1,41 @@
+"""
+P2P transfers between books, shared by the web view, the DRF API and the async API.
+"""
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Transaction
+from .sharding import atomic_across
+
+
+class InsufficientBalance(Exception):
+    pass
+
+
+def book_balance(book):
+    return book.transactions.aggregate(
+        balance=Coalesce(
+            Sum(Case(
+                When(type='deposit', then=F('amount')),
+                When(type='withdraw', then=-F('amount')),
+                output_field=DecimalField()
+            )),
+            Value(0, output_field=DecimalField())
+        )
+    )['balance']
+
+
+def transfer(sender_book, recipient_book, amount, note=''):
+    """Withdraw `amount` from the sender and deposit it into the recipient, atomically."""
+    if book_balance(sender_book) < amount:
+        raise InsufficientBalance('Insufficient balance in sender book.')
+
+    sender_note = f"Transfer to BID-{recipient_book.bid}"
+    recipient_note = f"Transfer from BID-{sender_book.bid}"
+    if note:
+        sender_note += f": {note}"
+        recipient_note += f": {note}"
+
+    with atomic_across(sender_book, recipient_book):
+        Transaction.objects.create(book=sender_book, amount=amount, type='withdraw', note=sender_note)
+        Transaction.objects.create(book=recipient_book, amount=amount, type='deposit', note=recipient_note)
@@ -1,50 +1,34 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from .models import Book, Transaction
+from .balances import page_running_balances
+from .sharding import book_by_bid
+from . import fragments, rollups, transfers
 from django.contrib import messages
 from decimal import Decimal, InvalidOperation
 from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
 from django.template.loader import render_to_string
 from datetime import datetime, date
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle, Paragraph, SimpleDocTemplate, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from django.core.paginator import Paginator
 from django.utils.dateparse import parse_date
-from django.utils import timezone
-import pytz
-from django.db import transaction as db_transaction
-from django.db.models import Sum, Case, When, DecimalField, F, Value
-from django.db.models.functions import Coalesce
+from core.queries import query_budget
+from accounts.authentication import cached_user
 
 
 @login_required
+@query_budget(5)
 def dashboard_view(request):
     # Get search query from request
     search_query = request.GET.get('search', '').strip()
     
     # Filter books by user and apply search if provided
-    books = Book.objects.filter(user=request.user)
+    books = Book.objects.for_user(request.user)
     
     if search_query:
         books = books.filter(name__icontains=search_query)
     
     # Sort books alphabetically by name (case-insensitive)
-    books = books.annotate(
-        total_balance=Coalesce(
-            Sum(
-                Case(
-                    When(transactions__type='deposit', then=F('transactions__amount')),
-                    When(transactions__type='withdraw', then=-F('transactions__amount')),
-                    output_field=DecimalField(),
-                )
-            ),
-            Value(0, output_field=DecimalField()),
-        )
-    ).order_by('name')
+    books = books.with_balance().order_by('name')
     
     # Pagination: 12 books per page
     paginator = Paginator(books, 12)
@@ -79,10 +63,11 @@ def dashboard_view(request):
         })
     
     # Regular request - render full page
-    display_name = request.user.profile.display_name
+    display_name = cached_user(request.user.pk).profile.display_name
     
     context = {
         'page_obj': page_obj,
+        'cards': fragments.book_cards(page_obj),  # cached per book version
         'display_name': display_name,
         'search_query': search_query,
     }
@@ -105,7 +90,7 @@ def add_book_view(request):
 
 @login_required
 def delete_book_view(request, book_id):
-    book = get_object_or_404(Book, id=book_id, user=request.user)
+    book = get_object_or_404(Book.objects.for_user(request.user), id=book_id)
     book.delete()
     messages.success(request, 'Book deleted successfully!')
     return redirect('dashboard')
@@ -113,10 +98,80 @@ def delete_book_view(request, book_id):
 from .models import Book, Transaction
 from decimal import Decimal
 
+TRANSACTIONS_PER_PAGE = 20
+
+
+def is_ajax(request):
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+def transactions_context(book, page_number, total_balance):
+    """
+    Context for one page of `book`'s transactions, newest first. Running
+    balances count back from `total_balance` on page 1 and start from the
+    rollups further down, so no page reads the whole book.
+    """
+    # MUST order using '-created_at' + '-id' for same-date rows!
+    paginator = Paginator(book.transactions.order_by('-created_at', '-id'), TRANSACTIONS_PER_PAGE)
+    page_obj = paginator.get_page(page_number)
+    return {
+        'book': book,
+        'page_obj': page_obj,
+        'page_range': paginator.get_elided_page_range(page_obj.number, on_each_side=2, on_ends=1),
+        'transactions_with_running': page_running_balances(
+            page_obj, book, total_balance if page_obj.number == 1 else None,
+        ),
+        'total_balance': total_balance,
+    }
+
+
+def transactions_html(book, page_number, total_balance):
+    """
+    (html, has_rows) of the transactions block for one page, cached until the
+    book changes (books/fragments.py).
+    """
+    def render():
+        context = transactions_context(book, page_number, total_balance)
+        page_obj = context['page_obj']
+        return render_to_string('books/partials/transactions.html', context), bool(page_obj), page_obj.number
+
+    return fragments.transactions_block(book, page_number, render)
+
+
+def transactions_fragment(book, page_number, total_balance, message=None, level='success'):
+    """
+    The balance header and the transactions block (rows, cards, pagination) as
+    HTML for book_detail.js to swap in, instead of rebuilding the whole page.
+    """
+    return JsonResponse({
+        'balance': render_to_string('books/partials/balance.html', {'total_balance': total_balance}),
+        'transactions': transactions_html(book, page_number, total_balance)[0],
+        'message': message,
+        'level': level,
+    })
+
+
+def transaction_saved(request, book, message):
+    """After a write: the refreshed fragment for the page's scripts, a redirect for plain form posts."""
+    if is_ajax(request):
+        # The rollups are already up to date, so the new total is one query.
+        return transactions_fragment(book, request.GET.get('page') or 1, rollups.balance_as_of(book, date.max), message)
+    messages.success(request, message)
+    return redirect('book_detail', book_id=book.id)
+
+
+def transaction_rejected(request, book, message):
+    if is_ajax(request):
+        return JsonResponse({'message': message, 'level': 'error'}, status=400)
+    messages.error(request, message)
+    return redirect('book_detail', book_id=book.id)
+
+
 @login_required
+@query_budget(7 + rollups.WRITE_QUERIES)  # an AJAX add answers with the refreshed first page
 def book_detail_view(request, book_id):
     # Get the book for the logged-in user
-    book = get_object_or_404(Book, id=book_id, user=request.user)
+    book = get_object_or_404(Book.objects.for_user(request.user).with_balance(), id=book_id)
 
     # ---------------------------
     # 1) Handle Form Submission
@@ -131,11 +186,9 @@ def book_detail_view(request, book_id):
         try:
             amount = Decimal(amount)
             if amount <= 0:
-                messages.error(request, "Amount must be positive.")
-                return redirect("book_detail", book_id=book.id)
+                return transaction_rejected(request, book, "Amount must be positive.")
         except:
-            messages.error(request, "Invalid amount.")
-            return redirect("book_detail", book_id=book.id)
+            return transaction_rejected(request, book, "Invalid amount.")
 
         # Create transaction
         Transaction.objects.create(
@@ -145,70 +198,40 @@ def book_detail_view(request, book_id):
             note=note,
             created_at=created_at
         )
-        return redirect("book_detail", book_id=book.id)
-
-    # ----------------------------------------------------------
-    # 2) Fetch all transactions (NEWEST first for display)
-    #    MUST order using '-created_at' + '-id' for same-date rows!
-    # ----------------------------------------------------------
-    transactions = Transaction.objects.filter(book=book).order_by('-created_at', '-id')
-
-    # For Total Balance (sum of all signed amounts)
-    total_balance = sum(t.sign_amount for t in transactions)
-
-    # ---------------------
-    # 3) Pagination
-    # ---------------------
-    paginator = Paginator(transactions, 20)  # 20 per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        return transaction_saved(request, book, '✅ Transaction added successfully!')
 
     # ----------------------------------------------------------
-    # 4) Running Balance Calculation
-    #    MUST calculate in TRUE chronological order
-    #    (oldest first, stable tie-break using id)
+    # 2) One page of transactions, rendered once per book version;
+    #    the total comes from the latest monthly rollup (with_balance)
     # ----------------------------------------------------------
-    ordered_oldest_first = list(
-        transactions.order_by('created_at', 'id')
-    )
+    page_number = request.GET.get('page') or 1
 
-    running_map = {}
-    balance = Decimal('0.00')
+    # Pagination links on the page fetch just the fragment
+    if is_ajax(request):
+        return transactions_fragment(book, page_number, book.total_balance)
 
-    for t in ordered_oldest_first:
-        balance += t.sign_amount
-        running_map[t.id] = balance
-
-    # Attach running balance to paginated results
-    transactions_with_running = []
-    for t in page_obj:
-        t.running_balance = running_map.get(t.id, Decimal('0.00'))
-        transactions_with_running.append(t)
-
-    # ---------------------
-    # 5) Render Template
-    # ---------------------
+    html, has_transactions = transactions_html(book, page_number, book.total_balance)
     context = {
         'book': book,
-        'page_obj': page_obj,
-        'transactions_with_running': transactions_with_running,
-        'total_balance': total_balance,
+        'total_balance': book.total_balance,
+        'transactions_html': html,
+        'has_transactions': has_transactions,
     }
-
     return render(request, 'books/book_detail.html', context)
 
 
 @login_required
+@query_budget(5 + rollups.WRITE_QUERIES)
 def add_transaction_view(request, book_id):
-    book = get_object_or_404(Book, id=book_id, user=request.user)
+    book = get_object_or_404(Book.objects.for_user(request.user), id=book_id)
 
     if request.method == 'POST':
         amount_str = request.POST.get('amount')
         trans_type = request.POST.get('type')
         note = request.POST.get('note')
         
-        # ⚠️ IMPORTANT: Use the field name that is actually in your HTML form
-        transaction_date_str = request.POST.get('date') # Assuming 'date' is correct now
+        # The book page's form posts 'created_at'; older clients sent 'date'
+        transaction_date_str = request.POST.get('created_at') or request.POST.get('date')
         
         # 1. Amount Validation
         try:
@@ -216,9 +239,8 @@ def add_transaction_view(request, book_id):
             if amount <= 0:
                 raise ValueError
         except:
-            messages.error(request, "❌ Invalid amount! Please enter a positive number.")
             # ✅ ALL ERROR REDIRECTS MUST GO TO THE DISPLAY PAGE
-            return redirect('book_detail', book_id=book.id) 
+            return transaction_rejected(request, book, "❌ Invalid amount! Please enter a positive number.")
 
         # 2. Date Validation
         transaction_date = date.today()
@@ -226,9 +248,8 @@ def add_transaction_view(request, book_id):
             try:
                 transaction_date = date.fromisoformat(transaction_date_str)
             except ValueError:
-                messages.error(request, "❌ Invalid date format.")
                 # ✅ ALL ERROR REDIRECTS MUST GO TO THE DISPLAY PAGE
-                return redirect('book_detail', book_id=book.id)
+                return transaction_rejected(request, book, "❌ Invalid date format.")
 
         # 3. Create Transaction
         Transaction.objects.create(
@@ -236,39 +257,38 @@ def add_transaction_view(request, book_id):
             amount=amount, 
             type=trans_type, 
             note=note,
-            date=transaction_date # Assuming 'date' is the correct model field name
+            created_at=transaction_date
         )
         
-        # 4. Success Message and Final Redirect
-        messages.success(request, '✅ Transaction added successfully!')
-        return redirect('book_detail', book_id=book.id)
+        # 4. Success Message and Final Redirect (or the refreshed fragment)
+        return transaction_saved(request, book, '✅ Transaction added successfully!')
     
     # Handle GET requests if this view is accessed directly
     return redirect('book_detail', book_id=book.id)
     
 
 @login_required
+@query_budget(6 + 2 * rollups.WRITE_QUERIES)  # an edit takes the old values out of the rollups, then adds the new ones
 def edit_transaction_view(request, book_id, transaction_id):
-    book = get_object_or_404(Book, id=book_id, user=request.user)
-    transaction = get_object_or_404(Transaction, id=transaction_id, book=book)
+    book = get_object_or_404(Book.objects.for_user(request.user), id=book_id)
+    transaction = get_object_or_404(book.transactions, id=transaction_id)
 
     if request.method == 'POST':
         transaction.amount = request.POST['amount']
         transaction.type = request.POST['type']
         transaction.note = request.POST['note']
         transaction.save()
-        messages.success(request, '✅ Transaction updated successfully!')
-        return redirect('book_detail', book_id=book.id)
+        return transaction_saved(request, book, '✅ Transaction updated successfully!')
 
 @login_required
+@query_budget(5 + rollups.WRITE_QUERIES)
 def delete_transaction_view(request, book_id, transaction_id):
-    book = get_object_or_404(Book, id=book_id, user=request.user)
-    transaction = get_object_or_404(Transaction, id=transaction_id, book=book)
+    book = get_object_or_404(Book.objects.for_user(request.user), id=book_id)
+    transaction = get_object_or_404(book.transactions, id=transaction_id)
 
     if request.method == 'POST':
         transaction.delete()
-        messages.success(request, '✅ Transaction deleted successfully!')
-        return redirect('book_detail', book_id=book.id)
+        return transaction_saved(request, book, '✅ Transaction deleted successfully!')
     
 
 def transaction_report_pdf(request, book_id):
@@ -276,19 +296,16 @@ def transaction_report_pdf(request, book_id):
         from django.http import HttpResponseForbidden
         return HttpResponseForbidden("You must be logged in to view this report.")
 
+    from . import reports  # ReportLab is only loaded by workers that draw PDFs
+
     # Authorize book access
-    book = get_object_or_404(Book, id=book_id, user=request.user)
+    book = get_object_or_404(Book.objects.for_user(request.user), id=book_id)
 
     start_date_str = request.GET.get('start')
     end_date_str = request.GET.get('end')
 
-    # Set Dhaka timezone for current time references
-    try:
-        import pytz
-        dhaka_tz = pytz.timezone('Asia/Dhaka')
-        now_dhaka = timezone.now().astimezone(dhaka_tz)
-    except:
-        now_dhaka = timezone.now()
+    # Dhaka time for the header, footer and file name
+    now_dhaka = reports.dhaka_now()
 
     # --- UPDATED DATE HANDLING LOGIC START ---
     
@@ -324,279 +341,43 @@ def transaction_report_pdf(request, book_id):
     # --- UPDATED DATE HANDLING LOGIC END ---
 
     # Fetch transactions for this book and the determined criteria
-    transactions_qs = Transaction.objects.filter(
-        book=book,
+    transactions_qs = book.transactions.filter(
         **transactions_filter # Apply date filter only if it exists
     ).order_by('created_at')
 
-    # Calculate running balances (oldest first)
-    running_balance = Decimal('0.00')
-    running_balances = []
-    transactions_list = list(transactions_qs)
-
-    # Variables for Total Deposit and Withdrawal
-    total_deposit = Decimal('0.00')
-    total_withdrawal = Decimal('0.00')
-    total_deposit_count = 0
-    total_withdrawal_count = 0
-
-    for t in transactions_list:
-        if t.type.lower() == "deposit":
-            running_balance += t.amount
-            total_deposit += t.amount
-            total_deposit_count += 1
-        else:
-            running_balance -= t.amount
-            total_withdrawal += t.amount
-            total_withdrawal_count += 1
-        running_balances.append(running_balance)
-
-    total_transaction_count = total_deposit_count + total_withdrawal_count
-
-    # Reverse lists for latest-first display in PDF
-    transactions_display = transactions_list[::-1]
-    running_balances_display = running_balances[::-1]
-
-    # --- Determine Final Balance and Color (Requirement 1) ---
-    total_balance_report = running_balances_display[0] if running_balances_display else Decimal('0.00')
-    
-    # Define color based on value
-    if total_balance_report >= Decimal('0.00'):
-        balance_color = "#27ae60"  # Green for positive/zero
+    # Total Deposit and Withdrawal for the period, from the daily rollups
+    if is_date_range_report:
+        totals = rollups.period_totals(book, start_date, end_date)
     else:
-        balance_color = "#e74c3c"  # Red for negative
+        totals = rollups.period_totals(book)
 
     # PDF Setup
     response = HttpResponse(content_type='application/pdf')
-    
-    # --- Filename Logic (Using the requested format) ---
-    report_timestamp = now_dhaka.strftime('%d-%m-%Y_%H%M%S')
-    # Clean the book name (e.g., "My Savings Book" -> "my_savings_book")
-    safe_book_name = book.name.replace(' ', '_').lower().replace('.', '') 
-
-    # Construct the new filename
-    filename = f"{safe_book_name}_{report_timestamp}_MyCashbook_report.pdf"
-    
-    # Set the new Content-Disposition header
+    filename = reports.report_filename(book.name, now_dhaka)
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    pdf = SimpleDocTemplate(
-        response,
-        pagesize=A4,
-        rightMargin=25,
-        leftMargin=25,
-        topMargin=50,
-        bottomMargin=30
-    )
-
-    styles = getSampleStyleSheet()
-    elements = []
-
-    # --- Custom Styles (Professional Bank Statement Style) ---
-    
-    # Professional colors
-    ACCENT_COLOR = colors.HexColor("#003366") # Navy Blue
-    TEXT_COLOR = colors.HexColor("#333333")
-    LINE_COLOR = colors.HexColor("#cccccc")
-    
-    # Logo Title Style
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=20, fontName='Helvetica-Bold', alignment=0, textColor=ACCENT_COLOR)
-    
-    # Tagline Style
-    tagline_style = ParagraphStyle('Tagline', parent=styles['Normal'], fontSize=9, fontName='Helvetica-Oblique', textColor=colors.grey, alignment=0)
-    
-    info_style = ParagraphStyle('Info', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold', textColor=TEXT_COLOR)
-    
-    # Note Color
-    note_style = ParagraphStyle('Note', parent=styles['Normal'], fontSize=9, textColor=colors.grey)
-    
-    timestamp_style = ParagraphStyle('Timestamp', parent=styles['Normal'], fontSize=8, alignment=0, textColor=colors.grey)
-    
-    # Report Title Style
-    report_header_style = ParagraphStyle('ReportHeader', parent=styles['Heading2'], fontSize=14, fontName='Helvetica-Bold', alignment=0, spaceBefore=20, spaceAfter=10, textColor=ACCENT_COLOR)
-
-    # --- 1. Logo/Title Section ---
-    
-    # Main Logo Writing in Deep Purple (Requirement 2)
-    elements.append(Paragraph("MyCashbook", title_style))
-    elements.append(Paragraph("Track Your Expense Wisely", tagline_style))
-    elements.append(Paragraph(f"<font size=8 color='#0000FF'>Website: mycashbook.codelab-by-tnv.top</font>", tagline_style))
-    elements.append(Spacer(1, 15))
-
-    # --- Report Information Section (Left: book/dates, Right: Final Balance) ---
-    
-    # Format the final balance text with the determined color
-    final_balance_para = Paragraph(
-        f"<font size=12 color='{TEXT_COLOR}'><b>Statement Balance:</b></font><br/><font size=16 color='{balance_color}'><b>{total_balance_report:.2f} TK</b></font>", 
-        ParagraphStyle('Balance', parent=styles['Normal'], alignment=2, leading=22)
-    )
-    
-    # Data for the header info table 
-    header_data = [
-        [
-            Paragraph(f"<b>Account Holder:</b> {request.user.get_full_name() or request.user.username}<br/>"
-                      f"<b>Book Name:</b> {book.name}<br/>"
-                      f"<b>Period:</b> {start_date_display} to {end_date_display}", info_style),
-            final_balance_para
-        ]
-    ]
-
-    page_width = A4[0] - 50
-    header_table = Table(header_data, colWidths=[page_width * 0.65, page_width * 0.35])
-    header_table.setStyle(TableStyle([
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LINEBELOW', (0, 0), (-1, 0), 1.5, ACCENT_COLOR),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-    ]))
-    
-    elements.append(header_table)
-    elements.append(Spacer(1, 10))
-    
-    # Statement Header
-    elements.append(Paragraph("Account Statement - Activity Detail", report_header_style))
-
-    # --- Transaction Table Data ---
-    data = [["Date", "Type", "Amount", "Running Balance", "Note"]]
 
-    for idx, t in enumerate(transactions_display):
-        amount_text = f"{t.amount:.2f}"
-        
-        # Color-coding for Amount
-        if t.type.lower() == "deposit":
-            amount_para = Paragraph(f'<font color="#27ae60"><b>+{amount_text}</b></font>', styles["Normal"])
-        else:
-            amount_para = Paragraph(f'<font color="#e74c3c"><b>-{amount_text}</b></font>', styles["Normal"])
-        
-        # Running Balance - Style for clear distinction
-        current_running_balance = running_balances_display[idx]
-        if current_running_balance >= Decimal('0.00'):
-            rb_color = "#2c3e50" # Dark grey/black for regular positive running balance
-        else:
-            rb_color = "#e74c3c" # Red for negative running balance
-            
-        running_balance_para = Paragraph(f"<font color='{rb_color}'>{current_running_balance:.2f}</font>", styles["Normal"])
-
-        data.append([
-            Paragraph(t.created_at.strftime("%d %B, %Y"), styles["Normal"]),
-            Paragraph(t.type.capitalize(), styles["Normal"]),
-            amount_para,
-            running_balance_para,
-            Paragraph(t.note or "-", note_style), # note_style now uses darker color
-        ])
-
-    # Column widths
-    col_widths = [
-        page_width * 0.18,  # Date
-        page_width * 0.15,  # Type
-        page_width * 0.15,  # Amount
-        page_width * 0.22,  # Running Balance
-        page_width * 0.30  # Note
-    ]
-
-    table = Table(data, colWidths=col_widths, repeatRows=1)
-    
-    # Professional Bank Table Style
-    table_style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), ACCENT_COLOR), # Header background
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        ('LINEBELOW', (0, 0), (-1, 0), 2, ACCENT_COLOR),
-        ('LINEBELOW', (0, 0), (-1, -1), 0.5, LINE_COLOR),
-    ])
-
-    for i in range(1, len(data)):
-        # Zebra stripping for rows
-        bg = colors.HexColor("#f4f4f8") if i % 2 == 0 else colors.white 
-        table_style.add('BACKGROUND', (0, i), (-1, i), bg)
-        table_style.add('ALIGN', (0, i), (-1, i), 'CENTER')
-        table_style.add('FONTSIZE', (0, i), (-1, i), 9)
-
-    table.setStyle(table_style)
-    elements.append(table)
-    elements.append(Spacer(1, 15))
-    
-    # --- Total Deposit and Total Withdrawal Section ---
-    
-    summary_data = [
-        [
-            Paragraph(f"<b>Total Deposits ({total_deposit_count}):</b>", info_style),
-            Paragraph(f"<font color='#27ae60'><b>{total_deposit:.2f} TK</b></font>", info_style)
-        ],
-        [
-            Paragraph(f"<b>Total Withdrawals ({total_withdrawal_count}):</b>", info_style),
-            Paragraph(f"<font color='#e74c3c'><b>{total_withdrawal:.2f} TK</b></font>", info_style)
-        ],
-        [
-            Paragraph(f"<font size=9 color='#808080'>Total Transaction Count: {total_transaction_count}</font>", info_style),
-            Paragraph("", info_style) # Empty cell for alignment
-        ]
-    ]
-    
-    summary_table = Table(summary_data, colWidths=[page_width * 0.7, page_width * 0.3])
-    summary_table.setStyle(TableStyle([
-        ('ALIGN', (1, 0), (1, 1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LINEBELOW', (0, 1), (-1, 1), 1, ACCENT_COLOR),
-        ('TOPPADDING', (0, 0), (-1, 1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 1), 8),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    elements.append(summary_table)
-
-    elements.append(Spacer(1, 12))
-    
-    # --- Footer Note (Translucent appearance simulated with grey text) ---
-    
-    footer_note_para = Paragraph(
-        "This Is A System Generated Report, No Signature is Required",
-        ParagraphStyle('FooterNote', parent=styles['Normal'], fontSize=9, alignment=1, textColor=colors.HexColor("#808080")) # Using a dark grey for 'transparency'
+    # Running balances and latest-first layout: books/reports.py
+    reports.book_statement_pdf(
+        response,
+        holder=request.user.get_full_name() or request.user.username,
+        book_name=book.name,
+        period=f"{start_date_display} to {end_date_display}",
+        transactions=list(transactions_qs.values_list(*reports.BOOK_STATEMENT_COLUMNS)),
+        totals=totals,
+        generated_at=now_dhaka,
     )
-    
-    
-    elements.append(Paragraph(
-        f"Statement generated on: {now_dhaka.strftime('%d %B, %Y at %I:%M %p')} (Dhaka Time)",
-        timestamp_style
-    ))
-
-    elements.append(footer_note_para)
-
-    # --- Page Footer Function (Meet the Developer & Page Numbers) ---
-    def add_footer(canvas, doc):
-        canvas.saveState()
-        canvas.setFont('Helvetica', 8)
-        canvas.setFillColor(colors.grey)
-        canvas.drawString(doc.leftMargin, 20, f"Page {doc.page}")
-
-        from reportlab.platypus import Paragraph
-        from reportlab.lib.styles import ParagraphStyle
-        link_style = ParagraphStyle('FooterLink', fontSize=8, alignment=2)
-        link_text = '<font color="blue"><u><a href="https://tanvir.codelab-by-tnv.top/">Meet The Developer</a></u></font>'
-        link_para = Paragraph(link_text, link_style)
-        w, h = link_para.wrap(doc.width, doc.bottomMargin)
-        link_para.drawOn(canvas, doc.leftMargin, 20)
-        canvas.restoreState()
-
-    pdf.build(elements, onFirstPage=add_footer, onLaterPages=add_footer)
-
     return response
 
+
 @login_required
+@query_budget(3)
 def validate_bid(request):
     bid = request.GET.get('bid')
     if not bid:
         return JsonResponse({'success': False, 'message': 'BID is required.'})
     
     try:
-        recipient_book = Book.objects.get(bid=bid)
+        recipient_book = book_by_bid(bid)
         return JsonResponse({
             'success': True,
             'owner_name': recipient_book.user.profile.display_name or recipient_book.user.username,
@@ -606,6 +387,7 @@ def validate_bid(request):
         return JsonResponse({'success': False, 'message': 'Invalid BID. Book not found.'})
 
 @login_required
+@query_budget(12 + 2 * rollups.WRITE_QUERIES)  # a cross-shard transfer opens a transaction on each shard
 def transfer_funds(request):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'message': 'Method not allowed.'})
@@ -622,57 +404,20 @@ def transfer_funds(request):
     except (ValueError, TypeError, InvalidOperation):
         return JsonResponse({'success': False, 'message': 'Invalid amount format.'})
     
-    sender_book = get_object_or_404(Book, id=sender_book_id, user=request.user)
+    sender_book = get_object_or_404(Book.objects.for_user(request.user), id=sender_book_id)
     
     try:
-        recipient_book = Book.objects.get(bid=recipient_bid)
+        recipient_book = book_by_bid(recipient_bid)
     except Book.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'Recipient Book not found.'})
     
-    if sender_book == recipient_book:
+    if sender_book.bid == recipient_book.bid:  # ids are only unique per shard
         return JsonResponse({'success': False, 'message': 'Cannot transfer to the same book.'})
     
-    # Calculate current balance of sender book
-    sender_balance = sender_book.transactions.all().aggregate(
-        balance=Coalesce(
-            Sum(Case(
-                When(type='deposit', then=F('amount')),
-                When(type='withdraw', then=-F('amount')),
-                output_field=DecimalField()
-            )),
-            Value(0, output_field=DecimalField())
-        )
-    )['balance']
-    
-    if sender_balance < amount:
-        return JsonResponse({'success': False, 'message': 'Insufficient balance in sender book.'})
-    
     try:
-        with db_transaction.atomic():
-            # 1. Create Withdrawal for Sender
-            sender_note = f"Transfer to BID-{recipient_bid}"
-            if user_note:
-                sender_note += f": {user_note}"
-            
-            Transaction.objects.create(
-                book=sender_book,
-                amount=amount,
-                type='withdraw',
-                note=sender_note
-            )
-            
-            # 2. Create Deposit for Recipient
-            recipient_note = f"Transfer from BID-{sender_book.bid}"
-            if user_note:
-                recipient_note += f": {user_note}"
-                
-            Transaction.objects.create(
-                book=recipient_book,
-                amount=amount,
-                type='deposit',
-                note=recipient_note
-            )
-            
+        transfers.transfer(sender_book, recipient_book, amount, user_note)
         return JsonResponse({'success': True, 'message': 'Transfer successful!'})
+    except transfers.InsufficientBalance as e:
+        return JsonResponse({'success': False, 'message': str(e)})
     except Exception as e:
         return JsonResponse({'success': False, 'message': f'Transfer failed: {str(e)}'})
\ No newline at end of file
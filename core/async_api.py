@@ -0,0 +1,77 @@
+"""
+Helpers for the async JSON endpoints (books/api/async_views.py,
+accounts/api/async_views.py).
+
+DRF views are synchronous, so these endpoints are plain Django async views.
+`api_view` gives them what DRF's JWTAuthentication + IsAuthenticated give the
+sync API: the bearer token is verified in-process and the user comes from the
+authentication cache or the async ORM, so an ASGI worker never blocks on
+authentication.
+"""
+from functools import wraps
+
+import orjson
+
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import acached_user
+
+from .renderers import ORJSONRenderer
+
+
+class AuthenticationFailed(Exception):
+    pass
+
+
+async def authenticate(request):
+    """Return the active user for the request's `Authorization: Bearer` token, or None."""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        user_id = AccessToken(header[7:])[api_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        raise AuthenticationFailed('Given token not valid for any given token type')
+
+    user = await acached_user(user_id)
+    if user is None:
+        raise AuthenticationFailed('User not found')
+    if not user.is_active:
+        raise AuthenticationFailed('User is inactive')
+    return user
+
+
+def api_view(view_func):
+    """JWT-authenticated async JSON view; answers 401 like the DRF API otherwise."""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await authenticate(request)
+        except AuthenticationFailed as e:
+            return json_response({'detail': str(e)}, status=401)
+        if user is None:
+            return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+
+    # Token auth carries no ambient credentials, so CSRF does not apply (as in DRF).
+    return csrf_exempt(wrapper)
+
+
+def json_payload(request):
+    """Request body as a dict: JSON, or form-encoded like DRF's parsers accept."""
+    if request.content_type == 'application/json':
+        try:
+            return orjson.loads(request.body or b'{}')
+        except orjson.JSONDecodeError:
+            return None
+    return request.POST
+
+
+def json_response(data, status=200):
+    """Render with orjson like the DRF API does (Decimals as exact strings)."""
+    return HttpResponse(ORJSONRenderer().render(data), content_type='application/json', status=status)
@@ -0,0 +1,94 @@
+"""
+Response compression for the API viewsets.
+
+Django's GZipMiddleware compresses every response on the site and only knows
+gzip. Mobile clients pay for the big JSON lists, so instead the viewsets that
+serve them opt in with `CompressedResponseMixin`: once DRF has rendered the
+body, it is brotli- or gzip-encoded (whichever the client prefers) when it is
+larger than `compress_min_size` bytes. Small bodies are sent as-is; the
+encoding overhead would outweigh the savings.
+"""
+import gzip
+
+import brotli
+from django.utils.cache import patch_vary_headers
+from rest_framework.response import Response
+
+# Brotli quality 5 / gzip level 6: most of the size win at a few ms per 100 KB.
+# Higher brotli levels are meant for static assets compressed once.
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+ENCODINGS = ('br', 'gzip')  # in order of preference when the client weighs them equally
+
+
+def parse_accept_encoding(accept_encoding):
+    """{coding: q} from an Accept-Encoding header; malformed q-values count as 0."""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding.lower()] = q
+    return qualities
+
+
+def choose_encoding(accept_encoding):
+    """The acceptable coding with the highest q-value (br on ties), or None; q=0 means "not acceptable"."""
+    qualities = parse_accept_encoding(accept_encoding)
+    wildcard = qualities.get('*', 0.0)
+    best, best_q = None, 0.0
+    for coding in ENCODINGS:
+        q = qualities.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress_response(request, response, min_size):
+    """Encode a rendered response in place if the client accepts it and it is worth it."""
+    if response.streaming or response.has_header('Content-Encoding'):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if len(response.content) < min_size:
+        return response
+
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding == 'br':
+        content = brotli.compress(response.content, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        content = gzip.compress(response.content, compresslevel=GZIP_LEVEL, mtime=0)
+    else:
+        return response
+    if len(content) >= len(response.content):
+        return response
+
+    response.content = content
+    response.headers['Content-Length'] = str(len(content))
+    response.headers['Content-Encoding'] = encoding
+    # The representation changed, so a strong ETag no longer matches it.
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = 'W/' + etag
+    return response
+
+
+class CompressedResponseMixin:
+    """Brotli/gzip-encode this view's DRF responses above `compress_min_size` bytes."""
+    compress_min_size = 1024
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # Non-DRF responses (the PDF report) are already compressed binaries.
+        if isinstance(response, Response):
+            min_size = self.compress_min_size
+            response.add_post_render_callback(lambda r: compress_response(request, r, min_size))
+        return response
@@ -0,0 +1,140 @@
+"""
+Database routers.
+
+ReplicaRouter sends reads to one of settings.DATABASE_REPLICAS while a request
+is marked read-only by ReplicaPinningMiddleware (safe HTTP method, user not
+pinned). Everything else — writes, unsafe requests, management commands,
+sessions, and any read after the request has written — goes to `default`.
+After a request writes, the middleware pins its user to the primary for
+REPLICA_PIN_SECONDS so they immediately see what they just saved.
+
+ShardRouter runs first: with settings.SHARD_DATABASES set, books and
+transactions are stored on their owner's shard (see books/sharding.py) and
+every other model falls through to ReplicaRouter.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+# Apps whose rows must never be read from a lagging replica.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+# Models stored on their owner's shard when sharding is enabled.
+SHARDED_MODELS = {'books.book', 'books.transaction', 'books.dailyrollup', 'books.monthlyrollup'}
+
+# The user -> shard and BID -> book directory, and the monthly statement
+# checkpoints, exist only on the primary.
+DIRECTORY_MODELS = {'books.shardassignment', 'books.bookdirectory', 'books.statementdelivery'}
+
+
+class _RequestRouting:
+    def __init__(self, use_primary):
+        self.use_primary = use_primary
+        self.wrote = False
+        self.replica = None
+
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+def start_request(use_primary):
+    return _routing.set(_RequestRouting(use_primary))
+
+
+def end_request(token):
+    """Reset routing for the request; returns True if the request wrote to the primary."""
+    state = _routing.get()
+    _routing.reset(token)
+    return bool(state and state.wrote)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas or state is None or state.use_primary or state.wrote
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or model._meta.label_lower in DIRECTORY_MODELS
+        ):
+            return PRIMARY
+        if state.replica is None:
+            # One replica per request keeps its reads consistent with each other.
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ShardRoutingError(Exception):
+    pass
+
+
+class ShardRouter:
+    def _owner_id(self, instance):
+        label = instance._meta.label_lower
+        if label == settings.AUTH_USER_MODEL.lower():
+            return instance.pk
+        if label == 'books.book':
+            return instance.user_id
+        if label in SHARDED_MODELS and type(instance).book.is_cached(instance):
+            return instance.book.user_id
+        return None
+
+    def _shard_for(self, model, hints):
+        if not settings.SHARD_DATABASES or model._meta.label_lower not in SHARDED_MODELS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None:
+            if instance._meta.label_lower in SHARDED_MODELS and instance._state.db:
+                return instance._state.db
+            owner_id = self._owner_id(instance)
+            if owner_id is not None:
+                from books.sharding import shard_for_user
+                return shard_for_user(owner_id)
+        # Falling through would silently read or write the wrong database.
+        raise ShardRoutingError(
+            f"Cannot tell which shard a {model._meta.label} query belongs to; "
+            f"scope it with .for_user(), .using() or a related manager."
+        )
+
+    def db_for_read(self, model, **hints):
+        return self._shard_for(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard_for(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not settings.SHARD_DATABASES:
+            return None
+        if obj1._meta.label_lower in SHARDED_MODELS and obj2._meta.label_lower in SHARDED_MODELS:
+            return obj1._state.db == obj2._state.db
+        # Users on `default`, their books on a shard.
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS, *settings.SHARD_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if model_name and f"{app_label}.{model_name}" in DIRECTORY_MODELS:
+            return db == PRIMARY
+        return None
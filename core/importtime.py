@@ -0,0 +1,48 @@
+"""
+Worker boot cost, measured with `python -X importtime`.
+
+Every gunicorn worker imports core.wsgi, which loads the settings, every
+installed app and (see core/wsgi.py) every view module. Libraries that only
+rare endpoints need (ReportLab for PDFs, NumPy for analytics) are imported
+inside those views instead. The tests keep LAZY_PACKAGES out of the boot; the
+benchmarks (books/tests_benchmarks.py) keep its total under IMPORT_TIME_BUDGET_MS.
+
+    python -m core.importtime    # total and the slowest packages
+"""
+import os
+import subprocess
+import sys
+from collections import Counter, namedtuple
+from pathlib import Path
+
+# Not `requests`: rest_framework.compat imports it whenever it is installed.
+LAZY_PACKAGES = ('reportlab', 'PIL', 'numpy')
+
+# total_ms: all imports in the fresh interpreter; packages: Counter of self time (ms) per top-level package.
+ImportReport = namedtuple('ImportReport', 'total_ms packages')
+
+
+def measure(target='core.wsgi'):
+    """Import `target` in a fresh interpreter (same environment) and report where the time went."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+
+    packages = Counter()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line.split(':', 1)[1].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us) / 1000
+    return ImportReport(sum(packages.values()), packages)
+
+
+if __name__ == '__main__':
+    report = measure(*sys.argv[1:2])
+    print(f"{report.total_ms:.1f} ms in total")
+    for name, ms in report.packages.most_common(15):
+        print(f"{ms:8.1f} ms  {name}")
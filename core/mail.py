@@ -0,0 +1,80 @@
+"""
+Outgoing mail: the SMTP backend with send latency metrics, and a queue that
+sends from a background thread for batch jobs.
+"""
+import logging
+import queue
+import threading
+
+from django.core.mail import get_connection
+from django.core.mail.backends import smtp
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EmailBackend(smtp.EmailBackend):
+    """SMTP backend that records send latency in the email metrics histogram."""
+
+    def send_messages(self, email_messages):
+        with metrics.EMAIL_SEND.time():
+            return super().send_messages(email_messages)
+
+
+class MailQueue:
+    """
+    Send EmailMessages from a background thread over one open connection, so
+    whoever produces them (e.g. renders PDFs) never waits on the mail server.
+
+    `put(message, key)` blocks while `maxsize` messages are waiting;
+    `take_sent()` returns the keys of the messages the server has accepted
+    since the last call. Failures are logged and their keys kept in `failed`.
+    Use as a context manager: leaving the block sends whatever is still queued.
+    """
+
+    def __init__(self, maxsize=100):
+        self.queue = queue.Queue(maxsize)
+        self.lock = threading.Lock()
+        self.sent = []
+        self.failed = []
+        self.thread = threading.Thread(target=self._run, name='mail-queue', daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.queue.put(_STOP)
+        self.thread.join()
+
+    def put(self, message, key=None):
+        self.queue.put((message, key))
+
+    def take_sent(self):
+        with self.lock:
+            sent, self.sent = self.sent, []
+        return sent
+
+    def _run(self):
+        stopped = False
+        try:
+            with get_connection() as connection:
+                while (item := self.queue.get()) is not _STOP:
+                    message, key = item
+                    try:
+                        connection.send_messages([message])
+                    except Exception:
+                        logger.exception("Could not send mail to %s", ", ".join(message.to))
+                        self.failed.append(key)
+                    else:
+                        with self.lock:
+                            self.sent.append(key)
+                stopped = True
+        except Exception:
+            # Could not reach the server: fail the rest so producers never block on a full queue.
+            logger.exception("Mail queue stopped")
+            while not stopped and (item := self.queue.get()) is not _STOP:
+                self.failed.append(item[1])
@@ -0,0 +1,81 @@
+"""
+Prometheus metrics for the whole project, exposed at /metrics.
+
+Under gunicorn every worker is a separate process, so gunicorn.conf.py sets
+PROMETHEUS_MULTIPROC_DIR: each worker then writes its samples to mmap'd files in
+that directory and the /metrics view merges them, giving correct totals across
+workers. Without the variable (runserver, tests) the in-process registry is used.
+
+Cache hit ratio = rate(mycashbook_cache_requests_total{result="hit"}) /
+                  rate(mycashbook_cache_requests_total).
+"""
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+REQUEST_LATENCY = Histogram(
+    'mycashbook_http_request_duration_seconds', "Request latency per URL name.",
+    ['view', 'method'], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    'mycashbook_http_requests', "Requests per URL name and status code.",
+    ['view', 'method', 'status'],
+)
+DB_QUERIES = Histogram(
+    'mycashbook_db_queries_per_request', "SQL queries issued per request.",
+    ['view'], buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME = Histogram(
+    'mycashbook_db_time_seconds', "Total SQL time per request.",
+    ['view'], buckets=LATENCY_BUCKETS,
+)
+EMAIL_SEND = Histogram(
+    'mycashbook_email_send_duration_seconds', "Time spent handing messages to the mail server.",
+    buckets=LATENCY_BUCKETS,
+)
+REPORT_GENERATION = Histogram(
+    'mycashbook_report_generation_seconds', "Time to generate a report.",
+    ['report'], buckets=LATENCY_BUCKETS,
+)
+BATCH_STATEMENTS = Counter(
+    'mycashbook_batch_statements', "Monthly statements handled by send_monthly_statements, by result (sent/failed).",
+    ['result'],
+)
+CACHE_REQUESTS = Counter(
+    'mycashbook_cache_requests', "Cache lookups by cache name and result (hit/miss).",
+    ['cache', 'result'],
+)
+
+
+def url_name(request):
+    """Low-cardinality label for a request: its URL name, never the raw path."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name or 'unnamed'
+
+
+def observe_request(request, response, stats):
+    view = url_name(request)
+    REQUEST_LATENCY.labels(view, request.method).observe(stats.total)
+    REQUESTS.labels(view, request.method, str(response.status_code)).inc()
+    DB_QUERIES.labels(view).observe(stats.query_count)
+    DB_TIME.labels(view).observe(stats.db_time)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def exposition():
+    """Return (body, content_type) in the Prometheus text format."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
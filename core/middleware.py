@@ -0,0 +1,198 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from . import db_routers, metrics, performance, queries
+
+logger = logging.getLogger('core.performance')
+
+
+class PerformanceMiddleware:
+    """
+    Records per request: view name, SQL query count and DB time, template render
+    time, serialization time and response size. Emits them as a Server-Timing
+    header and logs requests slower than PERF_SLOW_REQUEST_MS with their slowest queries.
+    Works for plain Django views, DRF views and async views alike.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        performance.instrument()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token = self.start(request)
+        start = time.perf_counter()
+        try:
+            with self.wrap_connections(stats):
+                response = self.get_response(request)
+        finally:
+            performance.deactivate(token)
+        stats.total = time.perf_counter() - start
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats, token = self.start(request)
+        start = time.perf_counter()
+        # Connections are per thread: wrap the ones in the thread that runs this request's ORM calls.
+        stack = await sync_to_async(self.wrap_connections)(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            performance.deactivate(token)
+        stats.total = time.perf_counter() - start
+        return self.finish(request, response, stats)
+
+    @staticmethod
+    def start(request):
+        stats = performance.RequestStats()
+        request.perf_stats = stats
+        return stats, performance.activate(stats)
+
+    @staticmethod
+    def wrap_connections(stats):
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(stats.db_wrapper))
+        return stack
+
+    def finish(self, request, response, stats):
+        if getattr(settings, 'METRICS_ENABLED', True):
+            metrics.observe_request(request, response, stats)
+        if getattr(settings, 'PERF_SERVER_TIMING', True):
+            response['Server-Timing'] = self.server_timing(stats)
+        self.log_if_slow(request, response, stats)
+        if getattr(settings, 'QUERY_INSPECTION', False):
+            queries.inspect(request, stats)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match else request.path
+
+    @staticmethod
+    def response_size(response):
+        if response.streaming:
+            return int(response.get('Content-Length', -1))
+        return len(response.content)
+
+    @staticmethod
+    def server_timing(stats):
+        parts = [f'db;dur={stats.db_time * 1000:.1f};desc="{stats.query_count} queries"']
+        if 'template' in stats.timings:
+            parts.append(f"tpl;dur={stats.timings['template'] * 1000:.1f}")
+        if 'serialize' in stats.timings:
+            parts.append(f"ser;dur={stats.timings['serialize'] * 1000:.1f}")
+        parts.append(f"total;dur={stats.total * 1000:.1f}")
+        return ', '.join(parts)
+
+    def log_if_slow(self, request, response, stats):
+        threshold_ms = getattr(settings, 'PERF_SLOW_REQUEST_MS', 500)
+        total_ms = stats.total * 1000
+        if total_ms < threshold_ms:
+            return
+
+        slowest = '\n'.join(
+            f"    {duration * 1000:.1f}ms  {sql[:500]}" for duration, sql in stats.slowest_queries()
+        )
+        logger.warning(
+            "Slow request %s %s (%s) -> %s: total=%.1fms db=%.1fms/%d queries template=%.1fms "
+            "serialize=%.1fms size=%d bytes\n  Slowest queries:\n%s",
+            request.method, request.path, self.view_name(request), response.status_code, total_ms,
+            stats.db_time * 1000, stats.query_count,
+            stats.timings.get('template', 0.0) * 1000, stats.timings.get('serialize', 0.0) * 1000,
+            self.response_size(response), slowest or '    (none)',
+        )
+
+
+class ReplicaPinningMiddleware:
+    """
+    Marks safe requests as replica-readable unless their user wrote recently.
+    Place after SessionMiddleware; the user is identified from the session or
+    from the JWT bearer token without touching the database.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        user_id = self.user_id(request)
+        token = db_routers.start_request(self.use_primary(request, user_id))
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = db_routers.end_request(token)
+        self.pin_if_wrote(request, user_id, wrote)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        user_id = self.user_id(request)
+        token = db_routers.start_request(self.use_primary(request, user_id))
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = db_routers.end_request(token)
+        self.pin_if_wrote(request, user_id, wrote)
+        return response
+
+    def use_primary(self, request, user_id):
+        return request.method not in self.SAFE_METHODS or (
+            user_id is not None and cache.get(self.pin_key(user_id)) is not None
+        )
+
+    def pin_if_wrote(self, request, user_id, wrote):
+        if wrote:
+            user = getattr(request, 'user', None)  # DRF copies the JWT user onto the request
+            if user is not None and user.is_authenticated:
+                user_id = user.pk
+            if user_id is not None:
+                cache.set(self.pin_key(user_id), 1, settings.REPLICA_PIN_SECONDS)
+
+    @staticmethod
+    def pin_key(user_id):
+        return f'replica-pin:{user_id}'
+
+    @staticmethod
+    def user_id(request):
+        user_id = request.session.get('_auth_user_id') if hasattr(request, 'session') else None
+        if user_id is not None:
+            return str(user_id)
+
+        header = request.headers.get('Authorization', '')
+        if header.startswith('Bearer '):
+            from rest_framework_simplejwt.exceptions import TokenError
+            from rest_framework_simplejwt.settings import api_settings
+            from rest_framework_simplejwt.tokens import AccessToken
+            try:
+                return str(AccessToken(header[7:])[api_settings.USER_ID_CLAIM])
+            except (TokenError, KeyError):
+                return None
+        return None
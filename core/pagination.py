@@ -0,0 +1,90 @@
+"""
+Keyset ("seek") cursor pagination for the transaction lists.
+
+Offset pagination makes the database walk and discard every row before the
+page, so page 500 of a big book costs as much as reading the whole book.
+Here the cursor carries the (created_at, id) of the last row sent, and the
+next page starts with `WHERE (created_at, id) < (cursor)`. That is a range
+scan on the (book, created_at, id) index, so every page costs the same.
+
+The cursor is opaque to clients: they follow the `next` URL.
+"""
+import base64
+import binascii
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Pages rows rendered by a `rows(queryset, fields)` fast path, newest first
+    by default. `ordering` must be (date field, 'id'), both ascending or both
+    descending, and the queryset must already be ordered that way.
+    """
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=('-created_at', '-id')):
+        self.descending = ordering[0].startswith('-')
+        self.date_field, self.id_field = (name.lstrip('-') for name in ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def encode_cursor(self, row):
+        raw = f"{row[self.date_field]}|{row[self.id_field]}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            day, pk = raw.split('|')
+            return date.fromisoformat(day), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate(self, queryset, request, render, fields):
+        """
+        Return the page of rows after the request's cursor, rendered with
+        `render(queryset, fields)`. The cursor fields are rendered too (to
+        build the next cursor) and dropped again if the client did not ask
+        for them.
+        """
+        self.request = request
+        size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            day, pk = self.decode_cursor(cursor)
+            op = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.date_field}__{op}': day}) | Q(**{self.date_field: day, f'{self.id_field}__{op}': pk})
+            )
+
+        wanted = list(fields)
+        with_keys = wanted + [name for name in (self.date_field, self.id_field) if name not in wanted]
+        rows = render(queryset[:size + 1], with_keys)
+
+        self.next_cursor = self.encode_cursor(rows[size - 1]) if len(rows) > size else None
+        rows = rows[:size]
+        if len(with_keys) > len(wanted):
+            rows = [{name: row[name] for name in wanted} for row in rows]
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, rows, **extra):
+        return Response({'next': self.get_next_link(), **extra, 'results': rows})
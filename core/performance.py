@@ -0,0 +1,119 @@
+"""
+Per-request performance bookkeeping.
+
+`RequestStats` collects SQL, template and serialization timings for the request
+currently being handled; `PerformanceMiddleware` (core/middleware.py) creates one
+per request and turns it into a Server-Timing header and slow-request logs.
+"""
+import functools
+import time
+from contextvars import ContextVar
+
+_current_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = []      # (duration in seconds, sql)
+        self.db_time = 0.0
+        self.timings = {}      # name -> seconds
+        self.total = 0.0
+        self._depth = {}
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook: time every query on the connection."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.db_time += duration
+            self.queries.append((duration, sql))
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def slowest_queries(self, limit=5):
+        return sorted(self.queries, key=lambda q: q[0], reverse=True)[:limit]
+
+
+def current_stats():
+    """Return the RequestStats of the request being handled, or None outside a request."""
+    return _current_stats.get()
+
+
+def activate(stats):
+    return _current_stats.set(stats)
+
+
+def deactivate(token):
+    _current_stats.reset(token)
+
+
+class timer:
+    """
+    Context manager adding the elapsed time to `name` on the current request.
+    Nested timers with the same name are only counted once (outermost wins).
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.stats = current_stats()
+        if self.stats is not None:
+            depth = self.stats._depth.get(self.name, 0)
+            self.stats._depth[self.name] = depth + 1
+            self.outermost = depth == 0
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.stats is not None:
+            self.stats._depth[self.name] -= 1
+            if self.outermost:
+                self.stats.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def _timed_property(prop, name):
+    @functools.wraps(prop.fget)
+    def getter(self):
+        with timer(name):
+            return prop.fget(self)
+    return property(getter, prop.fset, prop.fdel, prop.__doc__)
+
+
+def _timed_method(method, name):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with timer(name):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+_instrumented = False
+
+
+def instrument():
+    """
+    Wrap Django template rendering and DRF serialization/rendering with timers.
+    Idempotent; called once per process by PerformanceMiddleware.
+    """
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+
+    from django.template.backends.django import Template
+    Template.render = _timed_method(Template.render, 'template')
+
+    from rest_framework import serializers
+    from rest_framework.response import Response
+    serializers.Serializer.data = _timed_property(serializers.Serializer.data, 'serialize')
+    serializers.ListSerializer.data = _timed_property(serializers.ListSerializer.data, 'serialize')
+    Response.rendered_content = _timed_property(Response.rendered_content, 'serialize')
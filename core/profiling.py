@@ -0,0 +1,207 @@
+"""
+On-demand profiling for staff requests.
+
+A staff user adds `?_profile=cpu` (or `mem` to also snapshot allocations with
+tracemalloc), or sends an `X-Profile: cpu|mem` header. ProfilingMiddleware then
+samples the request thread's stack every PROFILE_SAMPLE_INTERVAL_MS from a
+background thread — cheap enough for production, unlike cProfile — and stores
+the collapsed stacks (flamegraph.pl / speedscope format) plus top allocation
+sites as JSON in PROFILE_DIR, keeping only the newest PROFILE_RING_SIZE files.
+Results are browsable at /admin/profiles/.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+MODES = ('cpu', 'mem')
+
+
+class SamplingProfiler:
+    """Collects collapsed stacks of one thread by polling sys._current_frames()."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def top_allocations(snapshot, limit=25):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    return [
+        {'site': str(stat.traceback[0]), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+
+# ─────────────────────────────────────────────
+# Ring buffer on disk
+# ─────────────────────────────────────────────
+
+def profile_dir():
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def save_profile(record):
+    path = profile_dir()
+    profile_id = f"{time.time_ns()}-{os.getpid()}"
+    record['id'] = profile_id
+    (path / f"{profile_id}.json").write_text(json.dumps(record))
+
+    files = sorted(path.glob('*.json'), reverse=True)
+    for stale in files[settings.PROFILE_RING_SIZE:]:
+        try:
+            stale.unlink()
+        except FileNotFoundError:  # pruned concurrently by another worker
+            pass
+    return profile_id
+
+
+def list_profiles():
+    records = []
+    for file in sorted(profile_dir().glob('*.json'), reverse=True):
+        try:
+            record = json.loads(file.read_text())
+        except (OSError, ValueError):
+            continue
+        record.pop('collapsed', None)
+        record.pop('allocations', None)
+        records.append(record)
+    return records
+
+
+def load_profile(profile_id):
+    file = profile_dir() / f"{Path(profile_id).name}.json"
+    if not file.exists():
+        return None
+    return json.loads(file.read_text())
+
+
+# ─────────────────────────────────────────────
+# Middleware
+# ─────────────────────────────────────────────
+
+class ProfilingMiddleware:
+    """
+    Must come after AuthenticationMiddleware (needs request.user). For async
+    views only the event-loop thread is sampled, not ORM calls run in sync threads.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = self.requested_mode(request)
+        user = getattr(request, 'user', None)
+        if mode is None or not user or not user.is_staff:
+            return self.get_response(request)
+
+        run = self.start(mode, user)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(run)
+        return self.finish(request, response, run)
+
+    async def __acall__(self, request):
+        mode = self.requested_mode(request)
+        user = await request.auser() if mode and hasattr(request, 'auser') else None
+        if mode is None or not user or not user.is_staff:
+            return await self.get_response(request)
+
+        run = self.start(mode, user)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(run)
+        return self.finish(request, response, run)
+
+    @staticmethod
+    def requested_mode(request):
+        mode = request.GET.get('_profile') or request.headers.get('X-Profile')
+        return mode if mode in MODES else None
+
+    @staticmethod
+    def start(mode, user):
+        run = {'mode': mode, 'user': user, 'started_tracing': False}
+        if mode == 'mem' and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            run['started_tracing'] = True
+        run['profiler'] = SamplingProfiler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        run['start'] = time.perf_counter()
+        run['profiler'].start()
+        return run
+
+    @staticmethod
+    def stop(run):
+        run['profiler'].stop()
+        run['duration'] = time.perf_counter() - run['start']
+        run['allocations'] = top_allocations(tracemalloc.take_snapshot()) if run['mode'] == 'mem' else []
+        if run['started_tracing']:
+            tracemalloc.stop()
+
+    @staticmethod
+    def finish(request, response, run):
+        match = getattr(request, 'resolver_match', None)
+        profiler = run['profiler']
+        profile_id = save_profile({
+            'timestamp': time.time(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else '',
+            'status': response.status_code,
+            'user': run['user'].get_username(),
+            'mode': run['mode'],
+            'duration_ms': round(run['duration'] * 1000, 1),
+            'interval_ms': settings.PROFILE_SAMPLE_INTERVAL_MS,
+            'samples': profiler.samples,
+            'collapsed': profiler.collapsed(),
+            'allocations': run['allocations'],
+        })
+        response['X-Profile-Id'] = profile_id
+        return response
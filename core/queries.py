@@ -0,0 +1,80 @@
+"""
+N+1 query detection and per-view query budgets.
+
+PerformanceMiddleware hands every request's SQL to `inspect()` when
+QUERY_INSPECTION is on (DEBUG and test runs by default):
+
+* queries with the same shape (literals and IN-lists stripped) repeated
+  QUERY_REPEAT_THRESHOLD or more times are logged as a likely N+1;
+* views can declare a budget — `@query_budget(5)` on function views, a
+  `query_budget = 5` attribute (or {'list': 3, 'retrieve': 2} per action) on
+  DRF views/viewsets. Exceeding it raises QueryBudgetExceeded when
+  QUERY_BUDGET_RAISE is on (test runs), otherwise it is logged.
+"""
+import logging
+import re
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger('core.queries')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    """Decorator for function views: fail tests if the view issues more than `limit` queries."""
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+    return decorator
+
+
+def fingerprint(sql):
+    """Normalise SQL so queries differing only in literal values compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def budget_for(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    func = match.func
+    budget = getattr(func, 'query_budget', None)
+    if budget is None and hasattr(func, 'cls'):  # DRF as_view() keeps the class on the function
+        budget = getattr(func.cls, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(func, 'actions', None) or {}
+        budget = budget.get(actions.get(request.method.lower()))
+    return budget
+
+
+def inspect(request, stats):
+    view = request.resolver_match.view_name if getattr(request, 'resolver_match', None) else request.path
+
+    threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+    repeated = Counter(fingerprint(sql) for _, sql in stats.queries)
+    for shape, count in repeated.items():
+        if count >= threshold:
+            logger.warning("Possible N+1 in %s: %d queries with the same shape: %s", view, count, shape[:300])
+
+    budget = budget_for(request)
+    if budget is not None and stats.query_count > budget:
+        message = (
+            f"{view} issued {stats.query_count} queries, budget is {budget}:\n"
+            + '\n'.join(f"  {sql[:300]}" for _, sql in stats.queries)
+        )
+        if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(message)
+        logger.error(message)
@@ -0,0 +1,29 @@
+"""
+Session engine for the web UI (SESSION_ENGINE = 'core.sessions').
+
+Sessions are read from the shared cache and written through to the database
+(Django's cached_db), so a page view normally costs no session query.
+SessionMiddleware already saves only sessions marked modified; this store also
+skips the write when a request assigned keys but left the data as it was
+loaded (logging in again on the same device, re-setting the display name).
+The loaded data is deep-copied, so a list or dict changed in place still
+counts as a change.
+"""
+import copy
+
+from django.contrib.sessions.backends import cached_db
+
+
+class SessionStore(cached_db.SessionStore):
+    _loaded = None
+
+    def load(self):
+        data = super().load()
+        self._loaded = copy.deepcopy(data)
+        return data
+
+    def save(self, must_create=False):
+        if not must_create and self._loaded is not None and self._session == self._loaded:
+            return
+        super().save(must_create)
+        self._loaded = copy.deepcopy(self._session)
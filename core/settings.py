@@ -9,9 +9,10 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
-from decouple import config
+from decouple import config, Csv
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,7 +27,12 @@ SECRET_KEY = 'django-insecure-)kl1-qv0g^qk2r#7zuix6&y(ob_ka6-8^-8k_r^xb-(6f8&$45
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = False
 
+# True while running `manage.py test`
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = ['www.codelab-by-tnv.top', 'codelab-by-tnv.top', 'www.mycashbook.codelab-by-tnv.top', "https://mycashbook.codelab-by-tnv.top/", "mycashbook.codelab-by-tnv.top"]
+# Extra hosts from the environment, e.g. EXTRA_ALLOWED_HOSTS=127.0.0.1,localhost for local load tests
+ALLOWED_HOSTS += config('EXTRA_ALLOWED_HOSTS', default='', cast=Csv())
 
 CORS_ALLOW_ALL_ORIGINS = True # Necessary for mobile/external API access
 
@@ -48,11 +54,17 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # ⚡ simplejwt with the user and profile served from a cache (accounts/authentication.py)
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # ⚡ orjson; Decimals rendered as exact strings (core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 from datetime import timedelta
@@ -62,29 +74,67 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',  # keep first: times the whole request
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # static files, before anything that touches the session or DB
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',  # staff-only, ?_profile=cpu|mem
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# ⏱ Per-request performance instrumentation (core/middleware.py)
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default=True, cast=bool)
+PERF_SLOW_REQUEST_MS = config('PERF_SLOW_REQUEST_MS', default=500, cast=int)
+
+# 🚀 Worker boot (core/importtime.py): the benchmarks (RUN_BENCHMARKS=1) fail when importing core.wsgi takes longer
+IMPORT_TIME_BUDGET_MS = config('IMPORT_TIME_BUDGET_MS', default=1000, cast=int)
+
+# 🔎 N+1 detection & per-view query budgets (core/queries.py)
+QUERY_INSPECTION = config('QUERY_INSPECTION', default=DEBUG or TESTING, cast=bool)
+QUERY_BUDGET_RAISE = config('QUERY_BUDGET_RAISE', default=TESTING, cast=bool)
+QUERY_REPEAT_THRESHOLD = config('QUERY_REPEAT_THRESHOLD', default=5, cast=int)
+
+# 🔥 Staff on-demand profiler (core/profiling.py), results at /admin/profiles/
+PROFILE_DIR = config('PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILE_RING_SIZE = config('PROFILE_RING_SIZE', default=50, cast=int)
+PROFILE_SAMPLE_INTERVAL_MS = config('PROFILE_SAMPLE_INTERVAL_MS', default=5, cast=int)
+
+# 📈 Prometheus metrics at /metrics (core/metrics.py)
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Scrape with "Authorization: Bearer <METRICS_TOKEN>"; without a token the endpoint answers 403.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Opt-in addresses allowed without the token, matched against REMOTE_ADDR. Only safe when Django
+# sees the real client address: behind nginx/a load balancer every request comes from the proxy.
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='', cast=Csv())
+
+# 🗜 Statement archives (books/archive.py): render processes per web worker
+REPORT_WORKERS = config('REPORT_WORKERS', default=2, cast=int)
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'], 
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # ⚡ Compile each template once per worker; with DEBUG on, edits are still picked up
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -120,6 +170,51 @@ DATABASES = {
     }
 }
 
+# 📚 Read replicas (core/db_routers.py): safe requests read from a replica,
+# writers are pinned to the primary for REPLICA_PIN_SECONDS afterwards.
+# Production: DATABASE_REPLICA_HOSTS=10.0.0.12,10.0.0.13 (same credentials as default).
+DATABASE_REPLICAS = []
+for _i, _host in enumerate(config('DATABASE_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    DATABASES[f'replica_{_i}'] = {**DATABASES['default'], 'HOST': _host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{_i}')
+
+# Local testing with two SQLite files (copy db.sqlite3 to db_replica.sqlite3 first):
+# DATABASES['replica_1'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db_replica.sqlite3', 'TEST': {'MIRROR': 'default'}}
+# DATABASE_REPLICAS = ['replica_1']
+
+# 🧩 Sharding (books/sharding.py): each user's books and transactions live on one of
+# SHARD_DATABASES, e.g. SHARD_DATABASES=default,shard_1. Define production shards in
+# DATABASES above; aliases left undefined become local SQLite files (handy for testing).
+# Run `migrate --database <alias>` for every shard, then `rebalance_shards` whenever the list changes.
+SHARD_DATABASES = config('SHARD_DATABASES', default='', cast=Csv())
+for _alias in SHARD_DATABASES:
+    DATABASES.setdefault(_alias, {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / f'{_alias}.sqlite3'})
+
+DATABASE_ROUTERS = ['core.db_routers.ShardRouter', 'core.db_routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# Cache — shared between workers in production (e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# CACHE_LOCATION=redis://127.0.0.1:6379/1); replica pinning relies on it.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='mycashbook'),
+    }
+}
+# A per-process cache can't tell one worker about another's writes.
+SHARED_CACHE = not CACHES['default']['BACKEND'].endswith(('LocMemCache', 'DummyCache'))
+
+# 🧱 Cached dashboard cards and book-page transaction blocks (books/fragments.py);
+# a book's copies are retired as soon as it changes, this only bounds unused ones.
+# Off (0) without a shared cache: a bump in one worker would not reach the others.
+FRAGMENT_CACHE_SECONDS = config('FRAGMENT_CACHE_SECONDS', default=60 * 60 * 24 if SHARED_CACHE else 0, cast=int)
+
+# 🔑 Authenticated users (with profile) cached per process and in the shared cache;
+# saving a user or profile drops both, other workers' copies expire after the local TTL.
+# Without a shared cache the second level is per process too, so it gets the short TTL.
+AUTH_CACHE_LOCAL_SECONDS = config('AUTH_CACHE_LOCAL_SECONDS', default=5, cast=int)
+AUTH_CACHE_SECONDS = config('AUTH_CACHE_SECONDS', default=300 if SHARED_CACHE else AUTH_CACHE_LOCAL_SECONDS, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -162,6 +257,18 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# 🗜 WhiteNoise serves STATIC_ROOT: `collectstatic` writes content-hashed copies
+# (cached for a year as immutable) plus .gz and .br versions of each.
+# Tests render templates without running collectstatic, so they use plain names.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if TESTING
+        else 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+WHITENOISE_AUTOREFRESH = DEBUG or TESTING  # look files up per request instead of indexing STATIC_ROOT at startup
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'mediafiles'
 
@@ -172,7 +279,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # 📧 Email Configuration
 # ==========================
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = 'core.mail.EmailBackend'  # SMTP + send latency metrics
 EMAIL_HOST = 'mail.codelab-by-tnv.top'
 EMAIL_PORT = 465
 EMAIL_USE_SSL = True
@@ -183,4 +290,12 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 
 SESSION_COOKIE_AGE = 86400
-SESSION_EXPIRE_AT_BROWSER_CLOSE = False
\ No newline at end of file
+SESSION_EXPIRE_AT_BROWSER_CLOSE = False
+
+# 🍪 Sessions come from the shared cache and are written through to the database only
+# when their data changed (core/sessions.py). A per-process cache would let a logout in one
+# worker go unnoticed by the others, so without a shared cache they stay in the database.
+SESSION_ENGINE = 'core.sessions' if SHARED_CACHE else 'django.contrib.sessions.backends.db'
+SESSION_SAVE_EVERY_REQUEST = False
+# Flash messages travel in a signed cookie rather than in the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
\ No newline at end of file
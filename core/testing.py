@@ -0,0 +1,23 @@
+"""
+Fixtures shared by the apps' test modules.
+"""
+from django.contrib.auth.models import User
+
+from accounts.models import Profile
+from books.models import Book
+
+PASSWORD = 'password123'
+
+
+def make_user(username, display_name=None, **fields):
+    """A user with a profile; the display name defaults to the title-cased username."""
+    fields.setdefault('password', PASSWORD)
+    user = User.objects.create_user(username=username, **fields)
+    Profile.objects.create(user=user, display_name=display_name or username.title())
+    return user
+
+
+def make_owner(username, book_name, **fields):
+    """(user, book): a user made by `make_user()` with one book."""
+    user = make_user(username, **fields)
+    return user, Book.objects.create(user=user, name=book_name)
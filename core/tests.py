@@ -0,0 +1,213 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.contrib.auth.models import User
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import authentication
+from books.models import Book, Transaction
+from core import importtime
+from core.db_routers import ReplicaRouter
+from core.middleware import ReplicaPinningMiddleware
+from core.testing import make_owner, make_user
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user, self.book = make_owner('perf', 'Perf Book', email='perf@example.com')
+        Transaction.objects.create(book=self.book, amount='50.00', type='deposit')
+
+    def test_server_timing_on_html_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(f'/book/{self.book.id}/')
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_server_timing_on_api_view(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/v1/books/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ser;dur=', response['Server-Timing'])
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0)
+    def test_slow_request_is_logged_with_queries(self):
+        self.client.force_login(self.user)
+        with self.assertLogs('core.performance', level='WARNING') as logs:
+            self.client.get('/')
+        self.assertIn('Slow request GET / (dashboard)', logs.output[0])
+        self.assertIn('books_book', logs.output[0])
+
+
+@override_settings(METRICS_TOKEN='s3cret')
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.user = make_user('metrics', email='m@example.com')
+
+    def scrape(self, **extra):
+        return self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret', **extra)
+
+    def test_request_latency_is_exposed_per_url_name(self):
+        self.client.force_login(self.user)
+        self.client.get('/')
+        response = self.scrape()
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('mycashbook_http_request_duration_seconds_bucket{le="0.005",method="GET",view="dashboard"}', body)
+        self.assertIn('mycashbook_db_queries_per_request_count{view="dashboard"}', body)
+
+    def test_metrics_with_token(self):
+        self.assertEqual(self.scrape(REMOTE_ADDR='203.0.113.9').status_code, 200)
+
+    def test_metrics_are_not_public(self):
+        for headers in (
+            {'REMOTE_ADDR': '203.0.113.9'},
+            {'REMOTE_ADDR': '203.0.113.9', 'HTTP_AUTHORIZATION': 'Bearer wrong'},
+            # behind a reverse proxy on the same host every request arrives from loopback
+            {'REMOTE_ADDR': '127.0.0.1', 'HTTP_X_FORWARDED_FOR': '203.0.113.9'},
+        ):
+            self.assertEqual(self.client.get('/metrics', **headers).status_code, 403, headers)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_are_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_allowed_ips_are_opt_in(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 403)
+
+    def cache_requests(self):
+        """(cache, result) -> count, scraped from /metrics."""
+        body = self.scrape().content.decode()
+        return {
+            (sample.labels['cache'], sample.labels['result']): sample.value
+            for family in text_string_to_metric_families(body) if family.name == 'mycashbook_cache_requests'
+            for sample in family.samples if sample.name == 'mycashbook_cache_requests_total'
+        }
+
+    @override_settings(FRAGMENT_CACHE_SECONDS=3600)
+    def test_cache_hits_and_misses_are_counted(self):
+        cache.clear()
+        Book.objects.create(user=self.user, name='Metrics Book')
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.client.force_login(self.user)
+
+        def counted(requests):
+            before = self.cache_requests()
+            for request in requests:
+                request()
+            after = self.cache_requests()
+            return {key: after[key] - before.get(key, 0) for key in after}
+
+        counts = counted([lambda: api.get('/api/v1/auth/profile/')] * 2)  # miss in both levels, then a local hit
+        self.assertEqual(counts[('auth_local', 'miss')], 1)
+        self.assertEqual(counts[('auth_local', 'hit')], 1)
+        self.assertEqual(counts[('auth', 'miss')], 1)
+        self.assertEqual(counts.get(('auth', 'hit'), 0), 0)
+        authentication._local.clear()  # as in another worker
+        counts = counted([lambda: api.get('/api/v1/auth/profile/')])
+        self.assertEqual(counts[('auth', 'hit')], 1)
+
+        counts = counted([lambda: self.client.get('/')] * 2)  # the card is rendered, then read back
+        self.assertEqual(counts[('fragments', 'miss')], 1)
+        self.assertEqual(counts[('fragments', 'hit')], 1)
+
+
+class StaffProfilingTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings_override = override_settings(PROFILE_DIR=self.tmp.name, PROFILE_RING_SIZE=2)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.staff, self.book = make_owner('staff', 'Staff Book', is_staff=True)
+        Transaction.objects.create(book=self.book, amount='10.00', type='deposit')
+
+    def test_staff_request_is_profiled_and_listed(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(f'/book/{self.book.id}/?_profile=mem')
+        profile_id = response['X-Profile-Id']
+
+        listing = self.client.get('/admin/profiles/')
+        self.assertContains(listing, profile_id)
+        detail = self.client.get(f'/admin/profiles/{profile_id}/')
+        self.assertContains(detail, 'Top allocation sites')
+        collapsed = self.client.get(f'/admin/profiles/{profile_id}/collapsed/')
+        self.assertEqual(collapsed.status_code, 200)
+
+    def test_ring_is_bounded(self):
+        self.client.force_login(self.staff)
+        for _ in range(4):
+            self.client.get('/?_profile=cpu')
+        self.assertEqual(len(os.listdir(self.tmp.name)), 2)
+
+    def test_non_staff_is_not_profiled(self):
+        user = make_user('plain')
+        self.client.force_login(user)
+        response = self.client.get('/?_profile=cpu')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+class WorkerBootTests(TestCase):
+    """A web worker imports no report or analytics libraries (core/importtime.py); the time budget is a benchmark."""
+
+    def test_lazy_packages_stay_out_of_the_boot(self):
+        report = importtime.measure('core.wsgi')
+        self.assertFalse(set(importtime.LAZY_PACKAGES) & set(report.packages), report.packages.most_common(10))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.user = User.objects.create_user(username='reader', password='password123')
+
+    def run_request(self, request, user=None, model=Transaction, write=False):
+        """Send `request` through the middleware; report where reads inside the view are routed."""
+        seen = {}
+
+        def view(req):
+            if write:
+                self.router.db_for_write(model)
+                seen['after_write'] = self.router.db_for_read(model)
+            seen['read'] = self.router.db_for_read(model)
+            return HttpResponse()
+
+        user = user or self.user
+        request.session = {'_auth_user_id': str(user.pk)}
+        request.user = user
+        ReplicaPinningMiddleware(view)(request)
+        return seen
+
+    def test_safe_request_reads_from_replica(self):
+        self.assertEqual(self.run_request(self.factory.get('/'))['read'], 'replica_1')
+
+    def test_unsafe_request_reads_from_primary(self):
+        self.assertEqual(self.run_request(self.factory.post('/'))['read'], 'default')
+
+    def test_user_is_pinned_to_primary_after_writing(self):
+        seen = self.run_request(self.factory.post('/api/v1/transfer/'), write=True)
+        self.assertEqual(seen['after_write'], 'default')
+        self.assertEqual(self.run_request(self.factory.get('/'))['read'], 'default')
+
+        other = User.objects.create_user(username='other-reader', password='password123')
+        self.assertEqual(self.run_request(self.factory.get('/'), user=other)['read'], 'replica_1')
+
+    def test_sessions_and_background_work_use_primary(self):
+        from django.contrib.sessions.models import Session
+        self.assertEqual(self.router.db_for_read(Transaction), 'default')  # outside a request
+        self.assertEqual(self.run_request(self.factory.get('/'), model=Session)['read'], 'default')
@@ -1,10 +1,17 @@
 from django.contrib import admin
 from django.urls import path, include
+from core.views import metrics_view, profile_list_view, profile_detail_view, profile_collapsed_view
 
 urlpatterns = [
+    path('admin/profiles/', profile_list_view, name='profile_list'),
+    path('admin/profiles/<str:profile_id>/', profile_detail_view, name='profile_detail'),
+    path('admin/profiles/<str:profile_id>/collapsed/', profile_collapsed_view, name='profile_collapsed'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('accounts/', include('accounts.urls')),
     path('api/v1/auth/', include('accounts.api.urls')),
+    path('api/v1/async/auth/', include('accounts.api.async_urls')),
+    path('api/v1/async/', include('books.api.async_urls')),
     path('api/v1/', include('books.api.urls')),
     path('', include('books.urls')),
 ]
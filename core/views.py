@@ -0,0 +1,77 @@
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import metrics, profiling
+
+
+def metrics_view(request):
+    """
+    GET /metrics — Prometheus scrape endpoint.
+    Allowed with `Authorization: Bearer <METRICS_TOKEN>`, or from METRICS_ALLOWED_IPS
+    (empty by default: behind a proxy REMOTE_ADDR is the proxy, not the scraper).
+    """
+    token = settings.METRICS_TOKEN
+    auth = request.headers.get('Authorization', '')
+    if not (
+        (token and constant_time_compare(auth, f'Bearer {token}'))
+        or request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    ):
+        return HttpResponseForbidden("Metrics are not public.")
+
+    body, content_type = metrics.exposition()
+    return HttpResponse(body, content_type=content_type)
+
+
+# ─────────────────────────────────────────────
+# Staff profiles (see core/profiling.py)
+# ─────────────────────────────────────────────
+
+@staff_member_required
+def profile_list_view(request):
+    return render(request, 'admin/profiles/list.html', {
+        'title': 'Request profiles',
+        'profiles': profiling.list_profiles(),
+        'ring_size': settings.PROFILE_RING_SIZE,
+    })
+
+
+@staff_member_required
+def profile_detail_view(request, profile_id):
+    record = profiling.load_profile(profile_id)
+    if record is None:
+        raise Http404("Profile not found (it may have rotated out of the ring).")
+
+    # Self time per function = samples where it is the leaf frame
+    stacks = []
+    leaf_counts = Counter()
+    for line in record['collapsed'].splitlines():
+        stack, _, count = line.rpartition(' ')
+        stacks.append({'frames': stack.split(';'), 'count': int(count)})
+        leaf_counts[stack.rsplit(';', 1)[-1]] += int(count)
+
+    samples = record['samples'] or 1
+    return render(request, 'admin/profiles/detail.html', {
+        'title': f"Profile of {record['path']}",
+        'profile': record,
+        'hot_functions': [
+            {'frame': frame, 'count': count, 'percent': round(100 * count / samples, 1)}
+            for frame, count in leaf_counts.most_common(25)
+        ],
+        'top_stacks': stacks[:15],
+    })
+
+
+@staff_member_required
+def profile_collapsed_view(request, profile_id):
+    """Raw collapsed stacks — load into speedscope.app or flamegraph.pl for a flame graph."""
+    record = profiling.load_profile(profile_id)
+    if record is None:
+        raise Http404("Profile not found.")
+    response = HttpResponse(record['collapsed'], content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="profile-{record["id"]}.collapsed.txt"'
+    return response
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Import the URLconf and with it every view module now rather than on the first
+# request. With gunicorn's preload_app (gunicorn.conf.py) that happens once in
+# the master, and the forked workers share those pages instead of each loading
+# its own copy.
+from django.urls import get_resolver  # noqa: E402
+
+get_resolver().url_patterns
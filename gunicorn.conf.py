@@ -0,0 +1,37 @@
+"""
+Gunicorn settings, loaded automatically by `gunicorn core.wsgi` (see Procfile).
+"""
+import gc
+import os
+import shutil
+import tempfile
+
+# Prometheus: each worker writes metrics to mmap files here; /metrics merges them.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'mycashbook-metrics'))
+# preload_app imports core.metrics before on_starting runs, so the directory must already exist.
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+# Import the app (settings, models and, via core/wsgi.py, every view module) once
+# in the master: forked workers share those pages copy-on-write instead of each
+# holding its own copy, and start without importing anything. New code then needs
+# a full restart; a HUP only replaces the workers.
+preload_app = True
+
+
+def on_starting(server):
+    # Start each master with an empty store so counters from a previous run do not leak in.
+    # (Forked workers reopen their own files, so removing the master's is harmless.)
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    # The app is loaded: move its objects out of the garbage collector's reach so
+    # collections in the workers never write to (and so un-share) those pages.
+    gc.freeze()
@@ -0,0 +1,41 @@
+// --- Message Animation Script (for Django Messages) ---
+const messageCards = document.querySelectorAll('.message-card');
+
+if (messageCards.length > 0) {
+    messageCards.forEach((msg, index) => {
+        // 1. Show the message with a slight delay
+        setTimeout(() => {
+            msg.classList.add('show');
+        }, 100 + (index * 200));
+
+        // 2. Hide and remove the message after the display time
+        setTimeout(() => {
+            msg.style.opacity = '0';
+            msg.style.transform = 'translateX(40px)';
+            setTimeout(() => msg.remove(), 600);
+        }, 5000 + (index * 200));
+    });
+}
+
+// --- Button Loading/Squish Animation Script (Optional: For AJAX/Form Submission Delay) ---
+const saveButton = document.querySelector('.save-button');
+const form = document.getElementById('addBookForm');
+
+saveButton.addEventListener('click', function (e) {
+    // Only proceed if the form is valid (browser validation)
+    if (form.checkValidity()) {
+        // Prevent immediate submission to show the press animation
+        e.preventDefault();
+
+        // Add the squish/press effect
+        this.classList.add('submitting');
+        this.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Saving...';
+
+        // Revert back to the original style after a short delay (simulating network time)
+        setTimeout(() => {
+            // If you were using AJAX, you would submit the form data here.
+            // Since this is a standard Django form, we submit it directly after the delay.
+            form.submit();
+        }, 800);
+    }
+});
@@ -0,0 +1,12 @@
+document.addEventListener('DOMContentLoaded', function () {
+    const addModal = document.getElementById('addModal');
+    const openModal = document.getElementById('openModal');
+    const addClose = document.getElementById('addClose');
+
+    openModal.onclick = () => addModal.style.display = 'block';
+    addClose.onclick = () => addModal.style.display = 'none';
+
+    window.onclick = (event) => {
+        if (event.target == addModal) addModal.style.display = 'none';
+    }
+});
@@ -0,0 +1,276 @@
+const themeToggle = document.getElementById('themeToggle');
+themeToggle.addEventListener('click', () => {
+    const isDark = document.body.classList.toggle('dark-mode');
+    document.documentElement.classList.toggle('dark-mode');
+    localStorage.setItem('theme', isDark ? 'dark' : 'light');
+});
+
+// Simulate Content Loading for Skeleton Effect
+window.addEventListener('DOMContentLoaded', () => {
+    const loader = document.getElementById('content-loader');
+    const mainContent = document.getElementById('main-content');
+
+    if (loader && mainContent) {
+        setTimeout(() => {
+            loader.style.display = 'none';
+            mainContent.style.display = 'block';
+            mainContent.classList.add('fade-in');
+        }, 800); // 800ms of premium looking skeleton loading
+    }
+});
+
+const modals = {
+    add: document.getElementById('addModal'),
+    edit: document.getElementById('editModal'),
+    delete: document.getElementById('deleteModal'),
+    report: document.getElementById('reportModal'),
+    transfer: document.getElementById('transferModal') // Add transfer modal to the list
+};
+
+// Transfer Modal Functions
+function openTransferModal() {
+    modals.transfer.classList.add('show');
+    document.getElementById('senderBookName').textContent = BOOK.name;
+    goToStep(1);
+}
+
+document.getElementById('closeTransferModal').onclick = () => {
+    modals.transfer.classList.remove('show');
+};
+
+function goToStep(step) {
+    document.querySelectorAll('.transfer-step').forEach(s => s.classList.remove('active'));
+    document.getElementById('transferStep' + step).classList.add('active');
+}
+
+// BID Validation Logic
+const validateBidBtn = document.getElementById('validateBidBtn');
+const recipientBidInput = document.getElementById('recipientBidInput');
+validateBidBtn.addEventListener('click', function () {
+    const bid = recipientBidInput.value.trim();
+    if (!bid) {
+        alert("Please enter a valid BID");
+        return;
+    }
+    // Add loading effect
+    this.innerHTML = 'Verifying... <i class="fas fa-spinner fa-spin" style="margin-left:5px;"></i>';
+    this.disabled = true;
+
+    fetch(`/validate-bid/?bid=${bid}`)
+        .then(response => response.json())
+        .then(data => {
+            this.innerHTML = 'Next: Verify Recipient <i class="fas fa-search" style="margin-left:5px;"></i>';
+            this.disabled = false;
+
+            if (data.success) {
+                document.getElementById('recipientOwnerName').textContent = data.owner_name;
+                document.getElementById('recipientBookName').textContent = data.book_name;
+                goToStep(2);
+            } else {
+                alert(data.message || "Invalid BID");
+            }
+        })
+        .catch(error => {
+            this.innerHTML = 'Next: Verify Recipient <i class="fas fa-search" style="margin-left:5px;"></i>';
+            this.disabled = false;
+            alert("An error occurred verifying the BID.");
+            console.error(error);
+        });
+});
+
+// Execute Transfer Logic
+const executeTransferBtn = document.getElementById('executeTransferBtn');
+executeTransferBtn.addEventListener('click', function () {
+    const amount = document.getElementById('transferAmount').value;
+    const note = document.getElementById('transferNote').value;
+    const recipientBid = recipientBidInput.value.trim();
+    const senderBookId = BOOK.id;
+
+    if (!amount || amount <= 0) {
+        alert("Please enter a valid amount.");
+        return;
+    }
+
+    this.innerHTML = 'Sending... <i class="fas fa-spinner fa-spin" style="margin-left:5px;"></i>';
+    this.disabled = true;
+
+    const formData = new FormData();
+    formData.append('sender_book_id', senderBookId);
+    formData.append('recipient_bid', recipientBid);
+    formData.append('amount', amount);
+    formData.append('note', note);
+    formData.append('csrfmiddlewaretoken', BOOK.csrfToken);
+
+    fetch(BOOK.transferUrl, {
+        method: 'POST',
+        body: formData
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                goToStep('Loading'); // Show soothing animation
+
+                setTimeout(() => {
+                    this.innerHTML = 'Confirm & Send <i class="fas fa-check-circle" style="margin-left:5px;"></i>';
+                    this.disabled = false;
+                    document.getElementById('transferSuccessMsg').textContent = `Successfully sent ${parseFloat(amount).toFixed(2)} TK to ${document.getElementById('recipientOwnerName').textContent}`;
+                    goToStep(3);
+                }, 1200); // 1.2s of soothing animation
+            } else {
+                this.innerHTML = 'Confirm & Send <i class="fas fa-check-circle" style="margin-left:5px;"></i>';
+                this.disabled = false;
+                alert(data.message || "Transfer failed.");
+            }
+        })
+        .catch(error => {
+            this.innerHTML = 'Confirm & Send <i class="fas fa-check-circle" style="margin-left:5px;"></i>';
+            this.disabled = false;
+            alert("An error occurred executing the transfer.");
+            console.error(error);
+        });
+});
+
+// Open/Close modals
+const modalButtons = {
+    add: document.getElementById('addBtn'),
+    report: document.getElementById('reportBtn')
+};
+
+modalButtons.add.onclick = () => modals.add.classList.add('show');
+document.getElementById('addClose').onclick = () => modals.add.classList.remove('show');
+
+modalButtons.report.onclick = () => modals.report.classList.add('show');
+document.getElementById('reportClose').onclick = () => modals.report.classList.remove('show');
+
+// Close when clicking outside the modal
+window.onclick = function (e) {
+    Object.values(modals).forEach(m => {
+        if (e.target == m) m.classList.remove('show');
+    });
+};
+
+// Edit/Delete buttons live inside #main-content, which is swapped after every
+// change, so listen on the container instead of on each button.
+const mainContent = document.getElementById('main-content');
+const editModal = modals.edit;
+const editForm = document.getElementById('editForm');
+const deleteModal = modals.delete;
+const deleteForm = document.getElementById('deleteForm');
+
+mainContent.addEventListener('click', (e) => {
+    const editBtn = e.target.closest('.editBtn');
+    if (editBtn) {
+        // Set form action URL dynamically
+        editForm.action = `/book/${BOOK.id}/edit-transaction/${editBtn.dataset.id}/`;
+
+        // Populate form fields
+        document.getElementById('editAmount').value = parseFloat(editBtn.dataset.amount).toFixed(2);
+        document.getElementById('editType').value = editBtn.dataset.type;
+        document.getElementById('editNote').value = editBtn.dataset.note || ''; // Use empty string if note is undefined
+
+        editModal.classList.add('show');
+        return;
+    }
+
+    const deleteBtn = e.target.closest('.deleteBtn');
+    if (deleteBtn) {
+        // Set form action URL dynamically
+        deleteForm.action = `/book/${BOOK.id}/delete-transaction/${deleteBtn.dataset.id}/`;
+        deleteModal.classList.add('show');
+        return;
+    }
+
+    // Pagination: fetch just the rows for the new page
+    const pageLink = e.target.closest('.pagination a');
+    if (pageLink) {
+        e.preventDefault();
+        loadFragment(pageLink.href).then(() => history.pushState(null, '', pageLink.href));
+    }
+});
+document.getElementById('editClose').onclick = () => editModal.classList.remove('show');
+document.getElementById('deleteClose').onclick = () => deleteModal.classList.remove('show');
+document.getElementById('cancelDelete').onclick = () => deleteModal.classList.remove('show');
+
+// NOTE: The duplicated DOMContentLoaded block at the end of the original script 
+// has been removed as it was redundant and interfered with the modal closing logic.
+
+// --- Partial updates ---
+// The views answer requests marked X-Requested-With with JSON holding the new
+// balance header and transactions block, so a change doesn't reload the page.
+function applyFragment(data) {
+    document.getElementById('balance').outerHTML = data.balance;
+    mainContent.innerHTML = data.transactions;
+    mainContent.style.display = 'block';
+    if (data.message) showMessage(data.message, data.level);
+}
+
+function loadFragment(url) {
+    return fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+        .then(response => response.json())
+        .then(applyFragment);
+}
+
+window.addEventListener('popstate', () => loadFragment(location.href));
+
+[[document.getElementById('addForm'), modals.add], [editForm, editModal], [deleteForm, deleteModal]].forEach(([form, modal]) => {
+    form.addEventListener('submit', (e) => {
+        e.preventDefault();
+        const submitBtn = form.querySelector('button[type="submit"]');
+        submitBtn.disabled = true;
+
+        // Stay on the page being viewed
+        const url = new URL(form.action || location.href, location.href);
+        url.search = location.search;
+
+        fetch(url, {
+            method: 'POST',
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+            body: new FormData(form)
+        })
+            .then(response => response.json())
+            .then(data => {
+                submitBtn.disabled = false;
+                if (data.level === 'error') {
+                    showMessage(data.message, 'error');
+                    return;
+                }
+                modal.classList.remove('show');
+                form.reset();
+                applyFragment(data);
+            })
+            .catch(error => {
+                submitBtn.disabled = false;
+                showMessage('Something went wrong. Please try again.', 'error');
+                console.error(error);
+            });
+    });
+});
+
+// --- Message Animation Script ---
+const messageContainer = document.querySelector('.message-container');
+
+function animateMessage(msg, index) {
+    // 1. Show the message with a slight delay
+    setTimeout(() => {
+        msg.classList.add('show');
+    }, 100 + (index * 200));
+
+    // 2. Hide and remove the message after the display time
+    setTimeout(() => {
+        msg.style.opacity = '0';
+        msg.style.transform = 'translateX(40px)';
+        setTimeout(() => msg.remove(), 600);
+    }, 5000 + (index * 200));
+}
+
+function showMessage(text, level) {
+    const msg = document.createElement('div');
+    msg.className = `message-card ${level === 'error' ? 'error' : 'success'}`;
+    const p = document.createElement('p');
+    p.textContent = text;
+    msg.appendChild(p);
+    messageContainer.appendChild(msg);
+    animateMessage(msg, 0);
+}
+
+messageContainer.querySelectorAll('.message-card').forEach(animateMessage);
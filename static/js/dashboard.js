@@ -0,0 +1,324 @@
+// --- Global Variables ---
+const deleteModal = document.getElementById('deleteModal');
+const deleteForm = document.getElementById('deleteForm');
+const addBookModal = document.getElementById('addBookModal');
+const addBookBtn = document.getElementById('addBookBtn');
+const emptyAddBookLink = document.getElementById('emptyAddBookLink');
+const searchInput = document.getElementById('searchInput');
+const clearSearch = document.getElementById('clearSearch');
+const loadingSpinner = document.getElementById('loadingSpinner');
+const searchIcon = document.getElementById('searchIcon');
+const themeToggle = document.getElementById('themeToggle');
+
+// --- Theme Toggle Logic ---
+themeToggle.addEventListener('click', () => {
+    const isDark = document.body.classList.toggle('dark-mode');
+    document.documentElement.classList.toggle('dark-mode');
+    localStorage.setItem('theme', isDark ? 'dark' : 'light');
+});
+
+// --- Skeleton Loading Reveal ---
+window.addEventListener('DOMContentLoaded', () => {
+    const loader = document.getElementById('content-loader');
+    const mainContent = document.getElementById('booksContainer');
+
+    if (loader && mainContent) {
+        try {
+            // Force reveal after 800ms
+            setTimeout(() => {
+                loader.style.display = 'none';
+                mainContent.style.display = 'block';
+                mainContent.classList.add('fade-in');
+            }, 800);
+        } catch (e) {
+            console.error("Initialization error:", e);
+            loader.style.display = 'none';
+            mainContent.style.display = 'block';
+        }
+    }
+});
+
+let currentPage = DASHBOARD.page;
+let searchTimeout;
+
+// --- AJAX Search Function ---
+function performSearch(page = 1) {
+    const searchQuery = searchInput.value.trim();
+
+    // Show loading state
+    loadingSpinner.classList.add('show');
+    searchIcon.style.display = 'none';
+
+    // Build URL with parameters
+    const url = new URL(window.location.origin + DASHBOARD.url);
+    if (searchQuery) {
+        url.searchParams.set('search', searchQuery);
+    }
+    url.searchParams.set('page', page);
+
+    // Make AJAX request
+    fetch(url, {
+        method: 'GET',
+        headers: {
+            'X-Requested-With': 'XMLHttpRequest',
+            'Content-Type': 'application/json',
+        }
+    })
+        .then(response => response.json())
+        .then(data => {
+            updateBooksGrid(data);
+            updatePagination(data);
+            currentPage = data.current_page;
+
+            // Hide loading state
+            loadingSpinner.classList.remove('show');
+            searchIcon.style.display = 'block';
+        })
+        .catch(error => {
+            console.error('Search error:', error);
+            loadingSpinner.classList.remove('show');
+            searchIcon.style.display = 'block';
+        });
+}
+
+// --- Update Books Grid ---
+function updateBooksGrid(data) {
+    const booksGrid = document.getElementById('booksGrid');
+
+    if (data.books.length === 0) {
+        document.getElementById('booksContainer').innerHTML = `
+        <div class="empty-state">
+            <i class="fas fa-box-open fa-3x" style="color:#e0e0e0; margin-bottom: 15px;"></i>
+            <p>No books found. Try a different search or <a href="#" id="emptyAddBookLink" style="text-decoration: underline;">create a new book</a>!</p>
+        </div>
+    `;
+        // Re-attach event listener
+        const newEmptyLink = document.getElementById('emptyAddBookLink');
+        if (newEmptyLink) {
+            newEmptyLink.addEventListener('click', (e) => {
+                e.preventDefault();
+                openAddBookModal();
+            });
+        }
+        return;
+    }
+
+    let booksHTML = '';
+    data.books.forEach((book, index) => {
+        booksHTML += `
+        <div class="book-card" style="animation-delay: ${index * 100}ms;">
+            <h3><i class="fas fa-book-open"></i> ${escapeHtml(book.name)}</h3>
+            <div class="bid-badge">BID: ${book.bid}</div>
+            <p>${escapeHtml(book.description)}</p>
+
+            <!-- Balance Display -->
+            <div style="margin-bottom: 15px; font-weight: 700; font-size: 16px;">
+                Balance: 
+                <span style="color: ${parseFloat(book.total_balance) >= 0 ? '#27ae60' : '#e74c3c'};">
+                    ${parseFloat(book.total_balance || 0).toFixed(2)} TK
+                </span>
+            </div>
+
+            <div class="book-actions" style="flex-wrap: wrap;">
+                <a href="/book/${book.id}/" class="view-btn">
+                    <i class="fas fa-eye"></i> View
+                </a>
+                <button class="action-btn delete-btn" onclick="openDeleteModal(${book.id})" style="padding: 10px 16px; font-size: 14px; box-shadow: none;">
+                    <i class="fas fa-trash-alt"></i> Delete
+                </button>
+            </div>
+        </div>
+    `;
+    });
+
+    booksGrid.innerHTML = booksHTML;
+}
+
+// --- Update Pagination ---
+function updatePagination(data) {
+    const paginationContainer = document.getElementById('paginationContainer');
+
+    if (data.total_pages <= 1) {
+        paginationContainer.innerHTML = '';
+        return;
+    }
+
+    let paginationHTML = '<div class="pagination-container">';
+
+    // First and Previous buttons
+    if (data.has_previous) {
+        paginationHTML += `
+        <a href="#" class="pagination-btn" data-page="1">
+            <i class="fas fa-angle-double-left"></i> First
+        </a>
+        <a href="#" class="pagination-btn" data-page="${data.previous_page}">
+            <i class="fas fa-angle-left"></i> Previous
+        </a>
+    `;
+    } else {
+        paginationHTML += `
+        <span class="pagination-btn disabled">
+            <i class="fas fa-angle-double-left"></i> First
+        </span>
+        <span class="pagination-btn disabled">
+            <i class="fas fa-angle-left"></i> Previous
+        </span>
+    `;
+    }
+
+    // Page numbers
+    paginationHTML += '<div class="page-numbers">';
+    data.page_range.forEach(num => {
+        if (num === data.current_page) {
+            paginationHTML += `<span class="page-number active">${num}</span>`;
+        } else if (num > data.current_page - 3 && num < data.current_page + 3) {
+            paginationHTML += `<a href="#" class="page-number" data-page="${num}">${num}</a>`;
+        }
+    });
+    paginationHTML += '</div>';
+
+    // Page info
+    paginationHTML += `<span class="pagination-info">Page ${data.current_page} of ${data.total_pages}</span>`;
+
+    // Next and Last buttons
+    if (data.has_next) {
+        paginationHTML += `
+        <a href="#" class="pagination-btn" data-page="${data.next_page}">
+            Next <i class="fas fa-angle-right"></i>
+        </a>
+        <a href="#" class="pagination-btn" data-page="${data.total_pages}">
+            Last <i class="fas fa-angle-double-right"></i>
+        </a>
+    `;
+    } else {
+        paginationHTML += `
+        <span class="pagination-btn disabled">
+            Next <i class="fas fa-angle-right"></i>
+        </span>
+        <span class="pagination-btn disabled">
+            Last <i class="fas fa-angle-double-right"></i>
+        </span>
+    `;
+    }
+
+    paginationHTML += '</div>';
+    paginationContainer.innerHTML = paginationHTML;
+
+    // Attach event listeners to pagination buttons
+    attachPaginationListeners();
+}
+
+// --- Attach Pagination Event Listeners ---
+function attachPaginationListeners() {
+    document.querySelectorAll('[data-page]').forEach(btn => {
+        btn.addEventListener('click', (e) => {
+            e.preventDefault();
+            const page = parseInt(btn.getAttribute('data-page'));
+            performSearch(page);
+            window.scrollTo({ top: 0, behavior: 'smooth' });
+        });
+    });
+}
+
+// --- Escape HTML ---
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+// --- Search Input Event Listener ---
+searchInput.addEventListener('input', function () {
+    toggleClearButton();
+    clearTimeout(searchTimeout);
+    searchTimeout = setTimeout(() => {
+        performSearch(1); // Reset to page 1 on new search
+    }, 500); // 500ms debounce
+});
+
+// --- Clear Search ---
+clearSearch.addEventListener('click', function () {
+    searchInput.value = '';
+    toggleClearButton();
+    performSearch(1);
+});
+
+// --- Toggle Clear Button ---
+function toggleClearButton() {
+    if (searchInput.value.trim().length > 0) {
+        clearSearch.classList.add('show');
+    } else {
+        clearSearch.classList.remove('show');
+    }
+}
+
+// Initial state
+toggleClearButton();
+attachPaginationListeners();
+
+// --- Delete Modal Logic ---
+function openDeleteModal(bookId) {
+    deleteForm.action = `/delete/${bookId}/`;
+    deleteModal.style.display = 'block';
+}
+
+function closeModal(modalId) {
+    document.getElementById(modalId).style.display = 'none';
+}
+
+// --- Add Book Modal Logic ---
+function openAddBookModal() {
+    addBookModal.style.display = 'block';
+}
+
+if (addBookBtn) {
+    addBookBtn.addEventListener('click', openAddBookModal);
+}
+if (emptyAddBookLink) {
+    emptyAddBookLink.addEventListener('click', (e) => {
+        e.preventDefault();
+        openAddBookModal();
+    });
+}
+
+function showToast(message, type) {
+    const container = document.querySelector('.message-container');
+    const card = document.createElement('div');
+    card.className = `message-card ${type}`;
+    card.innerHTML = `<p>${message}</p>`;
+    container.appendChild(card);
+
+    setTimeout(() => card.classList.add('show'), 100);
+    setTimeout(() => {
+        card.classList.remove('show');
+        setTimeout(() => card.remove(), 600);
+    }, 5000);
+}
+
+// --- Click outside to close models ---
+window.onclick = function (event) {
+    if (event.target == deleteModal) {
+        closeModal('deleteModal');
+    } else if (event.target == addBookModal) {
+        closeModal('addBookModal');
+    } else if (event.target == transferModal) {
+        closeModal('transferModal');
+    }
+}
+
+// --- Message Animation Script ---
+const messageCards = document.querySelectorAll('.message-container .message-card');
+
+if (messageCards.length > 0) {
+    messageCards.forEach((msg, index) => {
+        setTimeout(() => {
+            msg.classList.add('show');
+        }, 100 + (index * 200));
+
+        setTimeout(() => {
+            msg.style.opacity = '0';
+            msg.style.transform = 'translateX(40px)';
+            setTimeout(() => msg.remove(), 600);
+        }, 5000 + (index * 200));
+    });
+}
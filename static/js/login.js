@@ -0,0 +1,31 @@
+const loginForm = document.getElementById('loginForm');
+const loginButton = document.getElementById('loginButton');
+
+// --- Message Card Dismissal Logic ---
+const messageCards = document.querySelectorAll('.message-card');
+
+messageCards.forEach(msg => {
+    // 1. Show message immediately by adding the active class, triggering the slide-in CSS
+    setTimeout(() => {
+        msg.classList.add('active');
+    }, 50);
+
+    // 2. Hide and remove the message after 4 seconds
+    setTimeout(() => {
+        msg.style.opacity = '0';
+        msg.style.transform = 'translateX(50px)';
+        setTimeout(() => msg.remove(), 800);
+    }, 4000);
+});
+// ------------------------------------
+
+// Button Press Animation Logic (Timeout Removed)
+loginButton.addEventListener('click', function (e) {
+    if (loginForm.checkValidity()) {
+        // e.preventDefault() and the delayed submission (setTimeout) have been removed.
+        // The form will submit immediately after this code block executes.
+
+        this.classList.add('loading');
+        this.querySelector('.button-text').textContent = 'Authenticating...';
+    }
+});
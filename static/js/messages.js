@@ -0,0 +1,8 @@
+const messagesCard = document.querySelectorAll('.message-card');
+messagesCard.forEach(msg => {
+    setTimeout(() => {
+        msg.style.opacity = '0';
+        msg.style.transform = 'translateY(-25px)';
+        setTimeout(() => msg.remove(), 500);
+    }, 3000);
+});
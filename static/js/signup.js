@@ -0,0 +1,35 @@
+const signupForm = document.getElementById('signupForm');
+const signupButton = document.getElementById('signupButton');
+const messagesCard = document.querySelectorAll('.message-card');
+
+// Message Card Logic
+messagesCard.forEach(msg => {
+    // 1. Show the message with the animation effect (using the .show class)
+    setTimeout(() => {
+        msg.classList.add('show');
+    }, 50);
+
+    // 2. Hide and remove the message after the display time
+    setTimeout(() => {
+        msg.style.opacity = '0';
+        msg.style.transform = 'translateX(50px)'; // Slide out right
+        setTimeout(() => msg.remove(), 800); // Remove from DOM after transition
+    }, 4000); // Show for 4 seconds
+});
+
+// Button Press Animation Logic
+signupButton.addEventListener('click', function (e) {
+    // Only trigger the animation if the form is valid (browser check)
+    if (signupForm.checkValidity()) {
+        e.preventDefault(); // Stop immediate submission
+
+        // 1. Start loading animation and change text
+        this.classList.add('loading');
+        this.querySelector('.button-text').textContent = 'Creating Account...';
+
+        // 2. Simulate process/delay, then submit
+        setTimeout(() => {
+            signupForm.submit();
+        }, 2000); // 2-second delay before submission
+    }
+});
@@ -0,0 +1,72 @@
+const verifyForm = document.getElementById('verifyForm');
+const verifyButton = document.getElementById('verifyButton');
+const resendBtn = document.getElementById('resendBtn');
+const messagesCard = document.querySelectorAll('.message-card');
+
+// Message Card Animation Logic (Updated to use 'show' class)
+messagesCard.forEach(msg => {
+    // 1. Show the message with the animation effect
+    setTimeout(() => {
+        msg.classList.add('show');
+    }, 50);
+
+    // 2. Hide and remove the message after the display time
+    setTimeout(() => {
+        msg.style.opacity = '0';
+        msg.style.transform = 'translateX(50px)';
+        setTimeout(() => msg.remove(), 800);
+    }, 4000); // Increased display time for clarity (4s)
+});
+
+// Button Press Animation Logic (Verify Button)
+verifyButton.addEventListener('click', function (e) {
+    if (verifyForm.checkValidity()) {
+        e.preventDefault();
+        this.classList.add('loading');
+        this.querySelector('.button-text').textContent = 'Processing...';
+
+        // Submit the form after a short delay
+        setTimeout(() => {
+            verifyForm.submit();
+        }, 1500);
+    }
+});
+
+// Resend OTP Timer Logic (Your original logic, slightly modified)
+let timer = 40;
+let interval = setInterval(() => {
+    timer--;
+    resendBtn.textContent = `Resend OTP (${timer}s)`;
+    if (timer <= 0) {
+        clearInterval(interval);
+        resendBtn.textContent = "Resend OTP";
+        resendBtn.disabled = false;
+        resendBtn.classList.add('enabled');
+    }
+}, 1000);
+
+// Page refresh warning (Modified to use the common message card logic)
+window.onload = () => {
+    // Check if a message already exists on load to avoid overlap
+    if (messagesCard.length === 0) {
+        const refreshAlert = document.createElement('div');
+        refreshAlert.className = 'message-card info';
+        refreshAlert.innerHTML = "<p>Do not refresh the page! OTP delivery may take 30 seconds.</p>";
+
+        const messageContainer = document.getElementById('messageContainer');
+        if (messageContainer) {
+            messageContainer.appendChild(refreshAlert);
+
+            // Show/Hide logic for the dynamically created message
+            setTimeout(() => {
+                refreshAlert.classList.add('show');
+            }, 50);
+
+            setTimeout(() => {
+                refreshAlert.style.opacity = '0';
+                refreshAlert.style.transform = 'translateX(50px)';
+                setTimeout(() => refreshAlert.remove(), 800);
+            }, 4000);
+        }
+    }
+};